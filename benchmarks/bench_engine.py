@@ -0,0 +1,95 @@
+from datetime import datetime, timedelta
+
+from benchmarks.harness import benchmark, make_storage
+
+
+def _engine(ctx):
+    from core.user import User
+    from core.engine import Engine
+
+    storage = make_storage(ctx)
+    user = User()
+    user.stats = storage.load_stats()
+    return Engine(user, storage), storage
+
+
+# =========================
+# VALIDATION
+# =========================
+@benchmark("engine.validate_end_to_end", repeat=50)
+def bench_validate(ctx):
+    """
+    Chemin complet d'un clic VALIDER :
+    validate_objective + save_stats + complete_daily_objective + achievements
+    """
+    from core.achievement import check_achievements
+    from core.cooldown import CompletionIndex
+
+    engine, storage = _engine(ctx)
+    objective = storage.get_objective("pushups@0")
+
+    def run():
+        # lève le cooldown pour mesurer une validation acceptée
+        engine.completions = CompletionIndex()
+        engine.validate_objective(objective)
+        storage.save_stats(engine.user.stats)
+        storage.complete_daily_objective(objective.id)
+        check_achievements(engine.user.stats, storage)
+    return run
+
+
+@benchmark("engine.validate_rejected", repeat=200)
+def bench_validate_rejected(ctx):
+    """
+    Doublon rejeté par le cooldown (aucun accès DB attendu)
+    """
+    engine, storage = _engine(ctx)
+    objective = storage.get_objective("pushups@0")
+    engine.validate_objective(objective)
+
+    def run():
+        engine.validate_objective(objective)
+    return run
+
+
+@benchmark("engine.validate_many_100k", repeat=3, quick_repeat=2)
+def bench_validate_many(ctx):
+    """
+    Import en masse (DB neuve à chaque mesure, ouverture incluse)
+    """
+    ids = ["pushups@0", "squats@0", "plank@0", "walk@0", "stretch@0"]
+    start = datetime(2020, 1, 1)
+    count = ctx.size(100_000, 10_000)
+    records = [
+        (ids[i % len(ids)], start + timedelta(hours=5 * i))
+        for i in range(count)
+    ]
+
+    def run():
+        engine, _ = _engine(ctx)
+        engine.validate_many(records, assume_sorted=True)
+    return run
+
+
+# =========================
+# ACHIEVEMENTS
+# =========================
+@benchmark("achievements.check", repeat=200)
+def bench_achievements(ctx):
+    """
+    Profil avancé : toutes les conditions remplies, déjà débloquées
+    (cas courant : une requête par achievement, aucun déblocage)
+    """
+    from core.achievement import check_achievements
+    from core.stats import Stats
+
+    engine, storage = _engine(ctx)
+    engine.user.stats = Stats(
+        total_exp=5_000, total_validations=300, current_streak=10,
+        best_streak=10, validations_today=3, combo_validations=5,
+    )
+    check_achievements(engine.user.stats, storage)
+
+    def run():
+        check_achievements(engine.user.stats, storage)
+    return run
@@ -0,0 +1,143 @@
+from datetime import datetime, timedelta
+
+from benchmarks.harness import benchmark, make_storage, fill_catalog, fill_history
+
+
+# =========================
+# STARTUP
+# =========================
+@benchmark("startup.cold", repeat=10)
+def bench_cold_startup(ctx):
+    """
+    Ouverture DB neuve + création des tables + seed + stats
+    (équivalent du début de MainWindow.__init__)
+    """
+    from core.storage import Storage
+
+    def run():
+        storage = Storage(ctx.db_path())
+        storage.seed_objectives()
+        storage.load_stats()
+        storage.conn.close()
+    return run
+
+
+@benchmark("startup.warm", repeat=20)
+def bench_warm_startup(ctx):
+    """
+    Réouverture d'une DB existante
+    """
+    from core.storage import Storage
+
+    path = ctx.db_path()
+    Storage(path).seed_objectives()
+
+    def run():
+        storage = Storage(path)
+        storage.seed_objectives()
+        storage.load_stats()
+        storage.conn.close()
+    return run
+
+
+# =========================
+# DAILY POOL
+# =========================
+@benchmark("pool.generate_daily", repeat=50)
+def bench_daily_pool(ctx):
+    storage = make_storage(ctx)
+
+    def run():
+        # force un nouveau tirage à chaque mesure
+        storage.set_user_meta("date", None)
+        storage.generate_daily_pool(level=30, count=3)
+    return run
+
+
+# =========================
+# CATALOG
+# =========================
+def _catalog_bench(size: int):
+    def factory(ctx):
+        storage = make_storage(ctx)
+        fill_catalog(storage, size)
+
+        def run():
+            storage.load_objectives_for_level(100)
+        return run
+    return factory
+
+
+for _size in (10, 100, 1_000, 10_000):
+    benchmark(f"catalog.load.{_size}", repeat=20)(_catalog_bench(_size))
+
+
+@benchmark("catalog.search_50k", repeat=50)
+def bench_catalog_search(ctx):
+    """
+    Recherche plein texte (préfixe + filtres) sur 50k objectifs
+    """
+    from core.objective import Category
+
+    storage = make_storage(ctx)
+    fill_catalog(storage, 50_000)
+    queries = ["gain", "mobilite", "pompes lentes", "etirements compl", "velo"]
+    state = {"i": 0}
+
+    def run():
+        state["i"] += 1
+        query = queries[state["i"] % len(queries)]
+        storage.search_objectives(query, level=30, limit=20)
+        storage.search_objectives(query, category=Category.MENTAL, limit=20)
+    return run
+
+
+# =========================
+# HISTORY
+# =========================
+@benchmark("history.scan_1m", repeat=5, quick_repeat=3)
+def bench_history_scan(ctx):
+    """
+    Agrégats sur l'historique complet (1M lignes, 100k en --quick)
+    """
+    storage = make_storage(ctx)
+    fill_history(storage, ctx.size(1_000_000, 100_000))
+
+    def run():
+        storage.conn.execute("""
+        SELECT objective_id, COUNT(*), SUM(impact)
+        FROM history
+        GROUP BY objective_id
+        """).fetchall()
+    return run
+
+
+@benchmark("history.range_week_1m", repeat=20)
+def bench_history_range(ctx):
+    """
+    Lecture d'une semaine récente (utilise l'index timestamp)
+    """
+    storage = make_storage(ctx)
+    fill_history(storage, ctx.size(1_000_000, 100_000))
+    since = (datetime.now() - timedelta(days=7)).isoformat()
+
+    def run():
+        storage.conn.execute("""
+        SELECT COUNT(*), SUM(impact) FROM history WHERE timestamp >= ?
+        """, (since,)).fetchone()
+    return run
+
+
+@benchmark("history.rollup_month_by_category_1m", repeat=20)
+def bench_history_rollup(ctx):
+    """
+    Validations / EXP par catégorie sur 30 jours, lues dans les agrégats
+    (O(jours) au lieu de O(événements))
+    """
+    storage = make_storage(ctx)
+    fill_history(storage, ctx.size(1_000_000, 100_000))
+    since = (datetime.now() - timedelta(days=30)).date()
+
+    def run():
+        storage.daily_activity(since)
+    return run
@@ -0,0 +1,109 @@
+import os
+from pathlib import Path
+
+from benchmarks.harness import benchmark
+
+
+# Qt sans affichage : doit être défini avant la création de QApplication
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+_app = None
+
+
+def _qt_app():
+    """
+    QApplication unique (None si PySide6 absent → benchmarks UI ignorés)
+    """
+    global _app
+    try:
+        from PySide6.QtWidgets import QApplication
+    except ImportError:
+        return None
+
+    if _app is None:
+        _app = QApplication.instance() or QApplication([])
+    return _app
+
+
+def _main_window(ctx):
+    """
+    MainWindow sur une DB temporaire (Storage() utilise data/ relatif au cwd)
+    Attend la fin du chargement en arrière-plan (window.storage disponible)
+    """
+    from ui.main_window import MainWindow
+
+    cwd = os.getcwd()
+    workdir = Path(ctx.db_path()).with_suffix("")
+    workdir.mkdir()
+    os.chdir(workdir)
+    try:
+        window = MainWindow()
+        window.wait_until_ready()
+    finally:
+        os.chdir(cwd)
+    return window
+
+
+def _process_events():
+    _app.processEvents()
+
+
+@benchmark("ui.startup", repeat=5)
+def bench_ui_startup(ctx):
+    if _qt_app() is None:
+        return None
+
+    def run():
+        window = _main_window(ctx)
+        window.show()
+        _process_events()
+        window.close()
+        window.deleteLater()
+        _process_events()
+    return run
+
+
+@benchmark("ui.refresh_dashboard", repeat=30)
+def bench_refresh_dashboard(ctx):
+    if _qt_app() is None:
+        return None
+
+    window = _main_window(ctx)
+    window.show()
+
+    def run():
+        window.refresh_dashboard()
+        _process_events()
+    return run
+
+
+@benchmark("ui.validate_daily", repeat=3, quick_repeat=3)
+def bench_validate_daily(ctx):
+    """
+    Clic VALIDER complet (engine + achievements + refresh)
+    Les 3 quêtes du jour sont consommées : repeat ≤ 3
+    """
+    if _qt_app() is None:
+        return None
+
+    window = _main_window(ctx)
+    window.show()
+    _process_events()
+
+    from core.objective import Objective, Category, Frequency
+
+    def run():
+        rows = window.storage.load_daily_objectives()
+        if not rows:
+            return
+        row = rows[0]
+        window._validate_daily(Objective(
+            id=row["id"],
+            title=row["title"],
+            category=Category(row["category"]),
+            frequency=Frequency(row["frequency"]),
+            min_level=row["min_level"],
+            value=row["value"],
+        ))
+        _process_events()
+    return run
@@ -0,0 +1,194 @@
+import json
+import os
+import platform
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+
+# =========================
+# REGISTRY
+# =========================
+BENCHMARKS = []
+
+
+def benchmark(name: str, repeat: int = 20, quick_repeat: int | None = None):
+    """
+    Déclare un benchmark
+    La fonction décorée reçoit le contexte (ctx) et retourne
+    un callable mesuré repeat fois (setup exclu de la mesure)
+    """
+    def decorator(fn):
+        BENCHMARKS.append({
+            "name": name,
+            "fn": fn,
+            "repeat": repeat,
+            "quick_repeat": quick_repeat or max(3, repeat // 4),
+        })
+        return fn
+    return decorator
+
+
+class Context:
+    """
+    Paramètres communs + répertoire temporaire par benchmark
+    """
+
+    def __init__(self, quick: bool = False):
+        self.quick = quick
+        self._tmp = tempfile.TemporaryDirectory(prefix="ironsystem-bench-")
+        self.tmp = Path(self._tmp.name)
+        self._counter = 0
+
+    def db_path(self) -> str:
+        self._counter += 1
+        return str(self.tmp / f"bench_{self._counter}.db")
+
+    def size(self, full: int, quick: int) -> int:
+        return quick if self.quick else full
+
+    def close(self):
+        self._tmp.cleanup()
+
+
+# =========================
+# FIXTURES
+# =========================
+def make_storage(ctx: Context, seeded: bool = True):
+    from core.storage import Storage
+
+    storage = Storage(ctx.db_path())
+    if seeded:
+        storage.seed_objectives()
+    return storage
+
+
+def fill_catalog(storage, count: int):
+    """
+    Catalogue synthétique de count objectifs (en plus du catalogue de base)
+    """
+    from core.objective import Category, Frequency
+
+    categories = list(Category)
+    storage.conn.executemany("""
+    INSERT OR IGNORE INTO objectives (id, title, category, frequency, min_level, value)
+    VALUES (?, ?, ?, ?, ?, ?)
+    """, [
+        (
+            f"bench_{i}",
+            _synthetic_title(i),
+            categories[i % len(categories)].value,
+            Frequency.DAILY.value,
+            1 + i % 50,
+            10 + i % 40,
+        )
+        for i in range(count)
+    ])
+    storage.conn.commit()
+
+
+_EXERCISES = (
+    "Pompes", "Squats", "Gainage", "Fentes", "Burpees", "Tractions", "Dips",
+    "Mobilité", "Étirements", "Respiration", "Marche", "Jogging", "Vélo",
+    "Corde à sauter", "Rameur", "Natation", "Yoga", "Abdos", "Pont fessier",
+)
+_VARIANTS = (
+    "lentes", "explosives", "sur une jambe", "déclinées", "isométriques",
+    "complètes", "légères", "en pyramide", "tempo 3-1-3", "avec pause",
+)
+
+
+def _synthetic_title(i: int) -> str:
+    return (
+        f"{_EXERCISES[i % len(_EXERCISES)]} "
+        f"{_VARIANTS[(i // len(_EXERCISES)) % len(_VARIANTS)]} {5 + i % 95}"
+    )
+
+
+def fill_history(storage, count: int, days: int = 730):
+    """
+    count validations réparties sur days jours
+    """
+    from core.history import HistoryEntry
+
+    ids = [o.id for o in storage.load_objectives()]
+    start = datetime.now() - timedelta(days=days)
+    step = days * 86400 / max(1, count)
+
+    storage.log_history_many(
+        HistoryEntry(start + timedelta(seconds=i * step), "validate", 10, ids[i % len(ids)])
+        for i in range(count)
+    )
+
+
+# =========================
+# MEASURE
+# =========================
+def measure(run, repeat: int) -> dict:
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        run()
+        samples.append((time.perf_counter() - t0) * 1000)
+
+    samples.sort()
+    return {
+        "repeat": repeat,
+        "min_ms": round(samples[0], 4),
+        "median_ms": round(statistics.median(samples), 4),
+        "p95_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 4),
+        "max_ms": round(samples[-1], 4),
+    }
+
+
+def environment() -> dict:
+    import sqlite3
+
+    return {
+        "date": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+# =========================
+# RESULTS (JSON + BASELINE)
+# =========================
+def save_results(results: dict, path: str):
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2, ensure_ascii=False)
+
+
+def load_results(path: str) -> dict:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def compare(current: dict, baseline: dict, threshold: float = 0.20) -> list[dict]:
+    """
+    Compare les médianes, retourne les lignes du rapport
+    regression = plus lent que la baseline de plus de threshold
+    """
+    rows = []
+    base = baseline.get("benchmarks", {})
+
+    for name, result in current.get("benchmarks", {}).items():
+        if name not in base or "median_ms" not in result:
+            continue
+        before = base[name]["median_ms"]
+        after = result["median_ms"]
+        ratio = after / before if before else float("inf")
+        rows.append({
+            "name": name,
+            "baseline_ms": before,
+            "current_ms": after,
+            "ratio": round(ratio, 3),
+            "regression": ratio > 1 + threshold,
+        })
+
+    return rows
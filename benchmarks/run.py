@@ -0,0 +1,86 @@
+"""
+Benchmarks IronSystem
+
+    python -m benchmarks.run                       # tout, affichage console
+    python -m benchmarks.run --quick               # tailles réduites
+    python -m benchmarks.run -k catalog            # filtre par nom
+    python -m benchmarks.run --save out.json       # résultats JSON
+    python -m benchmarks.run --compare base.json   # vs baseline (code 1 si régression)
+
+Les benchmarks UI tournent en Qt offscreen (QT_QPA_PLATFORM=offscreen)
+et sont ignorés si PySide6 n'est pas installé
+"""
+import argparse
+import sys
+
+from benchmarks import bench_storage, bench_engine, bench_ui  # noqa: F401 (enregistrement)
+from benchmarks.harness import (
+    BENCHMARKS, Context, measure, environment,
+    save_results, load_results, compare
+)
+
+
+def run_benchmarks(quick: bool = False, pattern: str | None = None) -> dict:
+    results = {}
+
+    for bench in BENCHMARKS:
+        name = bench["name"]
+        if pattern and pattern not in name:
+            continue
+
+        ctx = Context(quick=quick)
+        try:
+            run = bench["fn"](ctx)
+            if run is None:
+                results[name] = {"skipped": True}
+                print(f"{name:<32} skipped")
+                continue
+
+            repeat = bench["quick_repeat"] if quick else bench["repeat"]
+            results[name] = measure(run, repeat)
+            print(
+                f"{name:<32} median {results[name]['median_ms']:>10.3f} ms"
+                f"   p95 {results[name]['p95_ms']:>10.3f} ms"
+            )
+        finally:
+            ctx.close()
+
+    return {
+        "environment": environment(),
+        "quick": quick,
+        "benchmarks": results,
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.run")
+    parser.add_argument("--quick", action="store_true")
+    parser.add_argument("-k", dest="pattern")
+    parser.add_argument("--save", help="fichier JSON de résultats")
+    parser.add_argument("--compare", help="baseline JSON à comparer")
+    parser.add_argument("--threshold", type=float, default=0.20,
+                        help="tolérance avant régression (0.20 = +20%%)")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(quick=args.quick, pattern=args.pattern)
+
+    if args.save:
+        save_results(results, args.save)
+
+    if args.compare:
+        rows = compare(results, load_results(args.compare), args.threshold)
+        print()
+        for row in rows:
+            flag = "REGRESSION" if row["regression"] else "ok"
+            print(
+                f"{row['name']:<32} {row['baseline_ms']:>10.3f} → "
+                f"{row['current_ms']:>10.3f} ms  x{row['ratio']:<6} {flag}"
+            )
+        if any(row["regression"] for row in rows):
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -9,3 +9,54 @@ class Achievement:
     id: int
     title: str
     description: str
+
+
+def achievement_conditions(stats) -> dict[int, bool]:
+    """
+    Conditions de déblocage des achievements
+    Doit matcher EXACTEMENT achievements_window.py
+    """
+    level = stats.get_level()
+
+    return {
+        # publics
+        1: stats.total_validations >= 1,
+        2: stats.total_validations >= 5,
+        3: stats.current_streak >= 3,
+        4: stats.total_validations >= 25,
+        5: level >= 5,
+        6: level >= 10,
+
+        # secrets
+        100: level >= 7,
+        101: stats.validations_today >= 3,
+        102: stats.current_streak >= 7,
+        103: stats.combo_validations >= 5,
+    }
+
+
+def achievement_rarity(ach_id: int) -> str:
+    """
+    Rareté d'un achievement
+    Doit matcher achievements_window.py
+    """
+    if ach_id >= 100:
+        return "legendary"
+    if ach_id in (3, 4, 5):
+        return "rare"
+    return "common"
+
+
+def check_achievements(stats, storage) -> list[int]:
+    """
+    Débloque les achievements remplis et retourne les ids nouvellement débloqués
+    (utilisé par l'UI et par le mode headless)
+    """
+    unlocked = []
+
+    for ach_id, reached in achievement_conditions(stats).items():
+        if reached and not storage.is_achievement_unlocked(ach_id):
+            storage.unlock_achievement(ach_id)
+            unlocked.append(ach_id)
+
+    return unlocked
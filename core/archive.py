@@ -0,0 +1,345 @@
+import json
+import logging
+import sqlite3
+import threading
+import time
+import zlib
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+from core.instrumentation import timed
+
+logger = logging.getLogger("ironsystem.archive")
+
+HORIZON_DAYS = 365
+BATCH_SIZE = 5000
+
+# colonnes conservées pour chaque évènement archivé
+_COLUMNS = "id, user_id, timestamp, action, objective_id, impact, origin, origin_id"
+
+# entrées du journal de sync dont la ligne est archivée (clé : id, user_id, jour)
+ARCHIVED_HISTORY = "history_archive"
+
+
+class HistoryArchive:
+    """
+    Archivage à froid de l'historique
+    - évènements plus vieux que l'horizon déplacés vers une DB par année
+      (<stem>-history-<année>.db) : blocs zlib par (utilisateur, jour)
+    - les agrégats journaliers (rollup_daily) restent dans la DB active :
+      graphiques et rapports ne lisent jamais l'archive
+    - déplacement par lots bornés, chaque lot dans une seule transaction
+      (DB active + archive attachée : commit atomique) ; idempotent : un
+      évènement déjà archivé (DB restaurée) est seulement retiré
+    - lecture : archives ouvertes en lecture seule, à la demande
+    Les évènements legacy_* restent dans la DB active (réimport legacy) ;
+    les évènements pas encore synchronisés gardent leur entrée du journal
+    de sync, repointée vers l'archive (relus par lookup)
+    """
+
+    def __init__(self, db_path: str = "data/ironsystem.db", archive_dir=None,
+                 horizon_days: int = HORIZON_DAYS, batch_size: int = BATCH_SIZE):
+        self.db_path = str(db_path)
+        self.archive_dir = Path(archive_dir or Path(self.db_path).parent / "archive")
+        self.stem = Path(self.db_path).stem
+        self.horizon_days = horizon_days
+        self.batch_size = batch_size
+
+    def path_for(self, year: int) -> Path:
+        return self.archive_dir / f"{self.stem}-history-{year}.db"
+
+    def years(self) -> list[int]:
+        years = []
+        for path in self.archive_dir.glob(f"{self.stem}-history-*.db"):
+            suffix = path.stem.rsplit("-", 1)[-1]
+            if suffix.isdigit():
+                years.append(int(suffix))
+        return sorted(years)
+
+    def horizon(self, now: datetime | None = None) -> str:
+        """
+        Limite (ISO, exclue) : les évènements antérieurs sont archivables
+        """
+        day = (now or datetime.now()).date() - timedelta(days=self.horizon_days)
+        return day.isoformat()
+
+    # =========================
+    # COMPACTAGE
+    # =========================
+    def due(self, now: datetime | None = None) -> bool:
+        """
+        True s'il reste des évènements à archiver (sonde d'index)
+        """
+        conn = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True)
+        try:
+            return conn.execute("""
+            SELECT 1 FROM history
+            WHERE timestamp < ? AND action NOT LIKE 'legacy%'
+            LIMIT 1
+            """, (self.horizon(now),)).fetchone() is not None
+        finally:
+            conn.close()
+
+    def compact_batch(self, conn, now: datetime | None = None) -> int:
+        """
+        Archive au plus batch_size évènements (les plus anciens, une seule
+        année par lot) ; retourne le nombre d'évènements déplacés
+        conn : connexion dédiée (isolation_level=None), hors transaction
+        """
+        first = conn.execute("""
+        SELECT timestamp FROM history
+        WHERE timestamp < ? AND action NOT LIKE 'legacy%'
+        ORDER BY timestamp LIMIT 1
+        """, (self.horizon(now),)).fetchone()
+        if first is None:
+            return 0
+
+        year = int(first[0][:4])
+        limit = min(self.horizon(now), f"{year + 1}")
+
+        self.archive_dir.mkdir(parents=True, exist_ok=True)
+        conn.execute("ATTACH DATABASE ? AS archive", (str(self.path_for(year)),))
+        try:
+            conn.execute("""
+            CREATE TABLE IF NOT EXISTS archive.history_blocks (
+                user_id INTEGER NOT NULL,
+                day TEXT NOT NULL,
+                first_id INTEGER NOT NULL,
+                rows INTEGER NOT NULL,
+                payload BLOB NOT NULL,
+                PRIMARY KEY (user_id, day, first_id)
+            ) WITHOUT ROWID
+            """)
+            conn.execute("""
+            CREATE INDEX IF NOT EXISTS archive.idx_history_blocks_day
+            ON history_blocks (day)
+            """)
+
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = conn.execute(f"""
+                SELECT {_COLUMNS} FROM history
+                WHERE timestamp < ? AND action NOT LIKE 'legacy%'
+                ORDER BY timestamp LIMIT ?
+                """, (limit, self.batch_size)).fetchall()
+
+                # déjà archivés (DB restaurée d'avant un compactage) :
+                # seulement retirés de la DB active
+                archived = self._archived_ids(conn, {(row[1], row[2][:10]) for row in rows})
+                blocks = {}
+                for row in rows:
+                    if row[0] not in archived:
+                        blocks.setdefault((row[1], row[2][:10]), []).append(row)
+
+                conn.executemany("""
+                INSERT INTO archive.history_blocks (user_id, day, first_id, rows, payload)
+                VALUES (?, ?, ?, ?, ?)
+                """, (
+                    (user_id, day, block[0][0], len(block), _pack(block))
+                    for (user_id, day), block in blocks.items()
+                ))
+                conn.executemany(
+                    "DELETE FROM history WHERE id = ?", ((row[0],) for row in rows)
+                )
+                # journal de sync : entrées locales déjà envoyées supprimées,
+                # les autres (jamais poussées, à servir aux autres appareils)
+                # repointées vers l'archive
+                pushed = conn.execute("""
+                SELECT value FROM daily_meta WHERE key = 'sync:push'
+                """).fetchone()
+                conn.executemany("""
+                DELETE FROM sync_changes
+                WHERE tbl = 'history' AND key = ? AND device IS NULL AND seq <= ?
+                """, ((f"[{row[0]}]", int(pushed[0]) if pushed else 0) for row in rows))
+                conn.executemany(f"""
+                UPDATE OR REPLACE sync_changes SET tbl = '{ARCHIVED_HISTORY}', key = json_array(?, ?, ?)
+                WHERE tbl = 'history' AND key = ?
+                """, ((row[0], row[1], row[2][:10], f"[{row[0]}]") for row in rows))
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        finally:
+            conn.execute("DETACH DATABASE archive")
+
+        # pages libérées rendues au système (DB en auto_vacuum incrémental)
+        # executescript : exécuté jusqu'au bout (execute ne libère qu'une page)
+        conn.executescript("PRAGMA incremental_vacuum;")
+        return len(rows)
+
+    def _archived_ids(self, conn, keys) -> set:
+        # ids déjà présents dans les blocs (utilisateur, jour) de l'archive attachée
+        ids = set()
+        for user_id, day in keys:
+            for (payload,) in conn.execute("""
+            SELECT payload FROM archive.history_blocks WHERE user_id = ? AND day = ?
+            """, (user_id, day)):
+                ids.update(row[0] for row in _unpack(payload))
+        return ids
+
+    @timed("archive.compact")
+    def compact(self, now: datetime | None = None, max_batches: int | None = None,
+                sleep: float = 0.05, progress=None) -> int:
+        """
+        Archive par lots jusqu'à l'horizon (ou max_batches lots)
+        - sleep : pause entre deux lots (l'app garde la main sur la DB)
+        - progress(moved) : appelé après chaque lot
+        Retourne le nombre total d'évènements archivés
+        """
+        conn = sqlite3.connect(self.db_path, timeout=60, isolation_level=None)
+        total = 0
+        try:
+            batches = 0
+            while max_batches is None or batches < max_batches:
+                moved = self.compact_batch(conn, now)
+                if not moved:
+                    break
+                total += moved
+                batches += 1
+                if progress is not None:
+                    progress(total)
+                time.sleep(sleep)
+        finally:
+            conn.close()
+        return total
+
+    def compact_in_background(self, after: threading.Thread | None = None,
+                              **kwargs) -> threading.Thread:
+        """
+        Lance compact() dans un thread démon
+        after : thread à attendre d'abord (ex : sauvegarde en cours, que
+        les écritures du compactage feraient recommencer)
+        """
+        def run():
+            if after is not None:
+                after.join()
+            try:
+                logger.info("archive: %s évènements", self.compact(**kwargs))
+            except (OSError, sqlite3.Error):
+                logger.exception("archive failed")
+
+        thread = threading.Thread(target=run, name="ironsystem-archive", daemon=True)
+        thread.start()
+        return thread
+
+    # =========================
+    # LECTURE
+    # =========================
+    def read(self, user_id: int | None = None, start: date | None = None,
+             end: date | None = None):
+        """
+        Évènements archivés, par jour croissant puis timestamp
+        Tuples (id, user_id, timestamp, action, objective_id, impact,
+        origin, origin_id) ; bornes start / end incluses (jours)
+        Seules les archives des années concernées sont ouvertes
+        """
+        filters, params = [], []
+        if user_id is not None:
+            filters.append("user_id = ?")
+            params.append(user_id)
+        if start is not None:
+            filters.append("day >= ?")
+            params.append(start.isoformat())
+        if end is not None:
+            filters.append("day <= ?")
+            params.append(end.isoformat())
+        where = f"WHERE {' AND '.join(filters)}" if filters else ""
+
+        for year in self.years():
+            if (start and year < start.year) or (end and year > end.year):
+                continue
+
+            conn = sqlite3.connect(f"file:{self.path_for(year)}?mode=ro", uri=True)
+            try:
+                day, rows = None, []
+                for block_day, payload in conn.execute(f"""
+                SELECT day, payload FROM history_blocks {where}
+                ORDER BY day, user_id, first_id
+                """, params):
+                    if block_day != day:
+                        yield from sorted(rows, key=lambda r: (r[2], r[0]))
+                        day, rows = block_day, []
+                    rows.extend(_unpack(payload))
+                yield from sorted(rows, key=lambda r: (r[2], r[0]))
+            finally:
+                conn.close()
+
+    def lookup(self, keys) -> dict:
+        """
+        Évènements archivés retrouvés par id, {id: tuple comme read()}
+        keys : (id, user_id, jour ISO) ; un bloc lu par (utilisateur, jour)
+        """
+        wanted = {}
+        for event_id, user_id, day in keys:
+            blocks = wanted.setdefault(int(day[:4]), {})
+            blocks.setdefault((user_id, day), set()).add(event_id)
+
+        found = {}
+        for year, blocks in wanted.items():
+            path = self.path_for(year)
+            if not path.exists():
+                continue
+            conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+            try:
+                for (user_id, day), ids in blocks.items():
+                    for (payload,) in conn.execute("""
+                    SELECT payload FROM history_blocks WHERE user_id = ? AND day = ?
+                    """, (user_id, day)):
+                        for row in _unpack(payload):
+                            if row[0] in ids:
+                                found[row[0]] = row
+            finally:
+                conn.close()
+        return found
+
+    def max_id(self) -> int:
+        """
+        Plus grand id archivé (0 si aucun) : décompresse tous les blocs,
+        réservé aux migrations
+        """
+        last = 0
+        for year in self.years():
+            conn = sqlite3.connect(f"file:{self.path_for(year)}?mode=ro", uri=True)
+            try:
+                for (payload,) in conn.execute("SELECT payload FROM history_blocks"):
+                    last = max(last, max(row[0] for row in _unpack(payload)))
+            finally:
+                conn.close()
+        return last
+
+    def count(self) -> int:
+        """
+        Nombre d'évènements archivés (en-têtes des blocs, sans décompresser)
+        """
+        total = 0
+        for year in self.years():
+            conn = sqlite3.connect(f"file:{self.path_for(year)}?mode=ro", uri=True)
+            try:
+                total += conn.execute(
+                    "SELECT COALESCE(SUM(rows), 0) FROM history_blocks"
+                ).fetchone()[0]
+            finally:
+                conn.close()
+        return total
+
+    def user_ids(self) -> set:
+        users = set()
+        for year in self.years():
+            conn = sqlite3.connect(f"file:{self.path_for(year)}?mode=ro", uri=True)
+            try:
+                users.update(r[0] for r in conn.execute(
+                    "SELECT DISTINCT user_id FROM history_blocks"
+                ))
+            finally:
+                conn.close()
+        return users
+
+
+def _pack(rows) -> bytes:
+    return zlib.compress(
+        json.dumps([list(r) for r in rows], separators=(",", ":")).encode("utf-8"), 9
+    )
+
+
+def _unpack(payload: bytes) -> list:
+    return [tuple(r) for r in json.loads(zlib.decompress(payload))]
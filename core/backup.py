@@ -0,0 +1,341 @@
+import gzip
+import heapq
+import logging
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from itertools import groupby
+from operator import itemgetter
+from pathlib import Path
+
+from core.archive import HistoryArchive
+from core.rollups import VALIDATIONS
+from core.instrumentation import timed
+
+logger = logging.getLogger("ironsystem.backup")
+
+# horodatage encodé dans le nom des sauvegardes
+_STAMP_FORMAT = "%Y%m%dT%H%M%S"
+_SUFFIX = ".db.gz"
+
+
+@dataclass
+class Backup:
+    """
+    Sauvegarde compressée présente sur disque
+    """
+    path: Path
+    taken_at: datetime
+    size: int
+
+
+class BackupManager:
+    """
+    Sauvegardes à chaud de la DB SQLite
+    - copie en ligne via l'API backup de SQLite, par paquets de pages
+      (les écritures de l'app ne sont jamais bloquées longtemps)
+    - fichiers compressés (gzip) : <stem>-<horodatage>.db.gz
+    - rétention tournante : dernières N + 1 par jour / semaine / mois
+    - restauration complète ou à un instant donné (rejeu de l'historique)
+    """
+
+    def __init__(self, db_path: str = "data/ironsystem.db", backup_dir=None,
+                 keep_last: int = 3, keep_daily: int = 7,
+                 keep_weekly: int = 4, keep_monthly: int = 12):
+        self.db_path = str(db_path)
+        self.backup_dir = Path(backup_dir or Path(self.db_path).parent / "backups")
+        self.stem = Path(self.db_path).stem
+
+        self.keep_last = keep_last
+        self.keep_daily = keep_daily
+        self.keep_weekly = keep_weekly
+        self.keep_monthly = keep_monthly
+
+    # =========================
+    # BACKUP
+    # =========================
+    @timed("backup.run")
+    def backup(self, pages: int = 256, sleep: float = 0.005,
+               progress=None, now: datetime | None = None) -> Path:
+        """
+        Copie la DB (connexion dédiée) puis compresse le résultat
+        - pages : pages copiées par étape (verrou relâché entre deux étapes)
+        - sleep : pause entre deux étapes (secondes)
+        - progress(status, remaining, total) : callback SQLite optionnel
+        """
+        now = now or datetime.now()
+        self.backup_dir.mkdir(parents=True, exist_ok=True)
+        self._cleanup_partials()
+
+        target = self._path_for(now)
+        while target.exists():
+            # deux sauvegardes dans la même seconde (ex : avant restauration)
+            now += timedelta(seconds=1)
+            target = self._path_for(now)
+        raw = target.with_name(target.name + ".raw.partial")
+        packed = target.with_name(target.name + ".partial")
+
+        try:
+            src = sqlite3.connect(self.db_path)
+            dst = sqlite3.connect(raw)
+            try:
+                src.backup(dst, pages=pages, progress=progress, sleep=sleep)
+                check = dst.execute("PRAGMA quick_check").fetchone()[0]
+            finally:
+                dst.close()
+                src.close()
+            if check != "ok":
+                raise sqlite3.DatabaseError(f"sauvegarde corrompue : {check}")
+
+            with open(raw, "rb") as f_in, gzip.open(packed, "wb", compresslevel=6) as f_out:
+                shutil.copyfileobj(f_in, f_out, 1 << 20)
+            os.replace(packed, target)
+        finally:
+            for leftover in (raw, packed):
+                leftover.unlink(missing_ok=True)
+
+        self.prune()
+        return target
+
+    def backup_in_background(self, **kwargs) -> threading.Thread:
+        """
+        Lance backup() dans un thread démon (connexions dédiées,
+        le thread UI n'est jamais bloqué)
+        """
+        def run():
+            try:
+                logger.info("backup: %s", self.backup(**kwargs))
+            except (OSError, sqlite3.Error):
+                logger.exception("backup failed")
+
+        thread = threading.Thread(target=run, name="ironsystem-backup", daemon=True)
+        thread.start()
+        return thread
+
+    def _path_for(self, taken_at: datetime) -> Path:
+        return self.backup_dir / f"{self.stem}-{taken_at.strftime(_STAMP_FORMAT)}{_SUFFIX}"
+
+    def due(self, interval: timedelta = timedelta(days=1),
+            now: datetime | None = None) -> bool:
+        """
+        True si la dernière sauvegarde date de plus de interval
+        """
+        backups = self.list_backups()
+        if not backups:
+            return True
+        return (now or datetime.now()) - backups[0].taken_at >= interval
+
+    def _cleanup_partials(self):
+        # restes d'une sauvegarde interrompue (fermeture de l'app, crash…)
+        for leftover in self.backup_dir.glob(f"{self.stem}-*.partial"):
+            leftover.unlink(missing_ok=True)
+
+    # =========================
+    # LISTING / RETENTION
+    # =========================
+    def list_backups(self) -> list[Backup]:
+        """
+        Sauvegardes disponibles, de la plus récente à la plus ancienne
+        """
+        backups = []
+        for path in self.backup_dir.glob(f"{self.stem}-*{_SUFFIX}"):
+            stamp = path.name[len(self.stem) + 1:-len(_SUFFIX)]
+            try:
+                taken_at = datetime.strptime(stamp, _STAMP_FORMAT)
+            except ValueError:
+                continue
+            backups.append(Backup(path, taken_at, path.stat().st_size))
+
+        backups.sort(key=lambda b: b.taken_at, reverse=True)
+        return backups
+
+    def prune(self) -> list[Path]:
+        """
+        Applique la rétention, retourne les fichiers supprimés
+        - les keep_last plus récentes
+        - la plus récente de chacun des keep_daily derniers jours,
+          keep_weekly dernières semaines ISO, keep_monthly derniers mois
+        """
+        backups = self.list_backups()
+        keep = {b.path for b in backups[:self.keep_last]}
+
+        buckets = (
+            (self.keep_daily, lambda d: d.date()),
+            (self.keep_weekly, lambda d: d.isocalendar()[:2]),
+            (self.keep_monthly, lambda d: (d.year, d.month)),
+        )
+        for limit, bucket in buckets:
+            seen = set()
+            for b in backups:
+                key = bucket(b.taken_at)
+                if key in seen:
+                    continue
+                if len(seen) >= limit:
+                    break
+                seen.add(key)
+                keep.add(b.path)
+
+        removed = []
+        for b in backups:
+            if b.path not in keep:
+                b.path.unlink(missing_ok=True)
+                removed.append(b.path)
+        return removed
+
+    def latest_before(self, at: datetime) -> Backup | None:
+        for b in self.list_backups():
+            if b.taken_at <= at:
+                return b
+        return None
+
+    # =========================
+    # RESTORE
+    # =========================
+    def restore(self, backup=None, target=None, now: datetime | None = None) -> Path:
+        """
+        Restaure une sauvegarde (la plus récente par défaut) sur target
+        L'état courant est d'abord sauvegardé (retour arrière possible)
+        Évènements archivés depuis la sauvegarde : retirés aussitôt de la
+        DB restaurée (compactage, idempotent), jamais lus en double
+        """
+        if backup is None:
+            backups = self.list_backups()
+            if not backups:
+                raise FileNotFoundError(f"aucune sauvegarde dans {self.backup_dir}")
+            backup = backups[0].path
+
+        with tempfile.TemporaryDirectory(prefix="ironsystem-restore-") as tmp:
+            work = Path(tmp) / "restore.db"
+            _decompress(backup, work)
+            self._install(work, target)
+
+        HistoryArchive(target or self.db_path).compact(now=now, sleep=0)
+        return Path(backup)
+
+    @timed("backup.restore_to")
+    def restore_to(self, at, target=None, source=None) -> dict:
+        """
+        Restauration à un instant donné
+        - base : dernière sauvegarde prise avant at (DB vide sinon)
+        - rejeu des validations de l'historique de source (DB courante
+          par défaut, archives annuelles incluses) postérieures à la base,
+          jusqu'à at inclus ; validations annulées ("undo") exclues
+        - EXP / streak / cooldowns / achievements recalculés par l'Engine
+        """
+        from core.achievement import check_achievements
+        from core.engine import Engine
+        from core.storage import Storage
+        from core.user import User
+
+        if isinstance(at, str):
+            at = datetime.fromisoformat(at)
+        source = str(source or self.db_path)
+        base = self.latest_before(at)
+
+        with tempfile.TemporaryDirectory(prefix="ironsystem-pitr-") as tmp:
+            work = Path(tmp) / "pitr.db"
+            if base is not None:
+                _decompress(base.path, work)
+
+            storage = Storage(work)
+            storage.seed_objectives()
+
+            # dernier évènement déjà présent dans la base, par utilisateur
+            replayed_until = dict(storage.conn.execute(
+                "SELECT user_id, MAX(timestamp) FROM history GROUP BY user_id"
+            ).fetchall())
+
+            # évènements archivés (DB annuelles) + DB active, fusionnés par date
+            archive = HistoryArchive(source)
+            src = sqlite3.connect(f"file:{source}?mode=ro", uri=True)
+            try:
+                users = {r[0] for r in src.execute("SELECT DISTINCT user_id FROM history")}
+                users |= archive.user_ids()
+
+                replayed = 0
+                for user_id in sorted(users):
+                    since = replayed_until.get(user_id) or ""
+                    hot = src.execute("""
+                    SELECT objective_id, timestamp, action FROM history
+                    WHERE user_id = ? AND action IN ('validate', 'undo')
+                    AND timestamp > ? AND timestamp <= ?
+                    ORDER BY timestamp
+                    """, (user_id, since, at.isoformat()))
+                    cold = (
+                        (oid, ts, action)
+                        for _, _, ts, action, oid, _, _, _
+                        in archive.read(user_id, end=at.date())
+                        if action in VALIDATIONS and since < ts <= at.isoformat()
+                    )
+
+                    view = storage.for_user(user_id)
+                    user = User()
+                    user.stats = view.load_stats()
+
+                    replayed += Engine(user, view).validate_many(
+                        _net_validations(heapq.merge(cold, hot, key=itemgetter(1))),
+                        assume_sorted=True,
+                    )
+                    check_achievements(user.stats, view)
+            finally:
+                src.close()
+
+            storage.conn.close()
+            self._install(work, target)
+
+        return {
+            "base": str(base.path) if base else None,
+            "replayed": replayed,
+            "at": at.isoformat(),
+        }
+
+    def _install(self, work: Path, target=None):
+        """
+        Copie work sur target via l'API backup (gère les verrous
+        et remplace le contenu sans toucher au fichier lui-même)
+        """
+        target = str(target or self.db_path)
+
+        src = sqlite3.connect(work)
+        try:
+            check = src.execute("PRAGMA integrity_check").fetchone()[0]
+            if check != "ok":
+                raise sqlite3.DatabaseError(f"sauvegarde corrompue : {check}")
+
+            if os.path.exists(target):
+                BackupManager(
+                    target, self.backup_dir, keep_last=self.keep_last,
+                    keep_daily=self.keep_daily, keep_weekly=self.keep_weekly,
+                    keep_monthly=self.keep_monthly,
+                ).backup()
+
+            dst = sqlite3.connect(target)
+            try:
+                src.backup(dst)
+            finally:
+                dst.close()
+        finally:
+            src.close()
+
+
+def _net_validations(events):
+    """
+    (objective_id, timestamp, action) triés par timestamp → validations
+    non annulées (un "undo" porte le timestamp de sa validation)
+    """
+    for timestamp, group in groupby(events, key=itemgetter(1)):
+        counts = {}
+        for objective_id, _, action in group:
+            counts[objective_id] = counts.get(objective_id, 0) + VALIDATIONS[action]
+        for objective_id, count in counts.items():
+            for _ in range(count):
+                yield objective_id, timestamp
+
+
+def _decompress(path, dest: Path):
+    with gzip.open(path, "rb") as f_in, open(dest, "wb") as f_out:
+        shutil.copyfileobj(f_in, f_out, 1 << 20)
@@ -0,0 +1,131 @@
+import hashlib
+import json
+import marshal
+import os
+from pathlib import Path
+
+from core.objective import Category, Frequency
+from core.quests import template_from_entry
+
+
+# Catalogue source (éditable) — embarqué avec assets/
+CATALOG_PATH = Path(__file__).resolve().parent.parent / "assets" / "objectives.json"
+
+# format du cache compilé (à incrémenter si la structure change)
+_CACHE_FORMAT = 2
+
+
+def catalog_hash(path=CATALOG_PATH, cache_path=None) -> str:
+    """
+    Hash du contenu du catalogue
+    Cas courant : lu dans l'en-tête du cache (stat du fichier, pas de lecture)
+    """
+    header = _cached_header(path, cache_path)
+    if header is not None:
+        return header[3]
+    return compile_catalog(path, cache_path)[0]
+
+
+def compile_catalog(path=CATALOG_PATH, cache_path=None):
+    """
+    Retourne (hash, rows, templates) — tuples prêts pour l'upsert SQL
+    - rows : (id, title, category, frequency, min_level, value)
+    - templates : (id, title, category, frequency, min_level,
+      base, slope, cap, exp_base, exp_slope, exp_cap, step)
+    Depuis le cache binaire s'il est à jour, sinon parse + validation du JSON
+    """
+    header = _cached_header(path, cache_path)
+    if header is not None:
+        try:
+            with open(cache_path, "rb") as f:
+                marshal.load(f)
+                rows, templates = marshal.load(f)
+                return header[3], rows, templates
+        except (OSError, EOFError, ValueError, TypeError):
+            pass
+
+    raw = Path(path).read_bytes()
+    digest = hashlib.sha256(raw).hexdigest()
+    rows, templates = _parse(raw)
+
+    if cache_path is not None:
+        _write_cache(path, cache_path, digest, (rows, templates))
+
+    return digest, rows, templates
+
+
+# -------------------------
+# PARSE / VALIDATION
+# -------------------------
+def _parse(raw: bytes) -> tuple[list[tuple], list[tuple]]:
+    data = json.loads(raw)
+
+    rows = []
+    seen_ids = set()
+    for entry in data["objectives"]:
+        # 🔒 Anti-doublons par ID
+        if entry["id"] in seen_ids:
+            continue
+        seen_ids.add(entry["id"])
+
+        rows.append((
+            str(entry["id"]),
+            str(entry["title"]),
+            Category(entry["category"]).value,
+            Frequency(entry["frequency"]).value,
+            int(entry["min_level"]),
+            int(entry["value"]),
+        ))
+
+    # modèles paramétriques (core/quests.py)
+    templates = []
+    for entry in data.get("templates", []):
+        t = template_from_entry(entry)
+        if t.id in seen_ids:
+            continue
+        seen_ids.add(t.id)
+
+        templates.append((
+            t.id, t.title, t.category.value, t.frequency.value, t.min_level,
+            t.base, t.slope, t.cap, t.exp_base, t.exp_slope, t.exp_cap, t.step,
+        ))
+    return rows, templates
+
+
+# -------------------------
+# CACHE BINAIRE (marshal)
+# en-tête : (format, source, (mtime_ns, taille), hash) puis (rows, templates)
+# -------------------------
+def _stamp(path) -> tuple:
+    st = os.stat(path)
+    return (st.st_mtime_ns, st.st_size)
+
+
+def _cached_header(path, cache_path):
+    if cache_path is None:
+        return None
+    try:
+        with open(cache_path, "rb") as f:
+            header = marshal.load(f)
+        if (
+            header[0] == _CACHE_FORMAT
+            and header[1] == str(Path(path).resolve())
+            and header[2] == _stamp(path)
+        ):
+            return header
+    except (OSError, EOFError, ValueError, TypeError, IndexError):
+        pass
+    return None
+
+
+def _write_cache(path, cache_path, digest: str, payload: tuple):
+    header = (_CACHE_FORMAT, str(Path(path).resolve()), _stamp(path), digest)
+    tmp = f"{cache_path}.tmp"
+    try:
+        Path(cache_path).parent.mkdir(parents=True, exist_ok=True)
+        with open(tmp, "wb") as f:
+            marshal.dump(header, f)
+            marshal.dump(payload, f)
+        os.replace(tmp, cache_path)
+    except OSError:
+        pass  # cache facultatif
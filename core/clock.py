@@ -0,0 +1,36 @@
+from datetime import date, datetime, timedelta
+
+
+class Clock:
+    """
+    Horloge injectable (Engine, Storage, scheduler)
+    Par défaut : heure système
+    """
+
+    def now(self) -> datetime:
+        return datetime.now()
+
+    def today(self) -> date:
+        return self.now().date()
+
+
+class SimulatedClock(Clock):
+    """
+    Horloge manuelle : le temps n'avance que sur demande
+    (simulation accélérée, rejeu reproductible)
+    """
+
+    def __init__(self, start: datetime):
+        self._now = start
+
+    def now(self) -> datetime:
+        return self._now
+
+    def set(self, moment: datetime):
+        self._now = moment
+
+    def advance(self, **delta):
+        self._now += timedelta(**delta)
+
+
+SYSTEM_CLOCK = Clock()
@@ -0,0 +1,132 @@
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import date
+
+from core.achievement import achievement_conditions, check_achievements
+from core.objective import Frequency, period_key
+from core.instrumentation import timed
+
+
+# validations annulables (les plus anciennes sortent de la pile)
+UNDO_LIMIT = 20
+
+
+@dataclass
+class ValidationCommand:
+    """
+    Validation exécutée, avec tout ce qu'il faut pour la compenser
+    - history_id : ligne d'historique à compenser
+    - previous : complétion précédente de l'objectif (cooldown)
+    - before : Stats.streak_state() avant la validation
+    - boards : tableaux d'où la quête a été retirée
+    - unlocked : achievements débloqués par cette validation
+    """
+    objective: object
+    day: date
+    history_id: int
+    previous: date | None
+    before: tuple
+    boards: list = field(default_factory=list)
+    unlocked: list = field(default_factory=list)
+
+
+class CommandStack:
+    """
+    Validations réversibles (annulation d'un clic VALIDER)
+    - execute : validation + stats + tableau + achievements, une transaction
+    - undo : action compensatoire de la dernière validation, une transaction
+      (évènement "undo" ajouté à l'historique et aux agrégats, cooldown et
+      quête remis, EXP / streak recalculés sur la seule fenêtre touchée,
+      achievements revérifiés)
+    - pile bornée en mémoire (limit), perdue à la fermeture
+    Une annulation coûte autant qu'une validation : aucun rejeu
+    """
+
+    def __init__(self, engine, limit: int = UNDO_LIMIT):
+        self.engine = engine
+        self.storage = engine.storage
+        self._done = deque(maxlen=limit)
+
+    def can_undo(self) -> bool:
+        return bool(self._done)
+
+    def peek(self) -> ValidationCommand | None:
+        return self._done[-1] if self._done else None
+
+    def clear(self):
+        self._done.clear()
+
+    @timed("commands.execute")
+    def execute(self, objective) -> ValidationCommand | None:
+        """
+        Valide objective ; None si cooldown en cours
+        """
+        stats = self.engine.user.stats
+        previous = self.engine.completions.last_completed(objective.id)
+        before = stats.streak_state()
+
+        with self.storage.batch():
+            history_id = self.engine.record_validation(objective)
+            if history_id is None:
+                return None
+
+            # 💾 SAUVEGARDE STATS (OBLIGATOIRE)
+            self.storage.save_stats(stats)
+            boards = self.storage.complete_daily_objective(objective.id)
+            unlocked = check_achievements(stats, self.storage)
+
+        command = ValidationCommand(
+            objective=objective,
+            day=objective.last_completed,
+            history_id=history_id,
+            previous=previous,
+            before=before,
+            boards=boards,
+            unlocked=unlocked,
+        )
+        self._done.append(command)
+        return command
+
+    @timed("commands.undo")
+    def undo(self) -> ValidationCommand | None:
+        """
+        Annule la dernière validation ; None si la pile est vide
+        """
+        if not self._done:
+            return None
+        command = self._done.pop()
+        stats = self.engine.user.stats
+        today = self.engine.clock.today()
+
+        with self.storage.batch():
+            self.storage.undo_history(command.history_id)
+            remaining = self.storage.validations_on(command.day)
+
+            self.engine.revert_validation(
+                command.objective, command.day, remaining,
+                command.before, command.previous,
+            )
+            # EXP de la semaine retirée seulement si gagnée cette semaine
+            this_week = (
+                period_key(Frequency.WEEKLY, command.day)
+                == period_key(Frequency.WEEKLY, today)
+            )
+            self.storage.save_stats(stats, track_weekly=this_week)
+
+            self.storage.restore_objective_completion(
+                command.objective.id, command.previous
+            )
+            # quête remise en jeu sur les tableaux encore dans la même période
+            boards = [
+                board for board in command.boards
+                if period_key(Frequency(board), command.day)
+                == period_key(Frequency(board), today)
+            ]
+            self.storage.restore_board_objective(command.objective.id, boards)
+
+            conditions = achievement_conditions(stats)
+            for achievement_id in command.unlocked:
+                if not conditions[achievement_id]:
+                    self.storage.lock_achievement(achievement_id)
+
+        return command
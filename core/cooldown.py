@@ -0,0 +1,46 @@
+from datetime import date
+
+from core.objective import Objective, period_key
+
+
+class CompletionIndex:
+    """
+    Index mémoire : dernière complétion par objectif
+    - chargé en une requête depuis objective_progress
+    - tenu à jour à chaque validation (record)
+    - vérification de cooldown en O(1), sans aller-retour SQLite
+    """
+
+    def __init__(self, last_completed: dict[str, date] | None = None):
+        self._last = dict(last_completed or {})
+
+    @classmethod
+    def from_storage(cls, storage) -> "CompletionIndex":
+        return cls(storage.load_last_completions())
+
+    def last_completed(self, objective_id: str) -> date | None:
+        return self._last.get(objective_id)
+
+    def can_complete(self, objective: Objective, day: date) -> bool:
+        """
+        Vrai si objective n'a pas déjà été validé dans la période de day
+        (jour, semaine ISO… selon sa fréquence)
+        """
+        last = self._last.get(objective.id)
+        if last is None:
+            return True
+        return period_key(objective.frequency, last) != period_key(objective.frequency, day)
+
+    def record(self, objective_id: str, day: date):
+        last = self._last.get(objective_id)
+        if last is None or day > last:
+            self._last[objective_id] = day
+
+    def restore(self, objective_id: str, day: date | None):
+        """
+        Remet une dernière complétion (annulation), None = jamais complété
+        """
+        if day is None:
+            self._last.pop(objective_id, None)
+        else:
+            self._last[objective_id] = day
@@ -1,35 +1,161 @@
 from datetime import date, datetime
+from operator import itemgetter
 from core.history import HistoryEntry
+from core.cooldown import CompletionIndex
+from core.objective import period_key
+from core.instrumentation import timed
 
 
 class Engine:
-    def __init__(self, user, storage):
+    # taille des transactions lors d'un import en masse
+    IMPORT_BATCH_SIZE = 50_000
+
+    def __init__(self, user, storage, clock=None):
         self.user = user
         self.storage = storage
+        # même horloge que le stockage sauf injection explicite
+        self.clock = clock or storage.clock
 
-    def validate_objective(self, objective):
-        if not objective.can_be_completed_today():
-            return False
+        # ⏳ cooldowns (daily / semaine ISO) sans requête SQL
+        self.completions = CompletionIndex.from_storage(storage)
 
+    @timed("engine.validate_objective")
+    def validate_objective(self, objective):
+        return self.record_validation(objective) is not None
+
+    def record_validation(self, objective) -> int | None:
+        """
+        Valide objective ; retourne l'id de la ligne d'historique
+        (None : cooldown en cours)
+        """
+        now = self.clock.now()
+        if not self.completions.can_complete(objective, now.date()):
+            return None
+
+        self._apply_validation(objective, now.date())
+
+        # 💾 persistance (complétion, historique et agrégats : une transaction)
+        with self.storage.batch():
+            self.storage.save_objective_completion(objective)
+            return self.storage.log_history(
+                HistoryEntry(now, "validate", objective.value, objective.id)
+            )
+
+    def _apply_validation(self, objective, day: date):
+        """
+        Effets d'une validation en mémoire (EXP, stats, streak / combo)
+        Partagé entre validation unitaire et import en masse
+        """
         # ➕ EXP
         self.user.stats.add_exp(objective.value)
 
-        # ➕ stats
-        self.user.stats.total_validations += 1
-        self.user.stats.register_validation()
-
-        # 📅 IMPORTANT : définir la date ICI
-        objective.last_completed = date.today()
-
-        # 💾 persistance
-        self.storage.save_objective_completion(objective)
-
-        return True
-
-
+        # ➕ stats (total_validations compté par register_validation)
+        self.user.stats.register_validation(day)
+
+        # 📅 IMPORTANT : définir la date ICI (jamais en arrière : imports)
+        if objective.last_completed is None or day > objective.last_completed:
+            objective.last_completed = day
+        self.completions.record(objective.id, day)
+
+    def revert_validation(self, objective, day: date, remaining: int,
+                          before: tuple, previous: date | None):
+        """
+        Effets inverses de _apply_validation (annulation)
+        - remaining : validations restantes le jour day
+        - before : streak_state() avant la validation
+        - previous : complétion précédente de l'objectif
+        """
+        self.user.stats.add_exp(-objective.value)
+        self.user.stats.unregister_validation(day, remaining, before)
+
+        objective.last_completed = previous
+        self.completions.restore(objective.id, previous)
+
+    # -------------------------
+    # IMPORT / REJEU EN MASSE
+    # -------------------------
+    @timed("engine.validate_many")
+    def validate_many(self, records, batch_size: int = IMPORT_BATCH_SIZE,
+                      assume_sorted: bool = False) -> int:
+        """
+        Importe un flux de validations (objective_id, timestamp)
+        - timestamp : datetime, date ou chaîne ISO
+        - traitées dans l'ordre chronologique (tri en mémoire,
+          sauf si assume_sorted : le flux est alors consommé au fil de l'eau)
+        - EXP, streak et combo appliqués en mémoire
+        - persistance par transactions de batch_size validations
+        - objectifs inconnus et doublons dans une même période ignorés
+        - validations antérieures à la dernière connue : EXP et totaux,
+          puis streaks recalculés sur l'ensemble des jours (jamais en arrière)
+        Retourne le nombre de validations appliquées
+        """
+        catalog = {o.id: o for o in self.storage.load_objectives()}
+
+        events = ((oid, _to_datetime(ts)) for oid, ts in records)
+        if not assume_sorted:
+            events = sorted(events, key=itemgetter(1))
+
+        history = []
+        completions = {}
+        # dernière période importée par objectif (les imports peuvent
+        # précéder la dernière complétion connue de l'index)
+        imported_periods = {}
+        applied = 0
+        backdated = False
+
+        for objective_id, timestamp in events:
+            objective = catalog.get(objective_id)
+            if objective is None:
+                if objective_id in catalog:
+                    continue
+                # quête générée pas encore matérialisée (None = inconnu, mémorisé)
+                objective = catalog[objective_id] = self.storage.get_objective(objective_id)
+                if objective is None:
+                    continue
+
+            day = timestamp.date()
+            period = period_key(objective.frequency, day)
+            if (
+                imported_periods.get(objective_id) == period
+                or not self.completions.can_complete(objective, day)
+            ):
+                continue
+            imported_periods[objective_id] = period
+
+            last_day = self.user.stats.last_validation_date
+            backdated = backdated or (last_day is not None and day < last_day)
+            self._apply_validation(objective, day)
+
+            completions[objective_id] = day
+            history.append(
+                HistoryEntry(timestamp, "validate", objective.value, objective_id)
+            )
+            applied += 1
+
+            if len(history) >= batch_size:
+                self._flush_import(history, completions)
+                history = []
+                completions = {}
+
+        if history:
+            self._flush_import(history, completions)
+
+        if backdated:
+            # jours importés (agrégats) + jours existants : streaks fusionnés
+            self.user.stats.rebuild_streak(self.storage.validation_days())
+            self.storage.save_stats(self.user.stats, track_weekly=False)
+
+        return applied
+
+    def _flush_import(self, history, completions):
+        with self.storage.batch():
+            self.storage.log_history_many(history)
+            self.storage.save_completions(completions)
+            # EXP historique : ne compte pas dans le classement hebdo
+            self.storage.save_stats(self.user.stats, track_weekly=False)
 
     def _update_streak(self):
-        today = date.today()
+        today = self.clock.today()
         last_day = self.storage.get_last_validation_date()
 
         if last_day is None:
@@ -49,3 +175,11 @@ class Engine:
             self.user.stats.best_streak,
             self.user.stats.current_streak
         )
+
+
+def _to_datetime(value) -> datetime:
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, date):
+        return datetime.combine(value, datetime.min.time())
+    return datetime.fromisoformat(value)
@@ -0,0 +1,281 @@
+import csv
+import json
+import os
+import sqlite3
+from pathlib import Path
+
+from core.archive import HistoryArchive
+from core.instrumentation import timed
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:  # dépendance optionnelle : repli CSV
+    pyarrow = None
+
+
+CHUNK_SIZE = 50_000
+FORMATS = ("parquet", "arrow", "csv")
+
+_EXTENSIONS = {"parquet": ".parquet", "arrow": ".arrow", "csv": ".csv"}
+_WATERMARK_FILE = "_watermark.json"
+
+# tables exportées : colonnes (nom, type) ; "int" ou "str"
+SNAPSHOT_TABLES = {
+    "objectives": [
+        ("id", "str"), ("title", "str"), ("category", "str"), ("frequency", "str"),
+        ("min_level", "int"), ("value", "int"), ("template", "str"), ("active", "int"),
+    ],
+    "objective_progress": [
+        ("user_id", "int"), ("objective_id", "str"), ("last_completed", "str"),
+    ],
+    "stats": [
+        ("id", "int"), ("total_exp", "int"), ("total_validations", "int"),
+        ("current_streak", "int"), ("best_streak", "int"),
+        ("last_validation_date", "str"),
+    ],
+    "achievements": [
+        ("user_id", "int"), ("id", "int"), ("unlocked", "int"),
+    ],
+}
+HISTORY_COLUMNS = [
+    ("id", "int"), ("user_id", "int"), ("timestamp", "str"), ("action", "str"),
+    ("objective_id", "str"), ("impact", "int"),
+]
+
+
+def default_format() -> str:
+    return "parquet" if pyarrow is not None else "csv"
+
+
+# =========================
+# WRITERS (flux, mémoire constante)
+# =========================
+class _CsvWriter:
+    def __init__(self, path: Path, columns):
+        self.f = open(path, "w", newline="", encoding="utf-8")
+        self.writer = csv.writer(self.f)
+        self.writer.writerow([name for name, _ in columns])
+
+    def write(self, rows):
+        self.writer.writerows(rows)
+
+    def close(self):
+        self.f.close()
+
+
+class _ArrowWriter:
+    """
+    Parquet (un row group par paquet) ou Arrow IPC (un batch par paquet)
+    """
+
+    def __init__(self, path: Path, columns, fmt: str):
+        self.names = [name for name, _ in columns]
+        self.schema = pyarrow.schema([
+            (name, pyarrow.int64() if kind == "int" else pyarrow.string())
+            for name, kind in columns
+        ])
+        if fmt == "parquet":
+            self.writer = pyarrow.parquet.ParquetWriter(str(path), self.schema)
+        else:
+            self.sink = pyarrow.OSFile(str(path), "wb")
+            self.writer = pyarrow.ipc.new_file(self.sink, self.schema)
+        self.fmt = fmt
+
+    def write(self, rows):
+        columns = list(zip(*rows)) if rows else [[] for _ in self.names]
+        batch = pyarrow.record_batch(
+            [pyarrow.array(values, type=field.type)
+             for values, field in zip(columns, self.schema)],
+            schema=self.schema,
+        )
+        self.writer.write_batch(batch)
+
+    def close(self):
+        self.writer.close()
+        if self.fmt == "arrow":
+            self.sink.close()
+
+
+def _open_writer(path: Path, columns, fmt: str):
+    if fmt == "csv":
+        return _CsvWriter(path, columns)
+    if pyarrow is None:
+        raise RuntimeError(f"format {fmt} : pyarrow n'est pas installé")
+    return _ArrowWriter(path, columns, fmt)
+
+
+# =========================
+# EXPORT
+# =========================
+class Exporter:
+    """
+    Export des données pour l'analyse
+    - tables de référence / état (objectives, objective_progress, stats,
+      achievements) : instantané complet à chaque export (O(utilisateurs))
+    - historique : incrémental depuis le watermark (dernier id attribué),
+      un fichier par export (history-<premier id>-<dernier id>) ; un
+      évènement antidaté déjà archivé entre deux exports est relu dans
+      l'archive (seulement si elle a grossi depuis le dernier export)
+    - lecture par paquets de chunk_size lignes (pagination par clé : aucun
+      verrou gardé entre deux paquets, l'app continue d'écrire)
+    - fichiers écrits en .partial puis renommés (supprimés en cas
+      d'erreur) ; watermark mis à jour en dernier (export interrompu =
+      rejoué à l'identique)
+    Un évènement archivé pendant l'export peut y figurer deux fois (même id)
+    """
+
+    def __init__(self, db_path: str, out_dir, fmt: str | None = None,
+                 chunk_size: int = CHUNK_SIZE):
+        fmt = fmt or default_format()
+        if fmt not in FORMATS:
+            raise ValueError(f"format inconnu : {fmt}")
+        self.db_path = str(db_path)
+        self.out_dir = Path(out_dir)
+        self.fmt = fmt
+        self.chunk_size = chunk_size
+
+    @property
+    def watermark_path(self) -> Path:
+        return self.out_dir / _WATERMARK_FILE
+
+    def watermark(self) -> int:
+        return self._load_watermark()[0]
+
+    def _load_watermark(self) -> tuple[int, int | None]:
+        # (dernier id exporté, évènements archivés à ce moment-là)
+        try:
+            mark = json.loads(self.watermark_path.read_text())
+            return int(mark["history"]), mark.get("archived")
+        except (OSError, ValueError, KeyError, TypeError):
+            return 0, None
+
+    @timed("export.run")
+    def run(self, full: bool = False, progress=None) -> dict:
+        """
+        Exporte (full : ignore le watermark, archives comprises)
+        progress(table, rows) : appelé après chaque paquet
+        Retourne {table: lignes exportées, "watermark": dernier id}
+        """
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True)
+        report = {}
+        try:
+            for table, columns in SNAPSHOT_TABLES.items():
+                report[table] = self._write(
+                    table, columns, self._keyset(conn, table, columns), progress
+                )
+
+            since, archived = (0, None) if full else self._load_watermark()
+            # dernier id attribué (AUTOINCREMENT) : couvre aussi les
+            # évènements déjà archivés, absents de history
+            until = conn.execute("""
+            SELECT COALESCE(
+                (SELECT seq FROM sqlite_sequence WHERE name = 'history'),
+                (SELECT MAX(id) FROM history), 0)
+            """).fetchone()[0]
+            until = max(until, since)
+            report["history"], archived = self._export_history(
+                conn, since, until, archived, progress
+            )
+            report["watermark"] = until
+        finally:
+            conn.close()
+
+        self._save_watermark(report["watermark"], archived)
+        return report
+
+    def _export_history(self, conn, since: int, until: int, archived, progress):
+        """
+        Exporte les évènements d'ids (since, until]
+        archived : évènements archivés au dernier export (None : inconnu)
+        Retourne (lignes exportées, évènements archivés à cet export)
+        """
+        archive = HistoryArchive(self.db_path)
+        if since and until == since:
+            return 0, archive.count()
+        count = None
+
+        def chunks():
+            nonlocal count
+            yield from self._keyset(
+                conn, "history", HISTORY_COLUMNS, key="id", start=since, stop=until
+            )
+            # compté après la lecture de history : un évènement déplacé
+            # depuis est forcément dans l'archive relue ici (export complet :
+            # archived inconnu, archive toujours relue)
+            count = archive.count()
+            if count != archived:
+                yield from self._archived(archive, since, until)
+
+        name = f"history-{since + 1}-{until}"
+        exported = self._write(name, HISTORY_COLUMNS, chunks(), progress)
+
+        if since == 0:
+            # export complet : remplace les fichiers incrémentaux précédents
+            for old in self.out_dir.glob(f"history-*{_EXTENSIONS[self.fmt]}"):
+                if old.stem != name:
+                    old.unlink()
+        return exported, count
+
+    def _archived(self, archive: HistoryArchive, since: int, until: int):
+        """
+        Paquets d'évènements archivés d'ids (since, until]
+        """
+        chunk = []
+        for row in archive.read():
+            if since < row[0] <= until:
+                chunk.append(row[:len(HISTORY_COLUMNS)])
+                if len(chunk) >= self.chunk_size:
+                    yield chunk
+                    chunk = []
+        if chunk:
+            yield chunk
+
+    def _keyset(self, conn, table: str, columns, key: str = "rowid",
+                start: int = 0, stop: int | None = None):
+        """
+        Paquets de lignes par clé croissante, bornes (start, stop]
+        Chaque paquet = une requête courte (verrou relâché entre deux)
+        """
+        select = ", ".join(name for name, _ in columns)
+        bound = f"AND {key} <= {int(stop)}" if stop is not None else ""
+        last = start
+        while True:
+            rows = conn.execute(f"""
+            SELECT {key}, {select} FROM {table}
+            WHERE {key} > ? {bound}
+            ORDER BY {key} LIMIT ?
+            """, (last, self.chunk_size)).fetchall()
+            if not rows:
+                return
+            last = rows[-1][0]
+            yield [row[1:] for row in rows]
+
+    def _write(self, name: str, columns, chunks, progress) -> int:
+        target = self.out_dir / f"{name}{_EXTENSIONS[self.fmt]}"
+        partial = target.with_name(target.name + ".partial")
+
+        count = 0
+        try:
+            writer = _open_writer(partial, columns, self.fmt)
+            try:
+                for rows in chunks:
+                    writer.write(rows)
+                    count += len(rows)
+                    if progress is not None:
+                        progress(name, count)
+            finally:
+                writer.close()
+            os.replace(partial, target)
+        except BaseException:
+            # pas de .partial orphelin (disque plein, DB verrouillée, Ctrl+C…)
+            partial.unlink(missing_ok=True)
+            raise
+        return count
+
+    def _save_watermark(self, history_id: int, archived: int | None = None):
+        tmp = self.watermark_path.with_name(_WATERMARK_FILE + ".partial")
+        tmp.write_text(json.dumps({"history": history_id, "archived": archived}))
+        os.replace(tmp, self.watermark_path)
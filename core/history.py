@@ -7,3 +7,4 @@ class HistoryEntry:
     timestamp: datetime
     action: str
     impact: int  # points / streak impact
+    objective_id: str | None = None
@@ -0,0 +1,120 @@
+import getpass
+import hashlib
+import json
+import os
+import socket
+import sys
+import tempfile
+import time
+
+# Client du mécanisme d'instance unique (serveur : ui/single_instance.py)
+# Bibliothèque standard uniquement : un second lancement transmet ses
+# arguments et se termine sans importer Qt ni ouvrir la DB
+
+CONNECT_WAIT = 2.0
+REPLY_TIMEOUT = 30.0
+
+
+def server_name(db_path: str) -> str:
+    """
+    Nom du QLocalServer, un par DB et par utilisateur système
+    - POSIX : chemin absolu du socket Unix (même chemin côté Qt et Python)
+    - Windows : nom du pipe (\\\\.\\pipe\\<nom>)
+    """
+    key = f"{getpass.getuser()}:{os.path.abspath(db_path)}"
+    name = f"ironsystem-{hashlib.sha1(key.encode('utf-8')).hexdigest()[:12]}"
+    if sys.platform == "win32":
+        return name
+    return os.path.join(tempfile.gettempdir(), f"{name}.sock")
+
+
+def lock_path(db_path: str) -> str:
+    return os.path.splitext(os.path.abspath(db_path))[0] + ".lock"
+
+
+def forward(argv: list, db_path: str, wait: float = 0.0,
+            timeout: float = REPLY_TIMEOUT) -> dict | None:
+    """
+    Transmet argv à l'instance en cours, retourne sa réponse
+    ({"output": [lignes]}) ou None si aucune instance n'écoute
+    wait : durée pendant laquelle réessayer la connexion (instance en
+    cours de démarrage)
+    """
+    deadline = time.monotonic() + wait
+    while True:
+        try:
+            channel = _connect(server_name(db_path), timeout)
+            break
+        except OSError:
+            if time.monotonic() >= deadline:
+                return None
+            time.sleep(0.05)
+
+    try:
+        channel.send(json.dumps({"argv": list(argv)}).encode("utf-8") + b"\n")
+        data = channel.read_line()
+    except OSError:
+        return None
+    finally:
+        channel.close()
+
+    try:
+        return json.loads(data) if data else {}
+    except ValueError:
+        return {}
+
+
+# =========================
+# TRANSPORT
+# =========================
+class _SocketChannel:
+    def __init__(self, path: str, timeout: float):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(timeout)
+        try:
+            self.sock.connect(path)
+        except OSError:
+            self.sock.close()
+            raise
+
+    def send(self, data: bytes):
+        self.sock.sendall(data)
+
+    def read_line(self) -> bytes:
+        data = b""
+        while not data.endswith(b"\n"):
+            chunk = self.sock.recv(4096)
+            if not chunk:
+                break
+            data += chunk
+        return data
+
+    def close(self):
+        self.sock.close()
+
+
+class _PipeChannel:
+    # pipe nommé Windows (QLocalServer), lectures bloquantes
+    def __init__(self, name: str):
+        self.pipe = open(rf"\\.\pipe\{name}", "r+b", buffering=0)
+
+    def send(self, data: bytes):
+        self.pipe.write(data)
+
+    def read_line(self) -> bytes:
+        data = b""
+        while not data.endswith(b"\n"):
+            chunk = self.pipe.read(4096)
+            if not chunk:
+                break
+            data += chunk
+        return data
+
+    def close(self):
+        self.pipe.close()
+
+
+def _connect(name: str, timeout: float):
+    if sys.platform == "win32":
+        return _PipeChannel(name)
+    return _SocketChannel(name, timeout)
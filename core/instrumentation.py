@@ -0,0 +1,217 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from functools import wraps
+
+
+logger = logging.getLogger("ironsystem.instrumentation")
+
+# =========================
+# ÉTAT GLOBAL
+# =========================
+# Désactivé : chaque point instrumenté ne coûte qu'un test de booléen
+_enabled = os.environ.get("IRONSYSTEM_DEBUG", "") not in ("", "0")
+
+# seuil du slow-query log (ms)
+slow_query_ms = float(os.environ.get("IRONSYSTEM_SLOW_QUERY_MS", 20))
+
+# taille de la fenêtre glissante des percentiles
+WINDOW = 1024
+
+_durations = {}                    # nom → deque des dernières durées (ms)
+_counts = {}                       # nom → nombre total d'appels
+slow_queries = deque(maxlen=200)   # dernières requêtes lentes
+traces = deque(maxlen=50)          # derniers chemins critiques (spans imbriqués)
+
+_local = threading.local()
+
+
+def enable(threshold_ms: float | None = None):
+    global _enabled, slow_query_ms
+    _enabled = True
+    if threshold_ms is not None:
+        slow_query_ms = threshold_ms
+
+
+def disable():
+    global _enabled
+    _enabled = False
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def reset():
+    _durations.clear()
+    _counts.clear()
+    slow_queries.clear()
+    traces.clear()
+
+
+# =========================
+# SPANS
+# =========================
+def record(name: str, ms: float):
+    window = _durations.get(name)
+    if window is None:
+        window = _durations[name] = deque(maxlen=WINDOW)
+        _counts[name] = 0
+    window.append(ms)
+    _counts[name] += 1
+
+
+def timed(name: str):
+    """
+    Décorateur de span : durée enregistrée sous name
+    Les spans imbriqués forment une trace (chemin critique)
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+
+            stack = getattr(_local, "stack", None)
+            if stack is None:
+                stack = _local.stack = []
+
+            trace = stack[-1][1] if stack else []
+            entry = [name, len(stack), 0.0]
+            trace.append(entry)
+            stack.append((name, trace))
+
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                ms = (time.perf_counter() - start) * 1000
+                entry[2] = round(ms, 4)
+                stack.pop()
+                record(name, ms)
+                if not stack:
+                    traces.append(trace)
+        return wrapper
+    return decorator
+
+
+def instrumented(prefix: str, skip: tuple = ()):
+    """
+    Décorateur de classe : un span par méthode (prefix.nom)
+    """
+    def decorator(cls):
+        for attr, value in list(vars(cls).items()):
+            if attr.startswith("__") or attr in skip or not callable(value):
+                continue
+            setattr(cls, attr, timed(f"{prefix}.{attr}")(value))
+        return cls
+    return decorator
+
+
+# =========================
+# SQL (SLOW-QUERY LOG)
+# =========================
+class TracedCursor(sqlite3.Cursor):
+    """
+    Curseur chronométré : chaque requête alimente le span "sql",
+    celles au-dessus du seuil vont dans le slow-query log
+    """
+
+    def execute(self, sql, parameters=()):
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            self._observe(sql, parameters, (time.perf_counter() - start) * 1000, True)
+
+    def executemany(self, sql, seq_of_parameters):
+        start = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            self._observe(sql, None, (time.perf_counter() - start) * 1000, False)
+
+    def _observe(self, sql, parameters, ms, explain):
+        if not _enabled:
+            return
+        record("sql", ms)
+        if ms < slow_query_ms:
+            return
+
+        plan = None
+        if explain:
+            try:
+                rows = sqlite3.Cursor(self.connection).execute(
+                    "EXPLAIN QUERY PLAN " + sql, parameters
+                ).fetchall()
+                plan = [row[-1] for row in rows]
+            except sqlite3.Error:
+                pass
+
+        entry = {
+            "sql": " ".join(sql.split()),
+            "params": list(parameters) if parameters is not None else None,
+            "ms": round(ms, 3),
+            "plan": plan,
+        }
+        slow_queries.append(entry)
+        logger.warning("slow query %.1f ms: %s %s plan=%s",
+                       ms, entry["sql"], entry["params"], plan)
+
+
+class TracedConnection(sqlite3.Connection):
+    def cursor(self, factory=TracedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+
+def connection_factory():
+    """
+    Connexion instrumentée seulement si activé à l'ouverture
+    (sinon sqlite3.Connection : coût nul)
+    """
+    return TracedConnection if _enabled else sqlite3.Connection
+
+
+# =========================
+# REPORT
+# =========================
+def percentiles(name: str) -> dict:
+    window = sorted(_durations.get(name, ()))
+    if not window:
+        return {"count": 0}
+
+    def pick(q):
+        return round(window[min(len(window) - 1, int(len(window) * q))], 4)
+
+    return {
+        "count": _counts[name],
+        "p50_ms": pick(0.50),
+        "p95_ms": pick(0.95),
+        "p99_ms": pick(0.99),
+    }
+
+
+def report() -> dict:
+    return {
+        "spans": {name: percentiles(name) for name in sorted(_durations)},
+        "slow_queries": list(slow_queries),
+        "last_trace": list(traces[-1]) if traces else [],
+    }
+
+
+def log_report():
+    data = report()
+    for name, p in data["spans"].items():
+        logger.info("%-40s n=%-6d p50=%.3f p95=%.3f p99=%.3f ms",
+                    name, p["count"], p["p50_ms"], p["p95_ms"], p["p99_ms"])
+    for name, depth, ms in data["last_trace"]:
+        logger.info("trace %s%s %.3f ms", "  " * depth, name, ms)
@@ -0,0 +1,331 @@
+from datetime import date, timedelta
+
+
+# tableaux disponibles (clé → libellé)
+BOARDS = {
+    "exp": "EXP totale",
+    "streak": "Streak actuel",
+    "weekly": "EXP de la semaine",
+}
+
+# capacité initiale de l'arbre (scores 0 → 1023), doublée à la demande
+_INITIAL_CAPACITY = 1024
+
+
+def board_key(board: str, day: date) -> str:
+    """
+    Clé stockée d'un tableau
+    Le tableau hebdo change de clé chaque semaine ISO :
+    le reset ne touche à aucune ligne existante
+    """
+    if board == "weekly":
+        year, week, _ = day.isocalendar()
+        return f"weekly:{year}-W{week:02d}"
+    return board
+
+
+def create_tables(cursor) -> bool:
+    """
+    Tables matérialisées
+    - leaderboard_scores : score courant (index score DESC → top / voisins)
+    - leaderboard_tree : arbre de Fenwick (effectifs par score, nœuds
+      non nuls uniquement) → rang en O(log n)
+    - leaderboard_meta : capacité de l'arbre par tableau
+    Retourne True si les tables viennent d'être créées
+    """
+    exists = cursor.execute("""
+    SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'leaderboard_scores'
+    """).fetchone()
+
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS leaderboard_scores (
+        board TEXT NOT NULL,
+        user_id INTEGER NOT NULL,
+        score INTEGER NOT NULL,
+        PRIMARY KEY (board, user_id)
+    )
+    """)
+    cursor.execute("""
+    CREATE INDEX IF NOT EXISTS idx_leaderboard_rank
+    ON leaderboard_scores (board, score DESC, user_id)
+    """)
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS leaderboard_tree (
+        board TEXT NOT NULL,
+        node INTEGER NOT NULL,
+        count INTEGER NOT NULL,
+        PRIMARY KEY (board, node)
+    ) WITHOUT ROWID
+    """)
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS leaderboard_meta (
+        board TEXT PRIMARY KEY,
+        capacity INTEGER NOT NULL
+    )
+    """)
+    return exists is None
+
+
+class Leaderboard:
+    """
+    Classement matérialisé d'un tableau
+    - set_score / add_score : mise à jour incrémentale, O(log n)
+    - rank : rang (classement "1224", ex-aequo au même rang), O(log n)
+    - page / around : top-N paginé et voisins d'un utilisateur
+      (arbre pour trouver la position, index pour lire la page)
+    Écrit sur la connexion fournie, sans commit (transaction de l'appelant)
+    """
+
+    def __init__(self, conn, key: str):
+        self.conn = conn
+        self.key = key
+
+    # =========================
+    # UPDATE
+    # =========================
+    def set_score(self, user_id: int, score: int):
+        score = max(0, int(score))
+        row = self.conn.execute("""
+        SELECT score FROM leaderboard_scores WHERE board = ? AND user_id = ?
+        """, (self.key, user_id)).fetchone()
+
+        old = row[0] if row else None
+        if old == score or (old is None and not score):
+            return
+
+        if score:
+            self.conn.execute("""
+            INSERT INTO leaderboard_scores (board, user_id, score) VALUES (?, ?, ?)
+            ON CONFLICT(board, user_id) DO UPDATE SET score = excluded.score
+            """, (self.key, user_id, score))
+        else:
+            # 0 = pas classé (comme rebuild) : retour à 0 après annulation
+            self.conn.execute("""
+            DELETE FROM leaderboard_scores WHERE board = ? AND user_id = ?
+            """, (self.key, user_id))
+
+        if old is not None:
+            self._tree_add(old + 1, -1)
+        if score:
+            self._tree_add(score + 1, 1)
+
+    def add_score(self, user_id: int, delta: int):
+        row = self.conn.execute("""
+        SELECT score FROM leaderboard_scores WHERE board = ? AND user_id = ?
+        """, (self.key, user_id)).fetchone()
+        self.set_score(user_id, (row[0] if row else 0) + delta)
+
+    def rebuild(self, scores: dict):
+        """
+        Reconstruction complète (migration d'une DB existante)
+        scores : {user_id: score} ; scores nuls ignorés (pas classés)
+        """
+        self.conn.execute("DELETE FROM leaderboard_scores WHERE board = ?", (self.key,))
+        self.conn.execute("DELETE FROM leaderboard_tree WHERE board = ?", (self.key,))
+        self.conn.execute("DELETE FROM leaderboard_meta WHERE board = ?", (self.key,))
+
+        scores = {uid: int(s) for uid, s in scores.items() if int(s) > 0}
+        self.conn.executemany("""
+        INSERT INTO leaderboard_scores (board, user_id, score) VALUES (?, ?, ?)
+        """, ((self.key, uid, s) for uid, s in scores.items()))
+
+        capacity = _INITIAL_CAPACITY
+        while scores and capacity < max(scores.values()) + 1:
+            capacity *= 2
+
+        tree = {}
+        for score in scores.values():
+            node = score + 1
+            while node <= capacity:
+                tree[node] = tree.get(node, 0) + 1
+                node += node & -node
+
+        self.conn.execute("""
+        INSERT INTO leaderboard_meta (board, capacity) VALUES (?, ?)
+        """, (self.key, capacity))
+        self.conn.executemany("""
+        INSERT INTO leaderboard_tree (board, node, count) VALUES (?, ?, ?)
+        """, ((self.key, node, count) for node, count in tree.items()))
+
+    # =========================
+    # QUERIES
+    # =========================
+    def exists(self) -> bool:
+        return self.conn.execute("""
+        SELECT 1 FROM leaderboard_meta WHERE board = ?
+        """, (self.key,)).fetchone() is not None
+
+    def size(self) -> int:
+        return self._prefix(self._capacity())
+
+    def score(self, user_id: int) -> int | None:
+        row = self.conn.execute("""
+        SELECT score FROM leaderboard_scores WHERE board = ? AND user_id = ?
+        """, (self.key, user_id)).fetchone()
+        return row[0] if row else None
+
+    def rank(self, user_id: int) -> int | None:
+        score = self.score(user_id)
+        if score is None:
+            return None
+        return self._count_above(score) + 1
+
+    def position(self, user_id: int) -> int | None:
+        """
+        Position 0-based dans l'ordre (score DESC, user_id)
+        """
+        score = self.score(user_id)
+        if score is None:
+            return None
+        ties_before = self.conn.execute("""
+        SELECT COUNT(*) FROM leaderboard_scores
+        WHERE board = ? AND score = ? AND user_id < ?
+        """, (self.key, score, user_id)).fetchone()[0]
+        return self._count_above(score) + ties_before
+
+    def page(self, offset: int = 0, limit: int = 20) -> list[tuple]:
+        """
+        Lignes (rang, user_id, score) à partir de la position offset
+        """
+        total = self.size()
+        if offset >= total or limit <= 0:
+            return []
+        offset = max(0, offset)
+
+        # score à la position offset (descente dans l'arbre)
+        score = self._find(total - offset) - 1
+        above = self._count_above(score)
+
+        rows = self.conn.execute("""
+        SELECT user_id, score FROM leaderboard_scores
+        WHERE board = ? AND score <= ?
+        ORDER BY score DESC, user_id
+        LIMIT ? OFFSET ?
+        """, (self.key, score, limit, offset - above)).fetchall()
+
+        result = []
+        rank, previous = above + 1, score
+        for i, (user_id, value) in enumerate(rows):
+            if value != previous:
+                rank, previous = offset + i + 1, value
+            result.append((rank, user_id, value))
+        return result
+
+    def top(self, n: int = 10) -> list[tuple]:
+        return self.page(0, n)
+
+    def around(self, user_id: int, neighbors: int = 2) -> list[tuple]:
+        """
+        L'utilisateur et ses voisins (neighbors au-dessus / en dessous)
+        """
+        position = self.position(user_id)
+        if position is None:
+            return []
+        start = max(0, position - neighbors)
+        return self.page(start, position - start + neighbors + 1)
+
+    # =========================
+    # FENWICK (SQL)
+    # =========================
+    def _capacity(self) -> int:
+        row = self.conn.execute("""
+        SELECT capacity FROM leaderboard_meta WHERE board = ?
+        """, (self.key,)).fetchone()
+        return row[0] if row else _INITIAL_CAPACITY
+
+    def _grow(self, needed: int) -> int:
+        """
+        Double la capacité : le nouveau nœud racine reprend l'effectif
+        total, les autres nouveaux nœuds couvrent des scores vides (0)
+        """
+        row = self.conn.execute("""
+        SELECT capacity FROM leaderboard_meta WHERE board = ?
+        """, (self.key,)).fetchone()
+        capacity = row[0] if row else _INITIAL_CAPACITY
+        if row is None:
+            self.conn.execute("""
+            INSERT INTO leaderboard_meta (board, capacity) VALUES (?, ?)
+            """, (self.key, capacity))
+
+        while capacity < needed:
+            total = self._prefix(capacity)
+            capacity *= 2
+            if total:
+                self.conn.execute("""
+                INSERT INTO leaderboard_tree (board, node, count) VALUES (?, ?, ?)
+                """, (self.key, capacity, total))
+            self.conn.execute("""
+            UPDATE leaderboard_meta SET capacity = ? WHERE board = ?
+            """, (capacity, self.key))
+        return capacity
+
+    def _tree_add(self, node: int, delta: int):
+        capacity = self._grow(node)
+        nodes = []
+        while node <= capacity:
+            nodes.append((self.key, node, delta))
+            node += node & -node
+
+        self.conn.executemany("""
+        INSERT INTO leaderboard_tree (board, node, count) VALUES (?, ?, ?)
+        ON CONFLICT(board, node) DO UPDATE SET count = count + excluded.count
+        """, nodes)
+        if delta < 0:
+            # nœuds revenus à zéro : supprimés (nœuds non nuls uniquement)
+            marks = ",".join("?" * len(nodes))
+            self.conn.execute(f"""
+            DELETE FROM leaderboard_tree
+            WHERE board = ? AND count = 0 AND node IN ({marks})
+            """, (self.key, *(node for _, node, _ in nodes)))
+
+    def _prefix(self, node: int) -> int:
+        """
+        Nombre d'utilisateurs dont score + 1 <= node
+        """
+        nodes = []
+        while node > 0:
+            nodes.append(node)
+            node -= node & -node
+        if not nodes:
+            return 0
+
+        marks = ",".join("?" * len(nodes))
+        return self.conn.execute(f"""
+        SELECT COALESCE(SUM(count), 0) FROM leaderboard_tree
+        WHERE board = ? AND node IN ({marks})
+        """, (self.key, *nodes)).fetchone()[0]
+
+    def _count_above(self, score: int) -> int:
+        capacity = self._capacity()
+        return self._prefix(capacity) - self._prefix(min(score + 1, capacity))
+
+    def _find(self, k: int) -> int:
+        """
+        Plus petit nœud dont le préfixe atteint k (k-ième score croissant)
+        """
+        capacity = self._capacity()
+        node, remaining = 0, k
+        step = capacity
+        while step:
+            nxt = node + step
+            if nxt <= capacity:
+                row = self.conn.execute("""
+                SELECT count FROM leaderboard_tree WHERE board = ? AND node = ?
+                """, (self.key, nxt)).fetchone()
+                count = row[0] if row else 0
+                if count < remaining:
+                    node, remaining = nxt, remaining - count
+            step //= 2
+        return node + 1
+
+
+def purge_weekly(conn, day: date):
+    """
+    Supprime les tableaux hebdo antérieurs à la semaine précédant day
+    (appelé une fois, à l'ouverture d'une nouvelle semaine)
+    """
+    keep_from = board_key("weekly", day - timedelta(days=7))
+    for table in ("leaderboard_scores", "leaderboard_tree", "leaderboard_meta"):
+        conn.execute(f"""
+        DELETE FROM {table} WHERE board LIKE 'weekly:%' AND board < ?
+        """, (keep_from,))
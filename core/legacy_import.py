@@ -0,0 +1,379 @@
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date, datetime
+from itertools import islice
+from pathlib import Path
+
+from core import rollups
+from core.history import HistoryEntry
+from core.stats import Stats
+
+
+BATCH_SIZE = 500
+CHUNK_SIZE = 1 << 20
+
+
+# =========================
+# STREAMING JSON
+# =========================
+class _JsonStream:
+    """
+    Lecture incrémentale d'un fichier JSON (buffer glissant)
+    - valeurs de premier niveau enchaînées (objet unique, JSON lines…)
+    - un tableau de premier niveau est parcouru élément par élément :
+      seul l'élément en cours est en mémoire
+    """
+
+    def __init__(self, f, chunk_size: int = CHUNK_SIZE):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.decoder = json.JSONDecoder()
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def __iter__(self):
+        while self._peek() is not None:
+            if self._peek() == "[":
+                self.pos += 1
+                yield from self._array_items()
+            else:
+                yield self._value()
+
+    def _array_items(self):
+        while True:
+            c = self._peek()
+            if c is None:
+                raise ValueError("tableau JSON non terminé")
+            if c == "]":
+                self.pos += 1
+                return
+            if c == ",":
+                self.pos += 1
+                continue
+            yield self._value()
+
+    def _value(self):
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+                self._fill(max(self.chunk_size, len(self.buf) - self.pos))
+                continue
+
+            # nombre en fin de buffer : peut-être tronqué
+            if end == len(self.buf) and not self.eof and self.buf[self.pos] not in '{["':
+                self._fill(self.chunk_size)
+                continue
+
+            self.pos = end
+            return value
+
+    def _peek(self):
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in " \t\r\n":
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if self.eof:
+                return None
+            self._fill(self.chunk_size)
+
+    def _fill(self, size: int):
+        chunk = self.f.read(size)
+        if not chunk:
+            self.eof = True
+            return
+        # on oublie ce qui est déjà consommé
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+
+
+def iter_saves(path, chunk_size: int = CHUNK_SIZE):
+    """
+    Sauvegardes legacy d'un fichier : objet unique, tableau ou JSON lines
+    """
+    with open(path, encoding="utf-8") as f:
+        for value in _JsonStream(f, chunk_size):
+            if isinstance(value, dict):
+                yield value
+
+
+# =========================
+# MAPPING LEGACY → STATS / HISTORIQUE
+# =========================
+def map_save(save: dict, now: datetime):
+    """
+    Convertit une sauvegarde legacy (dict "save" de ui/legacy)
+    - level (+ xp éventuelle) → total_exp
+    - streak → current_streak / best_streak
+    - profile.total_days → total_validations (1 jour complété = 1)
+    - history [{date, xp}] éventuel → historique "legacy_day",
+      sinon une entrée "legacy_import" de l'EXP totale
+    - user (nom, poids, objectif) → user_meta "profile:*"
+    Retourne (stats, entrées d'historique, profil)
+    """
+    level = max(1, int(save.get("level", 1)))
+    profile = save.get("profile") or {}
+    user = save.get("user") or {}
+
+    total_exp = (level - 1) * Stats.EXP_PER_LEVEL + max(0, int(save.get("xp", 0)))
+    streak = max(0, int(save.get("streak", 0)))
+    total_days = max(0, int(profile.get("total_days", 0)))
+
+    history = []
+    for day in save.get("history") or []:
+        if isinstance(day, dict) and day.get("date"):
+            history.append(HistoryEntry(
+                _to_datetime(day["date"]), "legacy_day",
+                int(day.get("xp", day.get("exp", 0)))
+            ))
+    history.sort(key=lambda e: e.timestamp)
+
+    last_day = save.get("last_date") or (history[-1].timestamp if history else None)
+    if not history and total_exp:
+        history.append(HistoryEntry(now, "legacy_import", total_exp))
+
+    stats = Stats(
+        total_exp=total_exp,
+        total_validations=total_days,
+        current_streak=streak,
+        best_streak=max(streak, int(save.get("best_streak", 0))),
+        last_validation_date=_to_datetime(last_day).date().isoformat() if last_day else None,
+    )
+
+    meta = {
+        f"profile:{key}": user[key]
+        for key in ("name", "weight", "goal_weight")
+        if user.get(key) is not None
+    }
+    meta["profile:total_days"] = total_days
+
+    return stats, history, meta
+
+
+def _to_datetime(value) -> datetime:
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, date):
+        return datetime.combine(value, datetime.min.time())
+    return datetime.fromisoformat(str(value))
+
+
+def merge_stats(current: Stats, legacy: Stats, previous: tuple = (0, 0)) -> Stats:
+    """
+    Stats d'un profil existant + stats d'une sauvegarde legacy
+    - EXP / validations : ajoutées (previous : apport d'un import
+      précédent du profil, (EXP, validations), remplacé)
+    - streak : celui du dernier jour validé, best_streak = max
+    """
+    merged = Stats(
+        total_exp=max(0, current.total_exp - previous[0]) + legacy.total_exp,
+        total_validations=(
+            max(0, current.total_validations - previous[1]) + legacy.total_validations
+        ),
+        best_streak=max(current.best_streak, legacy.best_streak),
+    )
+    latest = current
+    if legacy.last_validation_date is not None and (
+        current.last_validation_date is None
+        or legacy.last_validation_date > current.last_validation_date
+    ):
+        latest = legacy
+    merged.current_streak = latest.current_streak
+    merged.last_validation_date = latest.last_validation_date
+    merged.validations_today = latest.validations_today
+    merged.combo_validations = latest.combo_validations
+    return merged
+
+
+def _digest(save: dict) -> str:
+    return hashlib.sha1(
+        json.dumps(save, sort_keys=True, ensure_ascii=False).encode("utf-8")
+    ).hexdigest()
+
+
+# =========================
+# CHARGEMENT (Storage)
+# =========================
+def create_tables(conn):
+    """
+    legacy_imports : sauvegardes déjà importées (reprise après interruption)
+    - source : fichier#index, digest : contenu de la sauvegarde
+    """
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS legacy_imports (
+        source TEXT PRIMARY KEY,
+        user_id INTEGER NOT NULL,
+        digest TEXT NOT NULL,
+        imported_at TEXT NOT NULL
+    )
+    """)
+    conn.execute("""
+    CREATE INDEX IF NOT EXISTS idx_legacy_imports_digest ON legacy_imports (digest)
+    """)
+    conn.commit()
+
+
+def single_save(paths) -> bool:
+    """
+    True si les fichiers ne contiennent qu'une seule sauvegarde
+    (lecture arrêtée à la deuxième)
+    """
+    return len(list(islice((s for p in paths for s in iter_saves(p)), 2))) == 1
+
+
+def import_file(db_path: str, path, batch_size: int = BATCH_SIZE,
+                user_id: int | None = None) -> dict:
+    """
+    Importe un fichier de sauvegardes legacy
+    - une transaction par lot de batch_size sauvegardes
+    - user_id : profil existant qui reçoit la sauvegarde (stats fusionnées),
+      sinon un nouvel utilisateur par sauvegarde
+    - relançable : sauvegarde déjà importée (même source ou même
+      contenu) ignorée, sauvegarde modifiée réimportée sur le même utilisateur
+    Fonction de module : exécutée dans les workers du pool
+    """
+    from core.storage import Storage
+
+    # plusieurs workers écrivent dans la même DB : attente du verrou dès
+    # la connexion (le schéma est vérifié avant tout import)
+    storage = Storage(db_path, timeout=60)
+    create_tables(storage.conn)
+
+    source_prefix = str(Path(path).resolve())
+    counts = {"file": str(path), "imported": 0, "updated": 0, "skipped": 0}
+
+    batch = []
+    try:
+        for index, save in enumerate(iter_saves(path)):
+            batch.append((f"{source_prefix}#{index}", save))
+            if len(batch) >= batch_size:
+                _flush(storage, batch, counts, user_id)
+                batch = []
+        if batch:
+            _flush(storage, batch, counts, user_id)
+    finally:
+        storage.conn.close()
+
+    return counts
+
+
+def _flush(storage, batch, counts, target: int | None = None):
+    conn = storage.conn
+    now = storage.clock.now()
+
+    with storage.batch():
+        # verrou d'écriture pris d'emblée (pas d'interblocage lecture → écriture)
+        if not conn.in_transaction:
+            conn.execute("BEGIN IMMEDIATE")
+
+        for source, save in batch:
+            digest = _digest(save)
+            row = conn.execute(
+                "SELECT user_id, digest FROM legacy_imports WHERE source = ?", (source,)
+            ).fetchone()
+
+            if row is not None and row["digest"] == digest:
+                counts["skipped"] += 1
+                continue
+            if row is None and conn.execute(
+                "SELECT 1 FROM legacy_imports WHERE digest = ?", (digest,)
+            ).fetchone():
+                # même sauvegarde déjà importée depuis un autre chemin
+                counts["skipped"] += 1
+                continue
+
+            stats, history, meta = map_save(save, now)
+
+            if row is None:
+                user_id = target if target is not None else storage.create_user()
+                counts["imported"] += 1
+            else:
+                user_id = row["user_id"]
+                counts["updated"] += 1
+            view = storage.for_user(user_id)
+
+            # sauvegarde legacy précédente du profil : remplacée
+            previous = conn.execute("""
+            SELECT user_id, timestamp, action, objective_id, impact FROM history
+            WHERE user_id = ? AND action LIKE 'legacy_%'
+            """, (user_id,)).fetchall()
+            current = view.load_stats()
+            recorded = view.get_user_meta("legacy:total_exp")
+            contribution = (
+                int(recorded or 0),
+                int(view.get_user_meta("legacy:total_validations") or 0),
+            )
+            if previous:
+                rollups.record(conn, previous, sign=-1)
+                conn.execute(
+                    "DELETE FROM history WHERE user_id = ? AND action LIKE 'legacy_%'",
+                    (user_id,)
+                )
+                if recorded is None:
+                    # import antérieur au suivi de l'apport : profil créé par l'import
+                    contribution = (current.total_exp, current.total_validations)
+
+            view.save_stats(merge_stats(current, stats, contribution), track_weekly=False)
+            view.log_history_many(history)
+            meta["legacy:total_exp"] = stats.total_exp
+            meta["legacy:total_validations"] = stats.total_validations
+            for key, value in meta.items():
+                view.set_user_meta(key, value)
+
+            conn.execute("""
+            INSERT INTO legacy_imports (source, user_id, digest, imported_at)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT(source) DO UPDATE SET
+                digest = excluded.digest,
+                imported_at = excluded.imported_at
+            """, (source, user_id, digest, now.isoformat()))
+
+
+def import_files(db_path: str, paths, workers: int | None = None,
+                 batch_size: int = BATCH_SIZE, progress=None,
+                 user_id: int | None = None) -> dict:
+    """
+    Importe plusieurs fichiers en parallèle (un fichier par worker)
+    - user_id : profil existant qui reçoit l'unique sauvegarde importée
+      (ValueError s'il y en a plusieurs)
+    progress(counts) : appelé à la fin de chaque fichier
+    """
+    from core.storage import Storage
+
+    paths = [str(p) for p in paths]
+    if user_id is not None and not single_save(paths):
+        raise ValueError("profil cible : une seule sauvegarde à importer")
+
+    # schéma + catalogue créés une fois, avant les workers
+    storage = Storage(db_path)
+    storage.seed_objectives()
+    create_tables(storage.conn)
+    storage.conn.close()
+
+    totals = {"files": 0, "imported": 0, "updated": 0, "skipped": 0}
+
+    def add(counts):
+        totals["files"] += 1
+        for key in ("imported", "updated", "skipped"):
+            totals[key] += counts[key]
+        if progress is not None:
+            progress(counts)
+
+    workers = min(workers or os.cpu_count() or 1, len(paths))
+    if workers <= 1:
+        for path in paths:
+            add(import_file(db_path, path, batch_size, user_id))
+        return totals
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(import_file, db_path, p, batch_size, user_id) for p in paths]
+        for future in as_completed(futures):
+            add(future.result())
+
+    return totals
@@ -6,6 +6,7 @@ from datetime import date
 class Frequency(Enum):
     DAILY = "daily"
     WEEKLY = "weekly"
+    MONTHLY = "monthly"
 
 
 class Category(Enum):
@@ -25,5 +26,25 @@ class Objective:
 
     last_completed: date | None = None
 
-    def can_be_completed_today(self) -> bool:
-        return True
+    def can_be_completed_today(self, today: date) -> bool:
+        # today : jour de l'horloge injectée (jamais l'horloge système)
+        if self.last_completed is None:
+            return True
+        return (
+            period_key(self.frequency, self.last_completed)
+            != period_key(self.frequency, today)
+        )
+
+
+# Clé de période (cooldown) par fréquence
+# Deux dates avec la même clé = même période → une seule validation
+# Nouvelles fréquences : ajouter une entrée ici
+PERIOD_KEYS = {
+    Frequency.DAILY: lambda day: day.toordinal(),
+    Frequency.WEEKLY: lambda day: tuple(day.isocalendar())[:2],  # (année ISO, semaine)
+    Frequency.MONTHLY: lambda day: (day.year, day.month),
+}
+
+
+def period_key(frequency: Frequency, day: date):
+    return PERIOD_KEYS[frequency](day)
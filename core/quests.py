@@ -0,0 +1,111 @@
+from dataclasses import dataclass
+from functools import lru_cache
+
+from core.objective import Category, Frequency
+
+
+# niveaux par palier : les quêtes générées sont identiques dans un palier
+BRACKET_SIZE = 5
+MAX_LEVEL = 100
+
+
+@dataclass(frozen=True)
+class QuestTemplate:
+    """
+    Modèle de quête paramétrique
+    - cible : min(cap, base + slope * (niveau - 1)), arrondie au pas (step)
+    - EXP : min(exp_cap, exp_base + exp_slope * (niveau - 1))
+    - title : format avec {target} (ex : "{target} pompes")
+    """
+    id: str
+    title: str
+    category: Category
+    frequency: Frequency
+    min_level: int
+    base: float
+    slope: float
+    cap: float
+    exp_base: float
+    exp_slope: float
+    exp_cap: float
+    step: int = 1
+
+    def target(self, level: int) -> int:
+        raw = min(self.cap, self.base + self.slope * (level - 1))
+        return max(int(self.base), int(raw // self.step * self.step))
+
+    def exp(self, level: int) -> int:
+        return int(round(min(self.exp_cap, self.exp_base + self.exp_slope * (level - 1))))
+
+    def row(self, bracket: int) -> tuple:
+        """
+        Objectif du palier : tuple prêt pour l'upsert SQL
+        (id, title, category, frequency, min_level, value, template)
+        """
+        level = bracket_level(bracket)
+        return (
+            f"{self.id}@{bracket}",
+            self.title.format(target=self.target(level)),
+            self.category.value,
+            self.frequency.value,
+            self.min_level,
+            self.exp(level),
+            self.id,
+        )
+
+
+def bracket(level: int) -> int:
+    """
+    Palier d'un niveau (1-5 → 0, 6-10 → 1, …)
+    """
+    return (min(max(level, 1), MAX_LEVEL) - 1) // BRACKET_SIZE
+
+
+def bracket_level(bracket: int) -> int:
+    # niveau de référence du palier (le plus bas : jamais au-dessus du joueur)
+    return bracket * BRACKET_SIZE + 1
+
+
+@lru_cache(maxsize=256)
+def generate(templates: tuple, bracket: int) -> tuple:
+    """
+    Quêtes générées pour un palier (mémoïsées par (templates, palier))
+    Le filtre min_level reste à l'appelant (niveau exact du joueur)
+    """
+    return tuple(t.row(bracket) for t in templates)
+
+
+def template_from_entry(entry: dict) -> QuestTemplate:
+    """
+    Modèle depuis une entrée "templates" de assets/objectives.json
+    """
+    exp = entry["exp"]
+    return QuestTemplate(
+        id=str(entry["id"]),
+        title=str(entry["title"]),
+        category=Category(entry["category"]),
+        frequency=Frequency(entry["frequency"]),
+        min_level=int(entry.get("min_level", 1)),
+        base=float(entry["base"]),
+        slope=float(entry["slope"]),
+        cap=float(entry["cap"]),
+        exp_base=float(exp["base"]),
+        exp_slope=float(exp["slope"]),
+        exp_cap=float(exp["cap"]),
+        step=int(entry.get("step", 1)),
+    )
+
+
+def template_from_row(row) -> QuestTemplate:
+    """
+    Modèle depuis une ligne de la table quest_templates (mapping par colonne)
+    """
+    return QuestTemplate(
+        id=row["id"], title=row["title"],
+        category=Category(row["category"]),
+        frequency=Frequency(row["frequency"]),
+        min_level=row["min_level"],
+        base=row["base"], slope=row["slope"], cap=row["cap"],
+        exp_base=row["exp_base"], exp_slope=row["exp_slope"],
+        exp_cap=row["exp_cap"], step=row["step"],
+    )
@@ -0,0 +1,222 @@
+import os
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date
+
+from core import teams
+
+CHUNK_SIZE = 200_000
+
+# clé "aucun" (EXP hors validation : import legacy…) : NULL casserait
+# l'unicité de la clé primaire
+NONE = ""
+
+# effet d'un évènement sur le compteur de validations
+# ("undo" : compensation d'une validation annulée, même jour / objectif)
+VALIDATIONS = {"validate": 1, "undo": -1}
+
+
+def week_key(day: date) -> str:
+    """
+    Semaine ISO d'un jour ("2025-W09")
+    """
+    year, week, _ = day.isocalendar()
+    return f"{year}-W{week:02d}"
+
+
+def create_tables(cursor) -> bool:
+    """
+    Agrégats pré-calculés de l'historique
+    - rollup_daily : par (utilisateur, jour, objectif)
+    - rollup_weekly : par (utilisateur, semaine ISO, objectif)
+    - catégorie recopiée (filtre sans jointure), "" hors validation
+    Retourne True si les tables viennent d'être créées
+    """
+    exists = cursor.execute("""
+    SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'rollup_daily'
+    """).fetchone()
+
+    for table, period in (("rollup_daily", "day"), ("rollup_weekly", "week")):
+        cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS {table} (
+            user_id INTEGER NOT NULL,
+            {period} TEXT NOT NULL,
+            objective_id TEXT NOT NULL,
+            category TEXT NOT NULL,
+            validations INTEGER NOT NULL DEFAULT 0,
+            exp INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (user_id, {period}, objective_id)
+        ) WITHOUT ROWID
+        """)
+    return exists is None
+
+
+# =========================
+# MISE À JOUR INCRÉMENTALE
+# =========================
+def record(conn, rows, sign: int = 1):
+    """
+    Ajoute des lignes d'historique aux agrégats (transaction de l'appelant)
+    rows : (user_id, timestamp ISO, action, objective_id, impact)
+    sign : -1 pour retirer des lignes supprimées
+    Les lignes sont d'abord agrégées en mémoire : un import de 50 000
+    validations = quelques centaines d'upserts
+    Les compteurs d'équipe suivent les mêmes deltas
+    """
+    daily = _accumulate({}, rows, sign)
+    _write(conn, daily, upsert=True)
+    teams.record(conn, daily)
+
+
+def _accumulate(daily: dict, rows, sign: int = 1) -> dict:
+    # mêmes clés que _AGGREGATE_SQL, agrégées en mémoire
+    for user_id, timestamp, action, objective_id, impact in rows:
+        validation = VALIDATIONS.get(action, 0)
+        key = (user_id, timestamp[:10], (objective_id or NONE) if validation else NONE)
+        counts = daily.setdefault(key, [0, 0])
+        counts[0] += sign * validation
+        counts[1] += sign * (impact or 0)
+    return daily
+
+
+def _weekly(daily: dict) -> dict:
+    weekly = {}
+    for (user_id, day, objective_id), (validations, exp) in daily.items():
+        key = (user_id, week_key(date.fromisoformat(day)), objective_id)
+        counts = weekly.setdefault(key, [0, 0])
+        counts[0] += validations
+        counts[1] += exp
+    return weekly
+
+
+def _categories(conn, objective_ids) -> dict:
+    ids = [oid for oid in objective_ids if oid != NONE]
+    categories = {}
+    # par paquets (limite de paramètres SQLite)
+    for i in range(0, len(ids), 500):
+        chunk = ids[i:i + 500]
+        marks = ",".join("?" * len(chunk))
+        for objective_id, category in conn.execute(
+            f"SELECT id, category FROM objectives WHERE id IN ({marks})", chunk
+        ):
+            categories[objective_id] = category
+    return categories
+
+
+def _write(conn, daily: dict, upsert: bool):
+    """
+    Écrit les agrégats journaliers {(user_id, jour, objectif): [validations, EXP]}
+    et leurs totaux hebdo (upsert : ajoutés aux valeurs existantes)
+    """
+    if not daily:
+        return
+    categories = _categories(conn, {key[2] for key in daily})
+
+    for table, period, values in (
+        ("rollup_daily", "day", daily),
+        ("rollup_weekly", "week", _weekly(daily)),
+    ):
+        conflict = f"""
+        ON CONFLICT(user_id, {period}, objective_id) DO UPDATE SET
+            validations = validations + excluded.validations,
+            exp = exp + excluded.exp
+        """ if upsert else ""
+        conn.executemany(f"""
+        INSERT INTO {table} (user_id, {period}, objective_id, category, validations, exp)
+        VALUES (?, ?, ?, ?, ?, ?)
+        {conflict}
+        """, (
+            (user_id, key, oid, categories.get(oid, NONE), validations, exp)
+            for (user_id, key, oid), (validations, exp) in values.items()
+        ))
+        removed = [key for key, counts in values.items() if min(counts) < 0]
+        if upsert and removed:
+            # lignes revenues à zéro (retrait sign = -1, annulation "undo")
+            conn.executemany(f"""
+            DELETE FROM {table}
+            WHERE user_id = ? AND {period} = ? AND objective_id = ?
+            AND validations = 0 AND exp = 0
+            """, removed)
+
+
+# =========================
+# BACKFILL (reconstruction depuis l'historique)
+# =========================
+_AGGREGATE_SQL = """
+SELECT user_id,
+       substr(timestamp, 1, 10),
+       CASE WHEN action IN ('validate', 'undo') THEN COALESCE(objective_id, '') ELSE '' END,
+       SUM(CASE action WHEN 'validate' THEN 1 WHEN 'undo' THEN -1 ELSE 0 END),
+       SUM(COALESCE(impact, 0))
+FROM history
+WHERE id BETWEEN ? AND ?
+GROUP BY 1, 2, 3
+"""
+
+
+def _aggregate_chunk(db_path: str, first_id: int, last_id: int) -> list[tuple]:
+    """
+    Agrégats journaliers d'une tranche d'ids d'historique
+    Fonction de module : exécutée dans les workers du pool (lecture seule)
+    """
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        return conn.execute(_AGGREGATE_SQL, (first_id, last_id)).fetchall()
+    finally:
+        conn.close()
+
+
+def _chunks(conn, chunk_size: int) -> list[tuple]:
+    low, high = conn.execute("SELECT MIN(id), MAX(id) FROM history").fetchone()
+    if low is None:
+        return []
+    return [
+        (start, min(start + chunk_size - 1, high))
+        for start in range(low, high + 1, chunk_size)
+    ]
+
+
+def rebuild(conn, db_path: str | None = None, workers: int = 1,
+            chunk_size: int = CHUNK_SIZE, progress=None, archived=()) -> int:
+    """
+    Reconstruit les agrégats depuis l'historique (transaction de l'appelant)
+    - tranches de chunk_size ids agrégées en parallèle (workers > 1 :
+      pool de processus, lecture seule sur db_path), fusionnées ici
+    - archived : évènements archivés (user_id, timestamp, action,
+      objective_id, impact), ajoutés aux agrégats : les années compactées
+      ne sont plus dans history
+    - hebdo dérivé du journalier (O(jours))
+    progress(done, total) : appelé après chaque tranche
+    Retourne le nombre de lignes journalières
+    """
+    chunks = _chunks(conn, chunk_size)
+    daily = {}
+
+    def merge(rows):
+        for user_id, day, objective_id, validations, exp in rows:
+            counts = daily.setdefault((user_id, day, objective_id), [0, 0])
+            counts[0] += validations
+            counts[1] += exp
+
+    workers = min(workers or os.cpu_count() or 1, len(chunks))
+    if workers <= 1 or db_path is None:
+        for done, (first, last) in enumerate(chunks, 1):
+            merge(conn.execute(_AGGREGATE_SQL, (first, last)).fetchall())
+            if progress is not None:
+                progress(done, len(chunks))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_aggregate_chunk, db_path, f, l) for f, l in chunks]
+            for done, future in enumerate(as_completed(futures), 1):
+                merge(future.result())
+                if progress is not None:
+                    progress(done, len(chunks))
+
+    _accumulate(daily, archived)
+    # validations annulées : lignes à zéro, absentes comme en incrémental
+    daily = {key: counts for key, counts in daily.items() if any(counts)}
+
+    conn.execute("DELETE FROM rollup_daily")
+    conn.execute("DELETE FROM rollup_weekly")
+    _write(conn, daily, upsert=False)
+    return len(daily)
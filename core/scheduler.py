@@ -0,0 +1,153 @@
+import asyncio
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+from typing import Callable
+
+from core.objective import Frequency
+
+
+# =========================
+# PERIODS
+# =========================
+@dataclass(frozen=True)
+class Period:
+    """
+    Découpage du temps pour un tableau de quêtes
+    - key : identifiant stocké dans user_meta (par utilisateur)
+    - next_start : premier jour de la période suivante
+    """
+    name: str
+    key: Callable[[date], str]
+    next_start: Callable[[date], date]
+
+
+def _next_month(day: date) -> date:
+    if day.month == 12:
+        return date(day.year + 1, 1, 1)
+    return date(day.year, day.month + 1, 1)
+
+
+DAILY = Period(
+    "daily",
+    key=lambda day: day.isoformat(),
+    next_start=lambda day: day + timedelta(days=1),
+)
+
+WEEKLY = Period(
+    "weekly",
+    key=lambda day: "{}-W{:02d}".format(*day.isocalendar()[:2]),
+    next_start=lambda day: day + timedelta(days=7 - day.weekday()),
+)
+
+MONTHLY = Period(
+    "monthly",
+    key=lambda day: f"{day.year}-{day.month:02d}",
+    next_start=_next_month,
+)
+
+
+# =========================
+# BOARDS
+# =========================
+@dataclass(frozen=True)
+class Board:
+    """
+    Tableau de quêtes : un pool tiré par période
+    meta_key : clé de rollover dans user_meta (par utilisateur)
+    """
+    name: str
+    period: Period
+    frequency: Frequency
+    count: int
+    meta_key: str
+
+
+BOARDS = (
+    Board("daily", DAILY, Frequency.DAILY, 3, "date"),  # clé historique
+    Board("weekly", WEEKLY, Frequency.WEEKLY, 2, "board:weekly"),
+    Board("monthly", MONTHLY, Frequency.MONTHLY, 1, "board:monthly"),
+)
+
+
+# =========================
+# SCHEDULER
+# =========================
+class PeriodScheduler:
+    """
+    Gère le rollover des tableaux de quêtes
+    - les prochaines échéances sont calculées à l'avance, en heure locale
+      avec fuseau (datetime aware) : minuit reste minuit aux changements d'heure
+    - rollover() ne touche la DB que pour les tableaux échus
+    - piloté par un QTimer unique (UI) ou run_forever() (headless)
+    """
+
+    def __init__(self, storage, level_provider: Callable[[], int], boards=BOARDS,
+                 clock=None):
+        self.storage = storage
+        self.level_provider = level_provider
+        self.boards = {board.name: board for board in boards}
+        self.clock = clock or storage.clock
+
+        # board → datetime du prochain rollover (vide = à tirer)
+        self._next_at = {}
+
+    def rollover(self, now: datetime | None = None) -> list[str]:
+        """
+        Tire les pools échus, retourne les noms des tableaux renouvelés
+        """
+        now = _local(now or self.clock.now())
+        today = now.date()
+        level = None
+        rolled = []
+
+        for board in self.boards.values():
+            due = self._next_at.get(board.name)
+            if due is not None and now < due:
+                continue
+
+            if level is None:
+                level = self.level_provider()
+
+            if self.storage.generate_pool(
+                board.name, board.frequency, level,
+                board.period.key(today), board.meta_key, board.count
+            ):
+                rolled.append(board.name)
+
+            self._next_at[board.name] = datetime.combine(
+                board.period.next_start(today), time.min
+            ).astimezone()
+
+        return rolled
+
+    def next_rollover(self, board: str | None = None) -> datetime | None:
+        """
+        Prochaine échéance (d'un tableau, ou la plus proche)
+        """
+        if board is not None:
+            return self._next_at.get(board)
+        return min(self._next_at.values(), default=None)
+
+    def seconds_until_next(self, now: datetime | None = None) -> float:
+        due = self.next_rollover()
+        if due is None:
+            return 0.0
+        return max(0.0, (due - _local(now or self.clock.now())).total_seconds())
+
+    async def run_forever(self, on_rollover: Callable[[list[str]], None] | None = None):
+        """
+        Boucle headless : dort jusqu'à l'échéance suivante puis rollover
+        """
+        while True:
+            rolled = self.rollover()
+            if rolled and on_rollover is not None:
+                on_rollover(rolled)
+            # petite marge : on se réveille juste après la frontière
+            await asyncio.sleep(self.seconds_until_next() + 0.5)
+
+
+def _local(now: datetime) -> datetime:
+    """
+    Heure locale avec fuseau (un datetime naïf est considéré local)
+    """
+    return now.astimezone()
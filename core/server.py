@@ -0,0 +1,317 @@
+import asyncio
+import copy
+import json
+import os
+
+from core import instrumentation
+from core import sketches
+from core.achievement import check_achievements
+from core.cooldown import CompletionIndex
+from core.engine import Engine
+from core.scheduler import PeriodScheduler
+from core.storage import Storage
+from core.user import User
+
+
+class EngineServer:
+    """
+    Mode headless : Engine + Storage derrière un serveur JSON-lines (asyncio)
+    - socket Unix ou port localhost
+    - clients concurrents, requêtes pipelinées (réponses dans l'ordre)
+    - commits groupés : une transaction par lot de requêtes, un savepoint
+      par requête (une requête en échec n'écrit rien)
+
+    Protocole : une requête JSON par ligne
+        {"id": 1, "op": "validate", "objective_id": "pushups@0"}
+    Réponse :
+        {"id": 1, "ok": true, "result": {...}}
+        {"id": 1, "ok": false, "error": "..."}
+    """
+
+    MAX_BATCH = 512
+
+    def __init__(self, storage: Storage, max_batch: int = MAX_BATCH):
+        self.storage = storage
+        self.max_batch = max_batch
+
+        self.user = User()
+        self.user.stats = self.storage.load_stats()
+        self.engine = Engine(self.user, self.storage)
+        self.scheduler = PeriodScheduler(
+            self.storage, lambda: self.user.stats.get_level()
+        )
+
+        # catalogue en mémoire : un doublon est rejeté sans requête SQL
+        self._catalog = {o.id: o for o in self.storage.load_objectives()}
+
+        self._queue = None
+        self._server = None
+
+        self._handlers = {
+            "ping": self._op_ping,
+            "stats": self._op_stats,
+            "daily": self._op_board,
+            "board": self._op_board,
+            "validate": self._op_validate,
+            "leaderboard": self._op_leaderboard,
+            "percentiles": self._op_percentiles,
+            "metrics": self._op_metrics,
+        }
+
+    # =========================
+    # LIFECYCLE
+    # =========================
+    async def start(self, host: str = "127.0.0.1", port: int = 8765,
+                    unix_path: str | None = None):
+        self._queue = asyncio.Queue()
+        self._worker = asyncio.create_task(self._run_worker())
+        self._rollover = asyncio.create_task(self.scheduler.run_forever())
+
+        if unix_path:
+            if os.path.exists(unix_path):
+                os.unlink(unix_path)
+            self._server = await asyncio.start_unix_server(
+                self._handle_client, path=unix_path
+            )
+        else:
+            self._server = await asyncio.start_server(
+                self._handle_client, host=host, port=port
+            )
+        return self._server
+
+    async def serve_forever(self, **kwargs):
+        server = await self.start(**kwargs)
+        async with server:
+            await server.serve_forever()
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        if self._queue is not None:
+            await self._queue.join()
+            self._worker.cancel()
+            self._rollover.cancel()
+
+    # =========================
+    # CLIENTS
+    # =========================
+    async def _handle_client(self, reader, writer):
+        """
+        Lit les requêtes sans attendre les réponses (pipelining),
+        un writer dédié renvoie les réponses dans l'ordre d'arrivée
+        """
+        pending = asyncio.Queue()
+        responder = asyncio.create_task(self._respond(writer, pending))
+
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+
+                future = asyncio.get_running_loop().create_future()
+                await pending.put(future)
+
+                try:
+                    request = json.loads(line)
+                    if not isinstance(request, dict):
+                        raise ValueError("request must be an object")
+                except ValueError as e:
+                    future.set_result({"id": None, "ok": False, "error": f"bad request: {e}"})
+                    continue
+
+                self._queue.put_nowait((request, future))
+        finally:
+            await pending.put(None)
+            await responder
+
+    async def _respond(self, writer, pending):
+        try:
+            while True:
+                future = await pending.get()
+                if future is None:
+                    break
+                response = await future
+                writer.write(json.dumps(response).encode() + b"\n")
+                if pending.empty():
+                    await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    # =========================
+    # WORKER (GROUP COMMIT)
+    # =========================
+    async def _run_worker(self):
+        """
+        Seul point d'accès à SQLite : vide la file par lots,
+        exécute le lot dans une transaction et sauvegarde les stats une fois
+        """
+        while True:
+            items = [await self._queue.get()]
+            while len(items) < self.max_batch and not self._queue.empty():
+                items.append(self._queue.get_nowait())
+
+            responses = []
+            dirty = False
+            try:
+                with self.storage.batch():
+                    for request, future in items:
+                        response, changed = self._dispatch(request)
+                        dirty = dirty or changed
+                        responses.append((future, response))
+
+                    if dirty:
+                        self.storage.save_stats(self.user.stats)
+            except Exception as e:
+                # transaction annulée : aucune réponse du lot n'est confirmée
+                self._resync(self.storage.load_stats())
+                responses = [
+                    (future, {"id": request.get("id"), "ok": False, "error": str(e)})
+                    for request, future in items
+                ]
+
+            for future, response in responses:
+                future.set_result(response)
+            for _ in items:
+                self._queue.task_done()
+
+            # laisse respirer les lecteurs entre deux lots
+            await asyncio.sleep(0)
+
+    def _dispatch(self, request: dict):
+        request_id = request.get("id")
+        handler = self._handlers.get(request.get("op"))
+
+        if handler is None:
+            return {"id": request_id, "ok": False, "error": "unknown op"}, False
+
+        stats = copy.copy(self.user.stats)
+        try:
+            with self.storage.savepoint():
+                result, changed = handler(request)
+        except Exception as e:
+            # écritures de la requête annulées : mémoire remise au même point
+            self._resync(stats)
+            return {"id": request_id, "ok": False, "error": str(e)}, False
+
+        if isinstance(result, str):
+            return {"id": request_id, "ok": False, "error": result}, changed
+        return {"id": request_id, "ok": True, "result": result}, changed
+
+    def _resync(self, stats):
+        """
+        État mémoire réaligné sur la DB après annulation
+        stats : stats en mémoire (sauvegardées une fois par lot, pas relues)
+        """
+        self.user.stats = stats
+        self.engine.completions = CompletionIndex.from_storage(self.storage)
+        self._catalog = {o.id: o for o in self.storage.load_objectives()}
+
+    # =========================
+    # OPS
+    # =========================
+    def _op_ping(self, request):
+        return {"pong": True}, False
+
+    def _op_stats(self, request):
+        stats = self.user.stats
+        return {
+            "level": stats.get_level(),
+            "total_exp": stats.total_exp,
+            "total_validations": stats.total_validations,
+            "current_streak": stats.current_streak,
+            "best_streak": stats.best_streak,
+        }, False
+
+    def _op_metrics(self, request):
+        return instrumentation.report(), False
+
+    def _op_board(self, request):
+        board = request.get("board", "daily")
+        if board not in self.scheduler.boards:
+            return "unknown board", False
+
+        return [
+            {"id": row["id"], "title": row["title"], "value": row["value"]}
+            for row in self.storage.load_board_objectives(board)
+        ], False
+
+    def _op_leaderboard(self, request):
+        try:
+            board = self.storage.leaderboard(request.get("board", "exp"))
+        except ValueError:
+            return "unknown leaderboard", False
+
+        if "around" in request:
+            rows = board.around(int(request["around"]), int(request.get("neighbors", 2)))
+        else:
+            rows = board.page(
+                int(request.get("offset", 0)), min(int(request.get("limit", 20)), 100)
+            )
+        return {
+            "total": board.size(),
+            "rows": [
+                {"rank": rank, "user_id": user_id, "score": score}
+                for rank, user_id, score in rows
+            ],
+        }, False
+
+    def _op_percentiles(self, request):
+        metrics = [request["metric"]] if "metric" in request else list(sketches.METRICS)
+        if any(metric not in sketches.METRICS for metric in metrics):
+            return "unknown metric", False
+
+        result = {}
+        for metric in metrics:
+            sketch = self.storage.sketch(metric)
+            value = self.storage.metric_value(metric)
+            result[metric] = {
+                "value": value,
+                "top": self.storage.percentile(metric, value),
+                "users": sketch.count,
+            }
+        return result, False
+
+    def _op_validate(self, request):
+        objective_id = request.get("objective_id")
+        objective = self._catalog.get(objective_id)
+        if objective is None and isinstance(objective_id, str):
+            # quête générée (palier matérialisé après le démarrage)
+            objective = self.storage.get_objective(objective_id)
+            if objective is not None:
+                self._catalog[objective_id] = objective
+        if objective is None:
+            return "unknown objective", False
+
+        if not self.engine.validate_objective(objective):
+            return "cooldown", False
+
+        self.storage.complete_daily_objective(objective.id)
+        unlocked = check_achievements(self.user.stats, self.storage)
+
+        return {
+            "exp": objective.value,
+            "total_exp": self.user.stats.total_exp,
+            "level": self.user.stats.get_level(),
+            "achievements": unlocked,
+        }, True
+
+
+def serve(db_path: str = "data/ironsystem.db", host: str = "127.0.0.1",
+          port: int = 8765, unix_path: str | None = None):
+    """
+    Lance le serveur headless (bloquant)
+    """
+    storage = Storage(db_path)
+    storage.seed_objectives()
+
+    server = EngineServer(storage)
+    try:
+        asyncio.run(server.serve_forever(host=host, port=port, unix_path=unix_path))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,159 @@
+import os
+import random
+from time import perf_counter
+from datetime import date, datetime, time, timedelta
+
+from core.achievement import check_achievements
+from core.clock import SimulatedClock
+from core.engine import Engine
+from core.scheduler import PeriodScheduler
+from core.storage import Storage
+from core.user import User
+
+
+class SimUser:
+    """
+    Utilisateur synthétique : vue Storage + Engine + scheduler dédiés
+    """
+
+    def __init__(self, storage: Storage, user_id: int, seed: int, clock):
+        self.rng = random.Random(f"{seed}:{user_id}")
+
+        # profil : jours actifs / part des quêtes validées
+        self.activity = self.rng.uniform(0.3, 0.95)
+        self.diligence = self.rng.uniform(0.4, 1.0)
+
+        self.storage = storage.for_user(user_id, rng=self.rng)
+        self.user = User()
+        self.user.stats = self.storage.load_stats()
+        self.engine = Engine(self.user, self.storage, clock=clock)
+        self.scheduler = PeriodScheduler(
+            self.storage, lambda: self.user.stats.get_level(), clock=clock
+        )
+
+
+class Simulator:
+    """
+    Simulation multi-utilisateurs déterministe (horloge + RNG injectés)
+    - chaque jour simulé : rollover des tableaux, validations, achievements
+    - une transaction par jour simulé
+    - mesure débit, croissance de la DB et latences (percentiles)
+    Même seed + mêmes paramètres = même DB finale
+    """
+
+    def __init__(self, db_path: str, users: int = 1000, days: int = 365,
+                 seed: int = 0, start: date = date(2025, 1, 1)):
+        if os.path.exists(db_path):
+            raise FileExistsError(f"{db_path} existe déjà (simulation sur DB neuve)")
+
+        self.db_path = db_path
+        self.users = users
+        self.days = days
+        self.seed = seed
+        self.start = start
+
+        self.clock = SimulatedClock(datetime.combine(start, time(6)))
+        self.storage = Storage(
+            db_path, clock=self.clock, rng=random.Random(seed)
+        )
+        self.storage.seed_objectives()
+        self.catalog = {o.id: o for o in self.storage.load_objectives()}
+
+        self.validation_ms = []
+        self.commit_ms = []
+        self.db_growth = []
+
+    def run(self, progress=None) -> dict:
+        started = perf_counter()
+
+        with self.storage.batch():
+            population = [
+                SimUser(self.storage, user_id, self.seed, self.clock)
+                for user_id in range(1, self.users + 1)
+            ]
+
+        validations = 0
+        for day_index in range(self.days):
+            day = self.start + timedelta(days=day_index)
+
+            t0 = perf_counter()
+            with self.storage.batch():
+                for sim in population:
+                    validations += self._simulate_day(sim, day)
+            self.commit_ms.append((perf_counter() - t0) * 1000)
+
+            if day_index % 30 == 0 or day_index == self.days - 1:
+                self.db_growth.append((day.isoformat(), self.db_size()))
+            if progress is not None:
+                progress(day_index + 1, self.days)
+
+        elapsed = perf_counter() - started
+        size = self.db_size()
+
+        return {
+            "users": self.users,
+            "days": self.days,
+            "seed": self.seed,
+            "validations": validations,
+            "elapsed_s": round(elapsed, 3),
+            "validations_per_s": round(validations / elapsed, 1) if elapsed else 0.0,
+            "user_days_per_s": round(self.users * self.days / elapsed, 1) if elapsed else 0.0,
+            "db_bytes": size,
+            "bytes_per_validation": round(size / validations, 1) if validations else 0.0,
+            "db_growth": self.db_growth,
+            "validation_latency_ms": _percentiles(self.validation_ms),
+            "day_transaction_ms": _percentiles(self.commit_ms),
+        }
+
+    def _simulate_day(self, sim: SimUser, day: date) -> int:
+        # heure de passage de l'utilisateur dans la journée
+        self.clock.set(
+            datetime.combine(day, time(6)) + timedelta(minutes=sim.rng.randrange(16 * 60))
+        )
+        sim.scheduler.rollover()
+
+        if sim.rng.random() > sim.activity:
+            return 0
+
+        done = 0
+        for board in ("daily", "weekly"):
+            for row in sim.storage.load_board_objectives(board):
+                if sim.rng.random() > sim.diligence:
+                    continue
+
+                t0 = perf_counter()
+                objective = self.catalog.get(row["id"])
+                if objective is None:
+                    # quête générée matérialisée après le chargement du catalogue
+                    objective = self.catalog[row["id"]] = sim.storage.get_objective(row["id"])
+                if sim.engine.validate_objective(objective):
+                    sim.storage.complete_daily_objective(objective.id)
+                    check_achievements(sim.user.stats, sim.storage)
+                    done += 1
+                self.validation_ms.append((perf_counter() - t0) * 1000)
+
+        if done:
+            sim.storage.save_stats(sim.user.stats)
+        return done
+
+    def db_size(self) -> int:
+        page_count = self.storage.conn.execute("PRAGMA page_count").fetchone()[0]
+        page_size = self.storage.conn.execute("PRAGMA page_size").fetchone()[0]
+        return page_count * page_size
+
+
+def _percentiles(samples: list[float]) -> dict:
+    if not samples:
+        return {"count": 0}
+    ordered = sorted(samples)
+
+    def pick(q):
+        return round(ordered[min(len(ordered) - 1, int(len(ordered) * q))], 4)
+
+    return {
+        "count": len(ordered),
+        "p50": pick(0.50),
+        "p95": pick(0.95),
+        "p99": pick(0.99),
+        "max": round(ordered[-1], 4),
+    }
@@ -0,0 +1,362 @@
+import math
+import sqlite3
+import struct
+from bisect import bisect_left, bisect_right
+from datetime import date, timedelta
+
+from core.leaderboard import board_key
+
+
+# distributions disponibles (clé → libellé) ; "weekly" = semaine ISO en cours
+METRICS = {
+    "exp": "EXP totale",
+    "streak": "Streak actuel",
+    "validations": "Objectifs validés",
+    "weekly": "EXP de la semaine",
+}
+
+# erreur relative garantie sur les quantiles (1 %)
+RELATIVE_ACCURACY = 0.01
+
+_VERSION = 1
+_HEADER = struct.Struct("<Bd")
+_BUNDLE_MAGIC = b"IRSK"
+
+
+def sketch_key(metric: str, day: date) -> str:
+    """
+    Clé stockée d'une distribution (même découpage que les classements)
+    """
+    return board_key(metric, day)
+
+
+class QuantileSketch:
+    """
+    Distribution approchée (buckets logarithmiques, type DDSketch)
+    - bucket k : valeurs dans ]γ^(k-1), γ^k], γ = (1+α)/(1-α)
+      → tout quantile à α près (erreur relative), quel que soit l'effectif
+    - add / remove : une valeur qui change = -1 sur l'ancien bucket,
+      +1 sur le nouveau (t-digest / KLL ne savent pas retirer)
+    - merge : somme des effectifs bucket par bucket (shards, appareils)
+    - quantile / top_share : O(log buckets) sur un index cumulé en cache
+    Valeurs > 0 uniquement : 0 = pas encore classé (comme les classements)
+    """
+
+    def __init__(self, alpha: float = RELATIVE_ACCURACY, buckets: dict | None = None):
+        if not 0 < alpha < 1:
+            raise ValueError(f"invalid relative accuracy: {alpha}")
+        self.alpha = alpha
+        self.gamma = (1 + alpha) / (1 - alpha)
+        self._log_gamma = math.log(self.gamma)
+        self.buckets = {}
+        self._index = None
+
+        for key, count in (buckets or {}).items():
+            self._add_count(key, count)
+
+    # =========================
+    # BUCKETS
+    # =========================
+    def key(self, value) -> int | None:
+        """
+        Bucket d'une valeur (None si elle n'est pas comptée)
+        """
+        if value <= 0:
+            return None
+        return math.ceil(math.log(value) / self._log_gamma)
+
+    def value(self, key: int) -> float:
+        """
+        Valeur représentative d'un bucket (à α près de toutes ses valeurs)
+        """
+        return 2 * self.gamma ** key / (self.gamma + 1)
+
+    def _add_count(self, key: int, count: int):
+        count += self.buckets.get(key, 0)
+        if count > 0:
+            self.buckets[key] = count
+        else:
+            self.buckets.pop(key, None)
+        self._index = None
+
+    # =========================
+    # UPDATE
+    # =========================
+    def add(self, value, count: int = 1):
+        key = self.key(value)
+        if key is not None:
+            self._add_count(key, count)
+
+    def remove(self, value, count: int = 1):
+        self.add(value, -count)
+
+    def merge(self, other: "QuantileSketch"):
+        if other.alpha != self.alpha:
+            raise ValueError("cannot merge sketches with different accuracies")
+        for key, count in other.buckets.items():
+            self._add_count(key, count)
+        return self
+
+    # =========================
+    # QUERIES
+    # =========================
+    @property
+    def count(self) -> int:
+        return self._sorted()[1][-1] if self.buckets else 0
+
+    def _sorted(self):
+        # (buckets triés, effectifs cumulés), recalculé après modification
+        if self._index is None:
+            keys = sorted(self.buckets)
+            cumulative = []
+            total = 0
+            for key in keys:
+                total += self.buckets[key]
+                cumulative.append(total)
+            self._index = (keys, cumulative)
+        return self._index
+
+    def quantile(self, q: float) -> float | None:
+        """
+        Valeur au quantile q (0 → minimum, 0.5 → médiane, 1 → maximum)
+        None si la distribution est vide
+        """
+        if not self.buckets:
+            return None
+        keys, cumulative = self._sorted()
+        q = min(max(q, 0.0), 1.0)
+        rank = q * (cumulative[-1] - 1)
+        return self.value(keys[bisect_right(cumulative, rank)])
+
+    def top_share(self, value) -> float | None:
+        """
+        Part des valeurs ≥ value (0.12 → "dans le top 12 %"), ex-aequo
+        inclus ; None si la distribution est vide
+        """
+        if not self.buckets:
+            return None
+        keys, cumulative = self._sorted()
+        key = self.key(value)
+        if key is None:
+            return 1.0
+        position = bisect_left(keys, key)
+        below = cumulative[position - 1] if position else 0
+        return (cumulative[-1] - below) / cumulative[-1]
+
+    # =========================
+    # SERIALIZATION
+    # =========================
+    def to_bytes(self) -> bytes:
+        """
+        Format compact : en-tête (version, α) puis buckets triés,
+        écarts entre clés et effectifs en varint (~2 octets / bucket)
+        """
+        out = bytearray(_HEADER.pack(_VERSION, self.alpha))
+        keys = sorted(self.buckets)
+        _write_varint(out, len(keys))
+        previous = 0
+        for key in keys:
+            _write_varint(out, _zigzag(key - previous))
+            _write_varint(out, self.buckets[key])
+            previous = key
+        return bytes(out)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "QuantileSketch":
+        try:
+            version, alpha = _HEADER.unpack_from(data)
+        except struct.error:
+            raise ValueError("truncated sketch") from None
+        if version != _VERSION:
+            raise ValueError(f"unsupported sketch version: {version}")
+
+        sketch = cls(alpha)
+        position = _HEADER.size
+        size, position = _read_varint(data, position)
+        key = 0
+        for _ in range(size):
+            delta, position = _read_varint(data, position)
+            count, position = _read_varint(data, position)
+            key += _unzigzag(delta)
+            sketch._add_count(key, count)
+        return sketch
+
+
+# =========================
+# BUNDLE (échange entre shards / appareils)
+# =========================
+def dump_bundle(sketches: dict) -> bytes:
+    """
+    {nom: QuantileSketch} → un seul bloc d'octets
+    """
+    out = bytearray(_BUNDLE_MAGIC)
+    _write_varint(out, len(sketches))
+    for name, sketch in sorted(sketches.items()):
+        for chunk in (name.encode("utf-8"), sketch.to_bytes()):
+            _write_varint(out, len(chunk))
+            out += chunk
+    return bytes(out)
+
+
+def load_bundle(data: bytes) -> dict:
+    if not data.startswith(_BUNDLE_MAGIC):
+        raise ValueError("not a sketch bundle")
+
+    sketches = {}
+    size, position = _read_varint(data, len(_BUNDLE_MAGIC))
+    for _ in range(size):
+        length, position = _read_varint(data, position)
+        name = data[position:position + length].decode("utf-8")
+        position += length
+        length, position = _read_varint(data, position)
+        sketches[name] = QuantileSketch.from_bytes(data[position:position + length])
+        position += length
+    return sketches
+
+
+def load_file(path) -> dict:
+    """
+    Distributions d'un autre shard : bundle (dump_bundle) ou DB SQLite
+    (ouverte en lecture seule)
+    """
+    with open(path, "rb") as f:
+        data = f.read(len(_BUNDLE_MAGIC))
+        if data == _BUNDLE_MAGIC:
+            return load_bundle(data + f.read())
+
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        return load_all(conn)
+    finally:
+        conn.close()
+
+
+def top_label(share: float | None) -> str:
+    """
+    0.113 → "Top 12 %" (arrondi au-dessus, jamais "Top 0 %")
+    """
+    if share is None:
+        return "—"
+    return f"Top {max(1, math.ceil(share * 100))} %"
+
+
+def _zigzag(n: int) -> int:
+    return n * 2 if n >= 0 else -n * 2 - 1
+
+
+def _unzigzag(n: int) -> int:
+    return n // 2 if not n & 1 else -(n + 1) // 2
+
+
+def _write_varint(out: bytearray, n: int):
+    while n >= 0x80:
+        out.append((n & 0x7F) | 0x80)
+        n >>= 7
+    out.append(n)
+
+
+def _read_varint(data: bytes, position: int) -> tuple[int, int]:
+    result = shift = 0
+    while True:
+        if position >= len(data):
+            raise ValueError("truncated sketch")
+        byte = data[position]
+        position += 1
+        result |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return result, position
+        shift += 7
+
+
+# =========================
+# PERSISTANCE
+# =========================
+def create_tables(cursor) -> bool:
+    """
+    sketch_buckets : effectif par (distribution, bucket), buckets non vides
+    uniquement ; mis à jour par deltas (upsert), jamais relu pour écrire
+    Retourne True si la table vient d'être créée
+    """
+    exists = cursor.execute("""
+    SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'sketch_buckets'
+    """).fetchone()
+
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS sketch_buckets (
+        name TEXT NOT NULL,
+        bucket INTEGER NOT NULL,
+        count INTEGER NOT NULL,
+        PRIMARY KEY (name, bucket)
+    ) WITHOUT ROWID
+    """)
+    return exists is None
+
+
+def update(conn, changes, alpha: float = RELATIVE_ACCURACY):
+    """
+    Applique des changements de valeur [(nom, ancienne, nouvelle)]
+    Sans commit (transaction de l'appelant)
+    """
+    sketch = QuantileSketch(alpha)
+    deltas = {}
+    for name, old, new in changes:
+        old_key, new_key = sketch.key(old), sketch.key(new)
+        if old_key == new_key:
+            continue
+        if old_key is not None:
+            deltas[(name, old_key)] = deltas.get((name, old_key), 0) - 1
+        if new_key is not None:
+            deltas[(name, new_key)] = deltas.get((name, new_key), 0) + 1
+
+    rows = [(name, key, delta) for (name, key), delta in deltas.items() if delta]
+    if not rows:
+        return
+
+    conn.executemany("""
+    INSERT INTO sketch_buckets (name, bucket, count) VALUES (?, ?, ?)
+    ON CONFLICT(name, bucket) DO UPDATE SET count = count + excluded.count
+    """, rows)
+    if any(delta < 0 for _, _, delta in rows):
+        conn.execute("DELETE FROM sketch_buckets WHERE count <= 0")
+
+
+def load(conn, name: str, alpha: float = RELATIVE_ACCURACY) -> QuantileSketch:
+    return QuantileSketch(alpha, dict(conn.execute("""
+    SELECT bucket, count FROM sketch_buckets WHERE name = ?
+    """, (name,)).fetchall()))
+
+
+def load_all(conn, alpha: float = RELATIVE_ACCURACY) -> dict:
+    """
+    Toutes les distributions stockées {nom: QuantileSketch}
+    """
+    sketches = {}
+    for name, bucket, count in conn.execute("""
+    SELECT name, bucket, count FROM sketch_buckets ORDER BY name
+    """).fetchall():
+        sketches.setdefault(name, QuantileSketch(alpha))._add_count(bucket, count)
+    return sketches
+
+
+def rebuild(conn, name: str, values, alpha: float = RELATIVE_ACCURACY):
+    """
+    Reconstruction complète d'une distribution depuis ses valeurs
+    """
+    sketch = QuantileSketch(alpha)
+    for value in values:
+        sketch.add(value)
+
+    conn.execute("DELETE FROM sketch_buckets WHERE name = ?", (name,))
+    conn.executemany("""
+    INSERT INTO sketch_buckets (name, bucket, count) VALUES (?, ?, ?)
+    """, ((name, key, count) for key, count in sketch.buckets.items()))
+
+
+def purge_weekly(conn, day: date):
+    """
+    Supprime les distributions hebdo antérieures à la semaine précédant day
+    """
+    keep_from = sketch_key("weekly", day - timedelta(days=7))
+    conn.execute("""
+    DELETE FROM sketch_buckets WHERE name LIKE 'weekly:%' AND name < ?
+    """, (keep_from,))
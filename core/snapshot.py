@@ -0,0 +1,66 @@
+import json
+import os
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+
+SNAPSHOT_VERSION = 1
+
+# colonnes d'une quête nécessaires à l'affichage
+ROW_FIELDS = ("id", "title", "category", "frequency", "min_level", "value")
+
+
+@dataclass
+class DashboardSnapshot:
+    """
+    Dernier état affiché du dashboard (premier rendu avant la DB)
+    - day : jour du rendu (quêtes ignorées si ce n'est plus le jour)
+    - boards : tableau → quêtes (dicts ROW_FIELDS)
+    - daily_reset_at : prochain reset des daily (ISO), pour le compte à rebours
+    """
+    day: str
+    level: int
+    exp: int
+    boards: dict = field(default_factory=dict)
+    daily_reset_at: str | None = None
+
+
+def snapshot_path(db_path) -> Path:
+    return Path(db_path).parent / "dashboard.json"
+
+
+def board_rows(rows) -> list[dict]:
+    """
+    Lignes SQLite (ou dicts) → dicts sérialisables
+    """
+    return [{key: row[key] for key in ROW_FIELDS} for row in rows]
+
+
+def load_snapshot(path) -> DashboardSnapshot | None:
+    """
+    None si absent, illisible ou d'une autre version (premier lancement,
+    mise à jour de l'app) : le dashboard attend alors la DB
+    """
+    try:
+        data = json.loads(Path(path).read_text(encoding="utf-8"))
+        if data.get("version") != SNAPSHOT_VERSION:
+            return None
+        return DashboardSnapshot(**data["dashboard"])
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def save_snapshot(path, snapshot: DashboardSnapshot):
+    """
+    Écriture atomique (fichier temporaire puis remplacement) :
+    un crash pendant l'écriture laisse l'ancien snapshot intact
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    data = json.dumps(
+        {"version": SNAPSHOT_VERSION, "dashboard": asdict(snapshot)},
+        ensure_ascii=False, separators=(",", ":"),
+    )
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(data, encoding="utf-8")
+    os.replace(tmp, path)
@@ -1,5 +1,5 @@
 from dataclasses import dataclass
-from datetime import date
+from datetime import date, timedelta
 
 
 @dataclass
@@ -63,18 +63,23 @@ class Stats:
     # -------------------------
     # VALIDATIONS / STREAK
     # -------------------------
-    def register_validation(self):
+    def register_validation(self, today: date):
         """
         Met à jour streaks et validations
+        today : jour de la validation (horloge de l'Engine, rejeu / import)
         """
-        today = date.today()
+        if self.last_validation_date is not None and today < self.last_validation_date:
+            # validation antidatée (import) : le streak ne recule jamais,
+            # voir rebuild_streak
+            self.total_validations += 1
+            return
 
         if self.last_validation_date == today:
             self.validations_today += 1
             self.combo_validations += 1
         else:
             # nouveau jour
-            if self.last_validation_date == today.replace(day=today.day - 1):
+            if self.last_validation_date == today - timedelta(days=1):
                 self.current_streak += 1
             else:
                 self.current_streak = 1
@@ -85,3 +90,64 @@ class Stats:
         self.best_streak = max(self.best_streak, self.current_streak)
         self.total_validations += 1
         self.last_validation_date = today
+
+    def rebuild_streak(self, days):
+        """
+        Recalcule les streaks depuis l'ensemble des jours validés, triés
+        (après un import antidaté : jours comblés, séries passées)
+        Le streak courant n'est repris que s'il finit au dernier jour connu
+        """
+        best = self.best_streak
+        previous = None
+        run = 0
+        for day in days:
+            if previous is not None and (day - previous).days == 1:
+                run += 1
+            else:
+                run = 1
+            best = max(best, run)
+            previous = day
+
+        if previous is not None and previous == self.last_validation_date:
+            self.current_streak = run
+        self.best_streak = max(best, self.current_streak)
+
+    def streak_state(self) -> tuple:
+        """
+        (last_validation_date, current_streak, validations_today,
+        combo_validations, best_streak) : état restauré par unregister_validation
+        """
+        return (self.last_validation_date, self.current_streak,
+                self.validations_today, self.combo_validations, self.best_streak)
+
+    def unregister_validation(self, day: date, remaining: int, before: tuple):
+        """
+        Annule une validation du jour day (inverse de register_validation)
+        - remaining : validations restantes ce jour-là
+        - before : streak_state() juste avant la validation annulée
+        Seule la fenêtre de streak touchée est recalculée (O(1))
+        """
+        self.total_validations = max(0, self.total_validations - 1)
+        last, streak, today, combo, best = before
+
+        if self.last_validation_date == day:
+            if remaining:
+                self.validations_today = max(0, self.validations_today - 1)
+                self.combo_validations = max(0, self.combo_validations - 1)
+            else:
+                # jour vidé : état de la veille de ce jour
+                self.last_validation_date = last
+                self.current_streak = streak
+                self.validations_today = today
+                self.combo_validations = combo
+        elif (
+            not remaining
+            and self.last_validation_date is not None
+            and day < self.last_validation_date
+            and (self.last_validation_date - day).days < self.current_streak
+        ):
+            # jour retiré au milieu du streak courant : restent les jours suivants
+            self.current_streak = (self.last_validation_date - day).days
+
+        if self.best_streak > best:
+            self.best_streak = max(best, self.current_streak)
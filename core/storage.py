@@ -1,24 +1,178 @@
+import copy
+import heapq
+import json
 import sqlite3
 import random
+from contextlib import contextmanager
 from pathlib import Path
-from datetime import date
+from datetime import date, datetime, timedelta
 
 from core.objective import Objective, Frequency, Category
 from core.stats import Stats
+from core.history import HistoryEntry
+from core.clock import Clock, SYSTEM_CLOCK
+from core.catalog import CATALOG_PATH, catalog_hash, compile_catalog
+from core import quests
+from core import leaderboard
+from core import rollups
+from core import sketches
+from core import teams
+from core.archive import HistoryArchive
+from core import sync
+from core.leaderboard import Leaderboard
+from core import instrumentation
 
 
+DEFAULT_DB_PATH = "data/ironsystem.db"
+
+
+class _TxState:
+    # état de transaction partagé par un Storage et ses vues for_user()
+    depth = 0
+
+
+def _stats_row(stats: Stats) -> tuple:
+    # colonnes écrites par save_stats (comparaison avec la ligne mémorisée)
+    return (stats.total_exp, stats.total_validations, stats.current_streak,
+            stats.best_streak, stats.last_validation_date,
+            stats.validations_today, stats.combo_validations)
+
+
+@instrumentation.instrumented(
+    "storage", skip=("batch", "savepoint", "_commit", "_row_to_objective", "_columns")
+)
 class Storage:
     """
     Gestion du stockage local (SQLite)
+    - user_id : utilisateur courant (1 = utilisateur local)
+    - clock / rng injectables (simulation, tests reproductibles)
+    - check_same_thread=False : ouverture dans un thread, utilisation
+      ensuite dans un autre (jamais les deux en même temps)
+    - timeout : attente du verrou d'écriture (s), dès la création du schéma
     """
 
-    def __init__(self, db_path: str = "data/ironsystem.db"):
-        Path("data").mkdir(exist_ok=True)
+    SCHEMA_VERSION = 2
+
+    def __init__(self, db_path: str = DEFAULT_DB_PATH, user_id: int = 1,
+                 clock: Clock | None = None, rng: random.Random | None = None,
+                 check_same_thread: bool = True, timeout: float = 5.0):
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self.db_path = str(db_path)
 
-        self.conn = sqlite3.connect(db_path)
+        self.conn = sqlite3.connect(
+            db_path, factory=instrumentation.connection_factory(),
+            check_same_thread=check_same_thread, timeout=timeout,
+        )
         self.conn.row_factory = sqlite3.Row
 
+        self.user_id = user_id
+        self.clock = clock or SYSTEM_CLOCK
+        self.rng = rng or random
+
+        # profondeur des blocs batch() imbriqués (partagée entre vues)
+        self._tx = _TxState()
+
+        # modèles de quêtes + paliers déjà matérialisés (partagés entre vues)
+        self._quests = {"templates": None, "materialized": set()}
+
+        # distributions relues depuis la DB (partagées entre vues)
+        self._sketches = {"version": None, "loaded": {}}
+
+        # dernière ligne stats lue / écrite par utilisateur (save_stats
+        # compare en mémoire au lieu de relire la ligne)
+        self._saved_stats = {"version": None, "rows": {}}
+
         self._create_tables()
+        self._ensure_user()
+
+    def for_user(self, user_id: int, rng: random.Random | None = None) -> "Storage":
+        """
+        Vue sur un autre utilisateur partageant la même connexion
+        (et les mêmes transactions batch())
+        """
+        view = copy.copy(self)
+        view.user_id = user_id
+        if rng is not None:
+            view.rng = rng
+        view._ensure_user()
+        return view
+
+    def create_user(self) -> int:
+        """
+        Nouvel utilisateur (id attribué par SQLite), retourne son id
+        """
+        cursor = self.conn.execute("INSERT INTO stats DEFAULT VALUES")
+        self._commit()
+        return cursor.lastrowid
+
+    def _ensure_user(self):
+        self.conn.execute(
+            "INSERT OR IGNORE INTO stats (id) VALUES (?)", (self.user_id,)
+        )
+        self._commit()
+
+    # =========================
+    # TRANSACTIONS
+    # =========================
+    @contextmanager
+    def batch(self):
+        """
+        Regroupe plusieurs écritures dans une seule transaction
+        - un seul commit à la sortie du bloc
+        - rollback si une exception remonte
+        - blocs imbriqués autorisés (seul le plus externe commit)
+        """
+        self._tx.depth += 1
+        try:
+            yield self
+        except BaseException:
+            if self._tx.depth == 1:
+                self.conn.rollback()
+                self.discard_caches()
+            raise
+        else:
+            if self._tx.depth == 1:
+                self.conn.commit()
+        finally:
+            self._tx.depth -= 1
+
+    @contextmanager
+    def savepoint(self, name: str = "request"):
+        """
+        Bloc annulable au sein d'un batch() : si une exception remonte,
+        seules ses écritures sont annulées (ROLLBACK TO), la transaction
+        englobante continue
+        """
+        with self.batch():
+            if not self.conn.in_transaction:
+                # sinon RELEASE du savepoint le plus externe = commit
+                self.conn.execute("BEGIN")
+            self.conn.execute(f"SAVEPOINT {name}")
+            try:
+                yield self
+            except BaseException:
+                if self.conn.in_transaction:
+                    self.conn.execute(f"ROLLBACK TO {name}")
+                    self.conn.execute(f"RELEASE {name}")
+                self.discard_caches()
+                raise
+            else:
+                self.conn.execute(f"RELEASE {name}")
+
+    def discard_caches(self):
+        """
+        Oublie les états mémorisés d'après la DB : après un rollback ou
+        des écritures hors Storage (fusion de sync…)
+        - paliers matérialisés revérifiés (upsert idempotent)
+        - stats relues à la prochaine sauvegarde
+        """
+        self._quests["materialized"].clear()
+        self._saved_stats["rows"].clear()
+
+    def _commit(self):
+        # différé tant qu'un batch() est ouvert
+        if not self._tx.depth:
+            self.conn.commit()
 
     # =========================
     # TABLE CREATION
@@ -26,6 +180,14 @@ class Storage:
     def _create_tables(self):
         cursor = self.conn.cursor()
 
+        # DB neuve : pages libérées par l'archivage rendues au fur et à mesure
+        # (sans effet sur une DB existante : voir "compact --vacuum")
+        cursor.execute("PRAGMA auto_vacuum = INCREMENTAL")
+
+        version = cursor.execute("PRAGMA user_version").fetchone()[0]
+        if version < 2:
+            self._rename_unscoped_tables(cursor)
+
         # -------------------------
         # STATS
         # -------------------------
@@ -42,17 +204,15 @@ class Storage:
         )
         """)
 
-        cursor.execute("""
-        INSERT OR IGNORE INTO stats (id) VALUES (1)
-        """)
-
         # -------------------------
         # ACHIEVEMENTS
         # -------------------------
         cursor.execute("""
         CREATE TABLE IF NOT EXISTS achievements (
-            id INTEGER PRIMARY KEY,
-            unlocked INTEGER DEFAULT 0
+            user_id INTEGER NOT NULL DEFAULT 1,
+            id INTEGER NOT NULL,
+            unlocked INTEGER DEFAULT 0,
+            PRIMARY KEY (user_id, id)
         )
         """)
 
@@ -66,7 +226,35 @@ class Storage:
             category TEXT NOT NULL,
             frequency TEXT NOT NULL,
             min_level INTEGER NOT NULL,
-            value INTEGER NOT NULL
+            value INTEGER NOT NULL,
+            template TEXT,
+            active INTEGER NOT NULL DEFAULT 1
+        )
+        """)
+
+        # DB antérieures aux quêtes générées
+        columns = self._columns(cursor, "objectives")
+        if "template" not in columns:
+            cursor.execute("ALTER TABLE objectives ADD COLUMN template TEXT")
+        if "active" not in columns:
+            cursor.execute(
+                "ALTER TABLE objectives ADD COLUMN active INTEGER NOT NULL DEFAULT 1"
+            )
+
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS quest_templates (
+            id TEXT PRIMARY KEY,
+            title TEXT NOT NULL,
+            category TEXT NOT NULL,
+            frequency TEXT NOT NULL,
+            min_level INTEGER NOT NULL,
+            base REAL NOT NULL,
+            slope REAL NOT NULL,
+            cap REAL NOT NULL,
+            exp_base REAL NOT NULL,
+            exp_slope REAL NOT NULL,
+            exp_cap REAL NOT NULL,
+            step INTEGER NOT NULL DEFAULT 1
         )
         """)
 
@@ -75,20 +263,27 @@ class Storage:
         # -------------------------
         cursor.execute("""
         CREATE TABLE IF NOT EXISTS objective_progress (
-            objective_id TEXT PRIMARY KEY,
-            last_completed TEXT
+            user_id INTEGER NOT NULL DEFAULT 1,
+            objective_id TEXT NOT NULL,
+            last_completed TEXT,
+            PRIMARY KEY (user_id, objective_id)
         )
         """)
 
         # -------------------------
         # DAILY POOL
         # -------------------------
+        # board : tableau (daily / weekly…) de chaque quête tirée
         cursor.execute("""
         CREATE TABLE IF NOT EXISTS daily_objectives (
-            objective_id TEXT PRIMARY KEY
+            user_id INTEGER NOT NULL DEFAULT 1,
+            objective_id TEXT NOT NULL,
+            board TEXT NOT NULL DEFAULT 'daily',
+            PRIMARY KEY (user_id, objective_id)
         )
         """)
 
+        # méta globales (catalogue…)
         cursor.execute("""
         CREATE TABLE IF NOT EXISTS daily_meta (
             key TEXT PRIMARY KEY,
@@ -96,12 +291,243 @@ class Storage:
         )
         """)
 
-        self.conn.commit()
+        # méta par utilisateur (clés de rollover des tableaux)
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS user_meta (
+            user_id INTEGER NOT NULL,
+            key TEXT NOT NULL,
+            value TEXT,
+            PRIMARY KEY (user_id, key)
+        )
+        """)
+
+        # -------------------------
+        # HISTORY (1 ligne par évènement)
+        # -------------------------
+        # AUTOINCREMENT : un id n'est jamais réattribué (clé de sync,
+        # watermark d'export), même après archivage des dernières lignes
+        self._rename_reusable_history(cursor)
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS history (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL DEFAULT 1,
+            timestamp TEXT NOT NULL,
+            action TEXT NOT NULL,
+            objective_id TEXT,
+            impact INTEGER DEFAULT 0
+        )
+        """)
+
+        self._migrate_history_ids(cursor)
+
+        cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_history_timestamp
+        ON history (timestamp)
+        """)
+
+        cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_history_user_time
+        ON history (user_id, timestamp)
+        """)
+
+        self.has_fts = self._create_search_index(cursor)
+
+        if leaderboard.create_tables(cursor):
+            self._backfill_leaderboards(cursor)
+        if sketches.create_tables(cursor):
+            self.rebuild_sketches()
+
+        if version < 2:
+            self._migrate_user_scope(cursor)
+            cursor.execute(f"PRAGMA user_version = {self.SCHEMA_VERSION}")
+
+        # agrégats + journal de sync (après migration : données v1 incluses)
+        teams.create_tables(cursor)
+        if rollups.create_tables(cursor):
+            self.rebuild_rollups()
+        sync.create_tables(cursor)
+
+        self._commit()
+
+    # -------------------------
+    # RECHERCHE (FTS5)
+    # -------------------------
+    def _create_search_index(self, cursor) -> bool:
+        """
+        Index plein texte sur objectives.title, synchronisé par triggers
+        - remove_diacritics : "mobilite" trouve "Mobilité"
+        - index de préfixes 2/3 caractères pour la saisie en cours
+        Retourne False si SQLite n'a pas FTS5 (repli LIKE)
+        """
+        exists = cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'objectives_fts'"
+        ).fetchone()
+        if exists:
+            return True
+
+        try:
+            cursor.execute("""
+            CREATE VIRTUAL TABLE objectives_fts USING fts5(
+                title,
+                content = 'objectives',
+                content_rowid = 'rowid',
+                tokenize = 'unicode61 remove_diacritics 2',
+                prefix = '2 3'
+            )
+            """)
+        except sqlite3.OperationalError:
+            return False
+
+        cursor.execute("""
+        CREATE TRIGGER objectives_fts_insert AFTER INSERT ON objectives BEGIN
+            INSERT INTO objectives_fts (rowid, title) VALUES (new.rowid, new.title);
+        END
+        """)
+        cursor.execute("""
+        CREATE TRIGGER objectives_fts_delete AFTER DELETE ON objectives BEGIN
+            INSERT INTO objectives_fts (objectives_fts, rowid, title)
+            VALUES ('delete', old.rowid, old.title);
+        END
+        """)
+        cursor.execute("""
+        CREATE TRIGGER objectives_fts_update AFTER UPDATE OF title ON objectives BEGIN
+            INSERT INTO objectives_fts (objectives_fts, rowid, title)
+            VALUES ('delete', old.rowid, old.title);
+            INSERT INTO objectives_fts (rowid, title) VALUES (new.rowid, new.title);
+        END
+        """)
+
+        # DB existante : indexe le catalogue déjà présent
+        cursor.execute("INSERT INTO objectives_fts (objectives_fts) VALUES ('rebuild')")
+        return True
+
+    # -------------------------
+    # MIGRATION v1 → v2 (tables par utilisateur)
+    # -------------------------
+    _USER_TABLES = ("achievements", "objective_progress", "daily_objectives")
+
+    def _backfill_leaderboards(self, cursor):
+        """
+        Première création des classements sur une DB existante
+        (seul parcours complet des stats ; ensuite tout est incrémental)
+        """
+        rows = cursor.execute("""
+        SELECT id, total_exp, current_streak FROM stats
+        WHERE total_exp > 0 OR current_streak > 0
+        """).fetchall()
+
+        Leaderboard(self.conn, "exp").rebuild({r[0]: r[1] for r in rows})
+        Leaderboard(self.conn, "streak").rebuild({r[0]: r[2] for r in rows})
+
+    def _columns(self, cursor, table: str) -> list[str]:
+        return [
+            r["name"] for r in
+            cursor.execute(f"PRAGMA table_info({table})").fetchall()
+        ]
+
+    def _rename_unscoped_tables(self, cursor):
+        """
+        Anciennes tables sans user_id : mises de côté avant recréation
+        """
+        for table in self._USER_TABLES:
+            columns = self._columns(cursor, table)
+            if columns and "user_id" not in columns:
+                cursor.execute(f"ALTER TABLE {table} RENAME TO _v1_{table}")
+
+    def _rename_reusable_history(self, cursor):
+        """
+        Historique sans AUTOINCREMENT (ids réutilisables) : mis de côté
+        avant recréation
+        """
+        row = cursor.execute("""
+        SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'history'
+        """).fetchone()
+        if row is not None and "AUTOINCREMENT" not in row[0].upper():
+            cursor.execute("ALTER TABLE history RENAME TO _v2_history")
+
+    def _migrate_history_ids(self, cursor):
+        """
+        Lignes recopiées avec leurs ids (index et triggers recréés ensuite) ;
+        séquence placée après les ids déjà archivés
+        """
+        old = cursor.execute("PRAGMA table_info(_v2_history)").fetchall()
+        if not old:
+            return
+
+        current = self._columns(cursor, "history")
+        for column in old:
+            if column["name"] not in current:
+                cursor.execute(
+                    f"ALTER TABLE history ADD COLUMN {column['name']} {column['type']}"
+                )
+        columns = ", ".join(column["name"] for column in old)
+        cursor.execute(f"""
+        INSERT INTO history ({columns}) SELECT {columns} FROM _v2_history
+        """)
+        cursor.execute("DROP TABLE _v2_history")
+
+        archived = HistoryArchive(self.db_path).max_id()
+        if archived:
+            cursor.execute("DELETE FROM sqlite_sequence WHERE name = 'history'")
+            cursor.execute("""
+            INSERT INTO sqlite_sequence (name, seq)
+            VALUES ('history', MAX(?, (SELECT COALESCE(MAX(id), 0) FROM history)))
+            """, (archived,))
+
+    def _migrate_user_scope(self, cursor):
+        """
+        Données v1 rattachées à l'utilisateur local (id 1)
+        """
+        if self._columns(cursor, "_v1_achievements"):
+            cursor.execute("""
+            INSERT OR IGNORE INTO achievements (user_id, id, unlocked)
+            SELECT 1, id, unlocked FROM _v1_achievements
+            """)
+            cursor.execute("DROP TABLE _v1_achievements")
+
+        if self._columns(cursor, "_v1_objective_progress"):
+            cursor.execute("""
+            INSERT OR IGNORE INTO objective_progress (user_id, objective_id, last_completed)
+            SELECT 1, objective_id, last_completed FROM _v1_objective_progress
+            """)
+            cursor.execute("DROP TABLE _v1_objective_progress")
+
+        old_daily = self._columns(cursor, "_v1_daily_objectives")
+        if old_daily:
+            board = "board" if "board" in old_daily else "'daily'"
+            cursor.execute(f"""
+            INSERT OR IGNORE INTO daily_objectives (user_id, objective_id, board)
+            SELECT 1, objective_id, {board} FROM _v1_daily_objectives
+            """)
+            cursor.execute("DROP TABLE _v1_daily_objectives")
+
+        if "user_id" not in self._columns(cursor, "history"):
+            cursor.execute("""
+            ALTER TABLE history ADD COLUMN user_id INTEGER NOT NULL DEFAULT 1
+            """)
+
+        # clés de rollover : désormais par utilisateur
+        cursor.execute("""
+        INSERT OR IGNORE INTO user_meta (user_id, key, value)
+        SELECT 1, key, value FROM daily_meta
+        WHERE key = 'date' OR key LIKE 'board:%'
+        """)
+        cursor.execute("""
+        DELETE FROM daily_meta WHERE key = 'date' OR key LIKE 'board:%'
+        """)
 
     # =========================
     # STATS
     # =========================
     def load_stats(self) -> Stats:
+        stats = self._read_stats()
+        if stats is None:
+            return Stats()
+        self._saved_row()
+        self._saved_stats["rows"][self.user_id] = _stats_row(stats)
+        return stats
+
+    def _read_stats(self) -> Stats | None:
         cursor = self.conn.cursor()
         cursor.execute("""
         SELECT
@@ -113,12 +539,12 @@ class Storage:
             validations_today,
             combo_validations
         FROM stats
-        WHERE id = 1
-        """)
+        WHERE id = ?
+        """, (self.user_id,))
         row = cursor.fetchone()
 
         if not row:
-            return Stats()
+            return None
 
         return Stats(
             total_exp=row["total_exp"],
@@ -130,7 +556,21 @@ class Storage:
             combo_validations=row["combo_validations"],
         )
 
-    def save_stats(self, stats: Stats):
+    def save_stats(self, stats: Stats, track_weekly: bool = True):
+        """
+        track_weekly : False pour les imports (EXP non gagnée cette semaine)
+        Comparée à la dernière ligne connue (mémoire) : rien d'écrit si elle
+        n'a pas changé, classements et distributions seulement si EXP,
+        streak ou validations ont bougé
+        """
+        row = _stats_row(stats)
+        previous = self._saved_row()
+        if previous is None:
+            stored = self._read_stats()
+            previous = _stats_row(stored) if stored is not None else None
+        if previous == row:
+            return
+
         cursor = self.conn.cursor()
         cursor.execute("""
         UPDATE stats SET
@@ -141,7 +581,7 @@ class Storage:
             last_validation_date = ?,
             validations_today = ?,
             combo_validations = ?
-        WHERE id = 1
+        WHERE id = ?
         """, (
             stats.total_exp,
             stats.total_validations,
@@ -149,9 +589,156 @@ class Storage:
             stats.best_streak,
             stats.last_validation_date,
             stats.validations_today,
-            stats.combo_validations
+            stats.combo_validations,
+            self.user_id
         ))
-        self.conn.commit()
+        if previous is not None:
+            ranked = (previous[0], previous[2], previous[1])
+            if ranked != (stats.total_exp, stats.current_streak, stats.total_validations):
+                self._update_leaderboards(ranked, stats, track_weekly)
+                self._update_sketches(ranked, stats)
+            self._saved_stats["rows"][self.user_id] = row
+        self._commit()
+
+    def _saved_row(self) -> tuple | None:
+        # ligne mémorisée, oubliée si une autre connexion a écrit depuis
+        version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+        cache = self._saved_stats
+        if cache["version"] != version:
+            cache["version"] = version
+            cache["rows"].clear()
+        return cache["rows"].get(self.user_id)
+
+    # =========================
+    # LEADERBOARDS
+    # =========================
+    def leaderboard(self, board: str) -> Leaderboard:
+        """
+        Classement matérialisé ("exp", "streak", "weekly" = semaine en cours)
+        """
+        if board not in leaderboard.BOARDS:
+            raise ValueError(f"unknown leaderboard: {board}")
+        return Leaderboard(self.conn, leaderboard.board_key(board, self.clock.today()))
+
+    def _update_leaderboards(self, previous, stats: Stats, track_weekly: bool = True):
+        # rien à faire si les scores classés n'ont pas bougé
+        old_exp, old_streak = previous[0], previous[1]
+        if old_exp != stats.total_exp:
+            Leaderboard(self.conn, "exp").set_score(self.user_id, stats.total_exp)
+        if old_streak != stats.current_streak:
+            Leaderboard(self.conn, "streak").set_score(self.user_id, stats.current_streak)
+
+        gained = stats.total_exp - old_exp
+        if gained > 0 and track_weekly:
+            weekly = self.leaderboard("weekly")
+            if not weekly.exists():
+                # nouvelle semaine : clé neuve, anciennes semaines purgées
+                leaderboard.purge_weekly(self.conn, self.clock.today())
+                sketches.purge_weekly(self.conn, self.clock.today())
+            score = weekly.score(self.user_id) or 0
+            weekly.add_score(self.user_id, gained)
+            sketches.update(self.conn, [(weekly.key, score, score + gained)])
+        elif gained < 0 and track_weekly:
+            # EXP retirée (annulation) : jamais sous zéro cette semaine
+            weekly = self.leaderboard("weekly")
+            score = weekly.score(self.user_id)
+            if score:
+                weekly.set_score(self.user_id, max(0, score + gained))
+                sketches.update(self.conn, [(weekly.key, score, max(0, score + gained))])
+
+    # =========================
+    # DISTRIBUTIONS (percentiles)
+    # =========================
+    _SKETCH_COLUMNS = {
+        "exp": "total_exp",
+        "streak": "current_streak",
+        "validations": "total_validations",
+    }
+
+    def _update_sketches(self, previous, stats: Stats):
+        # (exp, streak, validations) : deux buckets touchés par valeur modifiée
+        sketches.update(self.conn, [
+            ("exp", previous[0], stats.total_exp),
+            ("streak", previous[1], stats.current_streak),
+            ("validations", previous[2], stats.total_validations),
+        ])
+
+    def sketch(self, metric: str) -> sketches.QuantileSketch:
+        """
+        Distribution d'une métrique sur tous les utilisateurs
+        ("exp", "streak", "validations", "weekly" = semaine en cours)
+        Relue seulement si la DB a changé depuis (sinon : cache mémoire)
+        """
+        if metric not in sketches.METRICS:
+            raise ValueError(f"unknown metric: {metric}")
+        name = sketches.sketch_key(metric, self.clock.today())
+
+        if self.conn.in_transaction:
+            # écritures non validées (rollback possible) : pas de cache
+            return sketches.load(self.conn, name)
+
+        version = (
+            self.conn.execute("PRAGMA data_version").fetchone()[0],
+            self.conn.total_changes,
+        )
+        cache = self._sketches
+        if cache["version"] != version:
+            cache["version"] = version
+            cache["loaded"].clear()
+        if name not in cache["loaded"]:
+            cache["loaded"][name] = sketches.load(self.conn, name)
+        return cache["loaded"][name]
+
+    def metric_value(self, metric: str) -> int:
+        """
+        Valeur courante de l'utilisateur pour une métrique
+        """
+        if metric == "weekly":
+            return self.leaderboard("weekly").score(self.user_id) or 0
+        if metric not in self._SKETCH_COLUMNS:
+            raise ValueError(f"unknown metric: {metric}")
+        row = self.conn.execute(
+            f"SELECT {self._SKETCH_COLUMNS[metric]} FROM stats WHERE id = ?",
+            (self.user_id,),
+        ).fetchone()
+        return row[0] if row else 0
+
+    def percentile(self, metric: str, value: int | None = None) -> float | None:
+        """
+        Part des utilisateurs à value ou plus (0.12 = "top 12 %")
+        value : valeur de l'utilisateur courant par défaut
+        None si la valeur n'est pas classée (0) ou si personne ne l'est
+        """
+        if value is None:
+            value = self.metric_value(metric)
+        if value <= 0:
+            return None
+        return self.sketch(metric).top_share(value)
+
+    def rebuild_sketches(self):
+        """
+        Recalcule toutes les distributions depuis stats et les classements
+        hebdo (création de la table, écritures hors save_stats : sync…)
+        """
+        with self.batch():
+            for metric, column in self._SKETCH_COLUMNS.items():
+                sketches.rebuild(self.conn, metric, (
+                    r[0] for r in self.conn.execute(
+                        f"SELECT {column} FROM stats WHERE {column} > 0"
+                    )
+                ))
+
+            self.conn.execute(
+                "DELETE FROM sketch_buckets WHERE name LIKE 'weekly:%'"
+            )
+            weeks = {}
+            for board, score in self.conn.execute("""
+            SELECT board, score FROM leaderboard_scores
+            WHERE board LIKE 'weekly:%' AND score > 0
+            """):
+                weeks.setdefault(board, []).append(score)
+            for board, scores in weeks.items():
+                sketches.rebuild(self.conn, board, scores)
 
     # =========================
     # OBJECTIVES BASE
@@ -170,146 +757,249 @@ class Storage:
             objective.min_level,
             objective.value
         ))
-        self.conn.commit()
-
-    def seed_objectives(self):
-        """
-        Initialise la liste complète des objectifs
-        - Scaling par niveau
-        - Exercices Elite (weekly)
-        - Recovery intelligent (OFF days inclus)
-        - Anti-doublons par ID
-        """
-
-        objectives = [
-
-            # ==================================================
-            # 🥋 DISCIPLINE — FORCE / CONTRÔLE (MUSCU)
-            # ==================================================
-
-            # Niveau 1–4
-            Objective("pushups_5", "5 pompes", Category.DISCIPLINE, Frequency.DAILY, 1, 10),
-            Objective("squats_10", "10 squats", Category.DISCIPLINE, Frequency.DAILY, 1, 10),
-            Objective("plank_20", "Gainage 20 secondes", Category.DISCIPLINE, Frequency.DAILY, 1, 10),
-
-            # Niveau 5–9
-            Objective("pushups_10", "10 pompes", Category.DISCIPLINE, Frequency.DAILY, 5, 15),
-            Objective("squats_20", "20 squats", Category.DISCIPLINE, Frequency.DAILY, 5, 15),
-            Objective("plank_40", "Gainage 40 secondes", Category.DISCIPLINE, Frequency.DAILY, 5, 15),
-
-            # Niveau 10–19
-            Objective("pushups_20", "20 pompes", Category.DISCIPLINE, Frequency.DAILY, 10, 25),
-            Objective("lunges_20", "20 fentes", Category.DISCIPLINE, Frequency.DAILY, 10, 25),
-            Objective("plank_60", "Gainage 1 minute", Category.DISCIPLINE, Frequency.DAILY, 10, 25),
-
-            # Niveau 20+
-            Objective("pushups_slow_20", "20 pompes lentes", Category.DISCIPLINE, Frequency.DAILY, 20, 40),
-            Objective("squats_50", "50 squats", Category.DISCIPLINE, Frequency.DAILY, 20, 40),
-            Objective("plank_120", "Gainage 2 minutes", Category.DISCIPLINE, Frequency.DAILY, 25, 45),
-
-            # ==================================================
-            # 🫀 ENDURANCE — CARDIO
-            # ==================================================
-
-            Objective("walk_10", "Marche 10 minutes", Category.ENDURANCE, Frequency.DAILY, 1, 10),
-            Objective("walk_20", "Marche 20 minutes", Category.ENDURANCE, Frequency.DAILY, 5, 15),
-
-            Objective("jog_5", "Jogging 5 minutes", Category.ENDURANCE, Frequency.DAILY, 5, 15),
-            Objective("jog_10", "Jogging 10 minutes", Category.ENDURANCE, Frequency.DAILY, 10, 25),
-
-            Objective("bike_20", "Vélo 20 minutes", Category.ENDURANCE, Frequency.DAILY, 15, 30),
-            Objective("run_20", "Course 20 minutes", Category.ENDURANCE, Frequency.DAILY, 20, 40),
-
-            # ==================================================
-            # 🧠 RECOVERY — (MENTAL)
-            # ==================================================
-
-            Objective("stretch_5", "Étirements légers 5 minutes", Category.MENTAL, Frequency.DAILY, 1, 10),
-            Objective("breathing_3", "Respiration post-effort 3 minutes", Category.MENTAL, Frequency.DAILY, 1, 10),
-
-            Objective("mobility_shoulders", "Mobilité épaules 5 minutes", Category.MENTAL, Frequency.DAILY, 5, 15),
-            Objective("stretch_10", "Étirements complets 10 minutes", Category.MENTAL, Frequency.DAILY, 10, 20),
-
-            Objective("foam_5", "Auto-massage 5 minutes", Category.MENTAL, Frequency.DAILY, 15, 30),
-            Objective("mobility_full", "Mobilité complète 15 minutes", Category.MENTAL, Frequency.DAILY, 20, 40),
-
-            # ==================================================
-            # 🏆 ELITE — WEEKLY
-            # ==================================================
-
-            Objective(
-                "elite_pushups_100",
-                "100 pompes (session unique)",
-                Category.DISCIPLINE,
-                Frequency.WEEKLY,
-                10,
-                120
-            ),
-
-            Objective(
-                "elite_run_5k",
-                "Course 5 km",
-                Category.ENDURANCE,
-                Frequency.WEEKLY,
-                15,
-                150
-            ),
-
-            Objective(
-                "elite_full_body",
-                "Séance full-body complète",
-                Category.DISCIPLINE,
-                Frequency.WEEKLY,
-                20,
-                180
-            ),
-
-            Objective(
-                "elite_recovery",
-                "Recovery complète (stretch + mobilité + respiration)",
-                Category.MENTAL,
-                Frequency.WEEKLY,
-                10,
-                100
-            ),
-        ]
+        self._commit()
+
+    def seed_objectives(self, catalog_path=CATALOG_PATH) -> bool:
+        """
+        Synchronise la table objectives avec le catalogue (assets/objectives.json)
+        - hash du catalogue comparé à daily_meta : rien à faire s'il n'a pas changé
+        - sinon un seul executemany (upsert) dans une transaction :
+          titres / EXP modifiés propagés, objectifs existants conservés
+        Retourne True si la table a été (re)seedée
+        """
+        cache_path = (
+            None if self.db_path == ":memory:"
+            else Path(self.db_path).parent / "catalog.bin"
+        )
 
-        # 🔒 Anti-doublons + sauvegarde
-        seen_ids = set()
-        for obj in objectives:
-            if obj.id in seen_ids:
-                continue
-            seen_ids.add(obj.id)
-            self.save_objective(obj)
+        digest = catalog_hash(catalog_path, cache_path)
+        if self.get_meta("catalog_hash") == digest:
+            return False
 
+        digest, rows, templates = compile_catalog(catalog_path, cache_path)
+
+        with self.batch():
+            cursor = self.conn.cursor()
+            cursor.executemany("""
+            INSERT INTO objectives (
+                id, title, category, frequency, min_level, value, template, active
+            ) VALUES (?, ?, ?, ?, ?, ?, NULL, 1)
+            ON CONFLICT(id) DO UPDATE SET
+                title = excluded.title,
+                category = excluded.category,
+                frequency = excluded.frequency,
+                min_level = excluded.min_level,
+                value = excluded.value,
+                template = NULL,
+                active = 1
+            """, rows)
+
+            cursor.execute("DELETE FROM quest_templates")
+            cursor.executemany("""
+            INSERT INTO quest_templates (
+                id, title, category, frequency, min_level,
+                base, slope, cap, exp_base, exp_slope, exp_cap, step
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, templates)
+
+            # retirés du catalogue : conservés (historique) mais plus tirés
+            cursor.execute("""
+            UPDATE objectives SET active = 0
+            WHERE id NOT IN (SELECT value FROM json_each(?))
+            AND (template IS NULL OR template NOT IN (SELECT id FROM quest_templates))
+            """, (json.dumps([r[0] for r in rows]),))
+
+            # paliers déjà générés : recalculés avec les nouveaux paramètres
+            self._quests["templates"] = None
+            self._quests["materialized"].clear()
+            brackets = {
+                int(r[0].rsplit("@", 1)[1]) for r in cursor.execute("""
+                SELECT id FROM objectives WHERE template IS NOT NULL AND active = 1
+                """).fetchall()
+            }
+            for b in sorted(brackets):
+                self._materialize_bracket(b)
+
+            self.set_meta("catalog_hash", digest)
+
+        return True
+
+    # =========================
+    # GENERATED QUESTS (modèles paramétriques)
+    # =========================
+    def load_templates(self) -> tuple:
+        """
+        Modèles de quêtes du catalogue (chargés une fois par connexion)
+        """
+        if self._quests["templates"] is None:
+            self._quests["templates"] = tuple(
+                quests.template_from_row(r)
+                for r in self.conn.execute(
+                    "SELECT * FROM quest_templates ORDER BY id"
+                ).fetchall()
+            )
+        return self._quests["templates"]
+
+    def generated_objectives(self, level: int) -> tuple:
+        """
+        Quêtes générées pour le palier du niveau (lignes objectives)
+        Matérialisées dans la table au premier usage du palier
+        (une ligne par modèle et par palier atteint, pas par niveau)
+        """
+        bracket = quests.bracket(level)
+        if bracket not in self._quests["materialized"]:
+            self._materialize_bracket(bracket)
+        return quests.generate(self.load_templates(), bracket)
+
+    def _materialize_for_id(self, objective_id: str) -> bool:
+        template_id, _, suffix = objective_id.rpartition("@")
+        if not suffix.isdigit() or int(suffix) > quests.bracket(quests.MAX_LEVEL):
+            return False
+        if not any(t.id == template_id for t in self.load_templates()):
+            return False
+        self._materialize_bracket(int(suffix))
+        return True
+
+    def _materialize_bracket(self, bracket: int):
+        self.conn.executemany("""
+        INSERT INTO objectives (
+            id, title, category, frequency, min_level, value, template, active
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, 1)
+        ON CONFLICT(id) DO UPDATE SET
+            title = excluded.title,
+            category = excluded.category,
+            frequency = excluded.frequency,
+            min_level = excluded.min_level,
+            value = excluded.value,
+            template = excluded.template,
+            active = 1
+        """, quests.generate(self.load_templates(), bracket))
+        self._quests["materialized"].add(bracket)
+        self._commit()
 
     def load_objectives_for_level(self, level: int):
+        """
+        Objectifs accessibles au niveau (catalogue actif + palier généré)
+        """
+        self.generated_objectives(level)
+
         cursor = self.conn.cursor()
         cursor.execute("""
         SELECT o.*, p.last_completed
         FROM objectives o
         LEFT JOIN objective_progress p
-        ON o.id = p.objective_id
-        WHERE o.min_level <= ?
-        """, (level,))
-
-        objectives = []
-        for row in cursor.fetchall():
-            objectives.append(
-                Objective(
-                    id=row["id"],
-                    title=row["title"],
-                    category=Category(row["category"]),
-                    frequency=Frequency(row["frequency"]),
-                    min_level=row["min_level"],
-                    value=row["value"],
-                    last_completed=(
-                        date.fromisoformat(row["last_completed"])
-                        if row["last_completed"] else None
-                    )
-                )
+        ON o.id = p.objective_id AND p.user_id = ?
+        WHERE o.active = 1 AND o.min_level <= ?
+        AND (o.template IS NULL OR o.id = o.template || '@' || ?)
+        """, (self.user_id, level, quests.bracket(level)))
+
+        return [self._row_to_objective(row) for row in cursor.fetchall()]
+
+    def load_objectives(self):
+        """
+        Catalogue complet (tous niveaux)
+        """
+        cursor = self.conn.cursor()
+        cursor.execute("""
+        SELECT o.*, p.last_completed
+        FROM objectives o
+        LEFT JOIN objective_progress p
+        ON o.id = p.objective_id AND p.user_id = ?
+        """, (self.user_id,))
+
+        return [self._row_to_objective(row) for row in cursor.fetchall()]
+
+    def get_objective(self, objective_id: str) -> Objective | None:
+        cursor = self.conn.cursor()
+        query = """
+        SELECT o.*, p.last_completed
+        FROM objectives o
+        LEFT JOIN objective_progress p
+        ON o.id = p.objective_id AND p.user_id = ?
+        WHERE o.id = ?
+        """
+        row = cursor.execute(query, (self.user_id, objective_id)).fetchone()
+
+        # quête générée d'un palier pas encore matérialisé ("pushups@4")
+        if row is None and self._materialize_for_id(objective_id):
+            row = cursor.execute(query, (self.user_id, objective_id)).fetchone()
+
+        return self._row_to_objective(row) if row else None
+
+    def search_objectives(self, query: str = "", category: Category | None = None,
+                          frequency: Frequency | None = None, level: int | None = None,
+                          limit: int = 50) -> list[Objective]:
+        """
+        Recherche dans le catalogue
+        - query : mots (préfixes, sans accents : "gain" → Gainage), tous requis
+        - filtres : catégorie, fréquence, accessibles au niveau level
+        - tri par pertinence (bm25), sinon par niveau puis titre
+        Quêtes générées matérialisées d'abord (palier du niveau, sinon tous
+        les paliers) : l'index plein texte ne voit que la table
+        """
+        if level is not None:
+            self.generated_objectives(level)
+        else:
+            with self.batch():
+                for bracket in range(quests.bracket(quests.MAX_LEVEL) + 1):
+                    if bracket not in self._quests["materialized"]:
+                        self._materialize_bracket(bracket)
+
+        filters = ["o.active = 1"]
+        params = []
+        if category is not None:
+            filters.append("o.category = ?")
+            params.append(category.value)
+        if frequency is not None:
+            filters.append("o.frequency = ?")
+            params.append(frequency.value)
+        if level is not None:
+            # quêtes générées : seulement celles du palier du niveau
+            filters.append(
+                "o.min_level <= ? AND (o.template IS NULL OR o.id = o.template || '@' || ?)"
+            )
+            params += [level, quests.bracket(level)]
+
+        terms = query.split()
+        if terms and self.has_fts:
+            match = " ".join('"{}"*'.format(t.replace('"', '""')) for t in terms)
+            sql = """
+            SELECT o.*, NULL AS last_completed FROM objectives_fts f
+            JOIN objectives o ON o.rowid = f.rowid
+            WHERE objectives_fts MATCH ?
+            """ + "".join(f" AND {c}" for c in filters) + """
+            ORDER BY f.rank
+            LIMIT ?
+            """
+            params = [match, *params, limit]
+        else:
+            # repli sans FTS5 : LIKE (sensible aux accents)
+            filters += ["o.title LIKE ?"] * len(terms)
+            params += [f"%{t}%" for t in terms]
+            sql = (
+                "SELECT o.*, NULL AS last_completed FROM objectives o"
+                + " WHERE " + " AND ".join(filters)
+                + " ORDER BY o.min_level, o.title LIMIT ?"
+            )
+            params.append(limit)
+
+        cursor = self.conn.cursor()
+        cursor.execute(sql, params)
+        return [self._row_to_objective(row) for row in cursor.fetchall()]
+
+    def _row_to_objective(self, row) -> Objective:
+        return Objective(
+            id=row["id"],
+            title=row["title"],
+            category=Category(row["category"]),
+            frequency=Frequency(row["frequency"]),
+            min_level=row["min_level"],
+            value=row["value"],
+            last_completed=(
+                date.fromisoformat(row["last_completed"])
+                if row["last_completed"] else None
             )
-        return objectives
+        )
 
     # =========================
     # OBJECTIVE PROGRESS
@@ -320,91 +1010,400 @@ class Storage:
 
         cursor = self.conn.cursor()
         cursor.execute("""
-        INSERT INTO objective_progress (objective_id, last_completed)
-        VALUES (?, ?)
-        ON CONFLICT(objective_id)
+        INSERT INTO objective_progress (user_id, objective_id, last_completed)
+        VALUES (?, ?, ?)
+        ON CONFLICT(user_id, objective_id)
         DO UPDATE SET last_completed = excluded.last_completed
         """, (
+            self.user_id,
             objective.id,
             objective.last_completed.isoformat()
         ))
-        self.conn.commit()
+        self._commit()
+
+    def restore_objective_completion(self, objective_id: str, last_completed: date | None):
+        """
+        Remet la dernière complétion d'un objectif (annulation)
+        None : objectif jamais complété
+        """
+        if last_completed is None:
+            self.conn.execute("""
+            DELETE FROM objective_progress WHERE user_id = ? AND objective_id = ?
+            """, (self.user_id, objective_id))
+        else:
+            self.conn.execute("""
+            UPDATE objective_progress SET last_completed = ?
+            WHERE user_id = ? AND objective_id = ?
+            """, (last_completed.isoformat(), self.user_id, objective_id))
+        self._commit()
+
+    def load_last_completions(self) -> dict:
+        """
+        {objective_id: date} — sert à construire le CompletionIndex
+        """
+        cursor = self.conn.cursor()
+        cursor.execute("""
+        SELECT objective_id, last_completed
+        FROM objective_progress
+        WHERE user_id = ? AND last_completed IS NOT NULL
+        """, (self.user_id,))
+        return {
+            row["objective_id"]: date.fromisoformat(row["last_completed"])
+            for row in cursor.fetchall()
+        }
+
+    def save_completions(self, completions: dict):
+        """
+        Upsert groupé {objective_id: date} (import en masse)
+        Ne recule jamais une date déjà enregistrée
+        """
+        cursor = self.conn.cursor()
+        cursor.executemany("""
+        INSERT INTO objective_progress (user_id, objective_id, last_completed)
+        VALUES (?, ?, ?)
+        ON CONFLICT(user_id, objective_id)
+        DO UPDATE SET last_completed = MAX(last_completed, excluded.last_completed)
+        """, [
+            (self.user_id, objective_id, day.isoformat())
+            for objective_id, day in completions.items()
+        ])
+        self._commit()
+
+    # =========================
+    # HISTORY
+    # =========================
+    def log_history(self, entry: HistoryEntry) -> int:
+        """
+        Retourne l'id de la ligne (annulation : undo_history)
+        """
+        row = (self.user_id, entry.timestamp.isoformat(), entry.action,
+               entry.objective_id, entry.impact)
+        cursor = self.conn.execute("""
+        INSERT INTO history (user_id, timestamp, action, objective_id, impact)
+        VALUES (?, ?, ?, ?, ?)
+        """, row)
+        rollups.record(self.conn, [row])
+        self._commit()
+        return cursor.lastrowid
+
+    def undo_history(self, history_id: int) -> int | None:
+        """
+        Annule une validation par un évènement compensatoire "undo"
+        (même jour et objectif, EXP opposée) : l'historique reste en ajout
+        seul, la sync et l'export transmettent l'annulation comme tout
+        autre évènement ; agrégats mis à jour dans la même transaction
+        Retourne l'id de l'évènement (None : validation introuvable)
+        """
+        row = self.conn.execute("""
+        SELECT timestamp, objective_id, impact FROM history
+        WHERE id = ? AND user_id = ? AND action = 'validate'
+        """, (history_id, self.user_id)).fetchone()
+        if row is None:
+            return None
+
+        timestamp, objective_id, impact = row
+        return self.log_history(HistoryEntry(
+            datetime.fromisoformat(timestamp), "undo", -(impact or 0), objective_id
+        ))
+
+    def validations_on(self, day: date) -> int:
+        """
+        Validations d'un jour (agrégats journaliers)
+        """
+        row = self.conn.execute("""
+        SELECT COALESCE(SUM(validations), 0) FROM rollup_daily
+        WHERE user_id = ? AND day = ?
+        """, (self.user_id, day.isoformat())).fetchone()
+        return row[0]
+
+    def log_history_many(self, entries):
+        """
+        Ajoute des entrées d'historique et met à jour les agrégats
+        journaliers / hebdo dans la même transaction
+        """
+        rows = [
+            (self.user_id, e.timestamp.isoformat(), e.action, e.objective_id, e.impact)
+            for e in entries
+        ]
+        cursor = self.conn.cursor()
+        cursor.executemany("""
+        INSERT INTO history (user_id, timestamp, action, objective_id, impact)
+        VALUES (?, ?, ?, ?, ?)
+        """, rows)
+        rollups.record(self.conn, rows)
+        self._commit()
+
+    def load_history(self, start: date | None = None, end: date | None = None,
+                     archive: bool = True) -> list[HistoryEntry]:
+        """
+        Historique de l'utilisateur, jours start → end inclus, trié
+        - archive : inclut les évènements archivés (seules les archives
+          des années couvertes par la période sont ouvertes)
+        """
+        params = [self.user_id, start.isoformat() if start else ""]
+        until = ""
+        if end is not None:
+            until = "AND timestamp < ?"
+            params.append((end + timedelta(days=1)).isoformat())
+
+        hot = self.conn.execute(f"""
+        SELECT timestamp, action, impact, objective_id FROM history
+        WHERE user_id = ? AND timestamp >= ? {until}
+        ORDER BY timestamp
+        """, params).fetchall()
+        rows = (tuple(r) for r in hot)
+
+        if archive:
+            cold = (
+                (ts, action, impact, objective_id)
+                for _, _, ts, action, objective_id, impact, _, _
+                in HistoryArchive(self.db_path).read(self.user_id, start, end)
+            )
+            rows = heapq.merge(cold, rows, key=lambda r: r[0])
+
+        return [
+            HistoryEntry(datetime.fromisoformat(ts), action, impact, objective_id)
+            for ts, action, impact, objective_id in rows
+        ]
+
+    def daily_activity(self, since: date | None = None) -> list[tuple]:
+        """
+        Agrégats journaliers (graphiques), lus dans rollup_daily
+        Lignes (jour ISO, catégorie | None, validations, EXP), triées par jour
+        - catégorie None : EXP hors validation (import legacy…)
+        """
+        cursor = self.conn.cursor()
+        cursor.execute("""
+        SELECT day, NULLIF(category, ''), SUM(validations), SUM(exp)
+        FROM rollup_daily
+        WHERE user_id = ? AND day >= ?
+        GROUP BY day, category
+        ORDER BY day
+        """, (self.user_id, since.isoformat() if since else ""))
+        return [tuple(row) for row in cursor.fetchall()]
+
+    def validation_days(self) -> list[date]:
+        """
+        Jours avec au moins une validation, triés (archives incluses :
+        lus dans rollup_daily)
+        """
+        return [
+            date.fromisoformat(row[0]) for row in self.conn.execute("""
+            SELECT day FROM rollup_daily
+            WHERE user_id = ? AND objective_id != ''
+            GROUP BY day HAVING SUM(validations) > 0
+            ORDER BY day
+            """, (self.user_id,))
+        ]
+
+    def weekly_activity(self, since: date | None = None) -> list[tuple]:
+        """
+        Agrégats par semaine ISO, lus dans rollup_weekly
+        Lignes (semaine "YYYY-Www", catégorie | None, validations, EXP)
+        """
+        cursor = self.conn.cursor()
+        cursor.execute("""
+        SELECT week, NULLIF(category, ''), SUM(validations), SUM(exp)
+        FROM rollup_weekly
+        WHERE user_id = ? AND week >= ?
+        GROUP BY week, category
+        ORDER BY week
+        """, (self.user_id, rollups.week_key(since) if since else ""))
+        return [tuple(row) for row in cursor.fetchall()]
 
+    def rebuild_rollups(self, workers: int = 1, progress=None) -> int:
+        """
+        Reconstruit les agrégats depuis l'historique (tous les utilisateurs,
+        archives comprises)
+        """
+        archived = (
+            (row[1], row[2], row[3], row[4], row[5])
+            for row in HistoryArchive(self.db_path).read()
+        )
+        with self.batch():
+            return rollups.rebuild(
+                self.conn, self.db_path, workers, progress=progress, archived=archived
+            )
 
     # =========================
-    # DAILY QUESTS
+    # DAILY / WEEKLY QUEST BOARDS
     # =========================
-    def _get_daily_date(self):
+    def get_meta(self, key: str):
         cursor = self.conn.cursor()
         cursor.execute(
-            "SELECT value FROM daily_meta WHERE key = 'date'"
+            "SELECT value FROM daily_meta WHERE key = ?", (key,)
         )
         row = cursor.fetchone()
         return row["value"] if row else None
 
-    def _set_daily_date(self, today):
+    def set_meta(self, key: str, value):
         cursor = self.conn.cursor()
         cursor.execute("""
         INSERT INTO daily_meta (key, value)
-        VALUES ('date', ?)
+        VALUES (?, ?)
         ON CONFLICT(key) DO UPDATE SET value = excluded.value
-        """, (today,))
-        self.conn.commit()
+        """, (key, value))
+        self._commit()
 
-    def generate_daily_pool(self, level: int, count: int = 3):
-        today = date.today().isoformat()
-        if self._get_daily_date() == today:
-            return
+    def get_user_meta(self, key: str):
+        cursor = self.conn.cursor()
+        cursor.execute(
+            "SELECT value FROM user_meta WHERE user_id = ? AND key = ?",
+            (self.user_id, key)
+        )
+        row = cursor.fetchone()
+        return row["value"] if row else None
+
+    def set_user_meta(self, key: str, value):
+        cursor = self.conn.cursor()
+        cursor.execute("""
+        INSERT INTO user_meta (user_id, key, value)
+        VALUES (?, ?, ?)
+        ON CONFLICT(user_id, key) DO UPDATE SET value = excluded.value
+        """, (self.user_id, key, value))
+        self._commit()
+
+    def generate_pool(self, board: str, frequency: Frequency, level: int,
+                      period: str, meta_key: str, count: int) -> bool:
+        """
+        Tire le pool d'un tableau de quêtes pour la période donnée
+        - ne fait rien si la période est déjà tirée (clé meta_key de user_meta)
+        - retourne True si un nouveau pool a été tiré
+        """
+        if self.get_user_meta(meta_key) == period:
+            return False
 
         cursor = self.conn.cursor()
-        cursor.execute("DELETE FROM daily_objectives")
+        cursor.execute(
+            "DELETE FROM daily_objectives WHERE user_id = ? AND board = ?",
+            (self.user_id, board)
+        )
 
         cursor.execute("""
         SELECT id FROM objectives
-        WHERE min_level <= ?
-        """, (level,))
+        WHERE min_level <= ? AND frequency = ? AND active = 1 AND template IS NULL
+        """, (level, frequency.value))
         ids = [r["id"] for r in cursor.fetchall()]
 
-        if not ids:
-            return
+        # + quêtes générées du palier (cibles / EXP à l'échelle du niveau)
+        ids += [
+            row[0] for row in self.generated_objectives(level)
+            if row[3] == frequency.value and row[4] <= level
+        ]
 
-        selected = random.sample(ids, min(count, len(ids)))
+        selected = self.rng.sample(ids, min(count, len(ids)))
 
-        for oid in selected:
-            cursor.execute(
-                "INSERT INTO daily_objectives (objective_id) VALUES (?)",
-                (oid,)
-            )
+        cursor.executemany(
+            "INSERT INTO daily_objectives (user_id, objective_id, board) VALUES (?, ?, ?)",
+            [(self.user_id, oid, board) for oid in selected]
+        )
 
-        self._set_daily_date(today)
-        self.conn.commit()
+        self.set_user_meta(meta_key, period)
+        self._commit()
+        return True
 
-    def load_daily_objectives(self):
+    def load_board_objectives(self, board: str):
         cursor = self.conn.cursor()
         cursor.execute("""
         SELECT o.*
         FROM objectives o
         JOIN daily_objectives d
         ON o.id = d.objective_id
-        """)
+        WHERE d.user_id = ? AND d.board = ?
+        """, (self.user_id, board))
         return cursor.fetchall()
 
-    def complete_daily_objective(self, objective_id: str):
+    def generate_daily_pool(self, level: int, count: int = 3):
+        self.generate_pool(
+            "daily", Frequency.DAILY, level,
+            self.clock.today().isoformat(), "date", count
+        )
+
+    def load_daily_objectives(self):
+        return self.load_board_objectives("daily")
+
+    def complete_daily_objective(self, objective_id: str) -> list[str]:
+        """
+        Retire une quête validée de ses tableaux, retourne ces tableaux
+        """
         cursor = self.conn.cursor()
+        boards = [r[0] for r in cursor.execute(
+            "SELECT board FROM daily_objectives WHERE user_id = ? AND objective_id = ?",
+            (self.user_id, objective_id)
+        )]
         cursor.execute(
-            "DELETE FROM daily_objectives WHERE objective_id = ?",
-            (objective_id,)
+            "DELETE FROM daily_objectives WHERE user_id = ? AND objective_id = ?",
+            (self.user_id, objective_id)
+        )
+        self._commit()
+        return boards
+
+    def restore_board_objective(self, objective_id: str, boards: list[str]):
+        """
+        Remet une quête dans ses tableaux (annulation d'une validation)
+        """
+        self.conn.executemany(
+            "INSERT INTO daily_objectives (user_id, objective_id, board) VALUES (?, ?, ?)",
+            [(self.user_id, objective_id, board) for board in boards]
         )
-        self.conn.commit()
+        self._commit()
     
+    # =========================
+    # TEAMS
+    # =========================
+    def create_team(self, name: str, join: bool = True) -> int:
+        """
+        Nouvelle équipe (l'utilisateur courant y entre sauf join=False)
+        """
+        team_id = teams.create_team(self.conn, name, self.clock.today())
+        if join:
+            teams.join(self.conn, team_id, self.user_id, self.clock.today())
+        self._commit()
+        return team_id
+
+    def join_team(self, team_id: int) -> bool:
+        joined = teams.join(self.conn, team_id, self.user_id, self.clock.today())
+        self._commit()
+        return joined
+
+    def leave_team(self, team_id: int) -> bool:
+        left = teams.leave(self.conn, team_id, self.user_id, self.clock.today())
+        self._commit()
+        return left
+
+    def load_teams(self) -> list[tuple]:
+        return teams.user_teams(self.conn, self.user_id, self.clock.today())
+
+    def team_members(self, team_id: int) -> list[int]:
+        return teams.members(self.conn, team_id, self.clock.today())
+
+    def team_totals(self, team_id: int, week: bool = False,
+                    quest: str = teams.ANY_QUEST) -> teams.TeamTotals:
+        """
+        Compteurs maintenus (O(1)) : depuis la création, ou semaine en cours
+        quest : "pushups" (modèle), "lunges_20" (objectif)… ; "" = toutes
+        """
+        period = rollups.week_key(self.clock.today()) if week else teams.ALL_TIME
+        return teams.totals(self.conn, team_id, period, quest)
+
+    def team_board(self, team_id: int) -> list[teams.TeamQuest]:
+        board = teams.board(self.conn, team_id, self.clock.today())
+        self._commit()
+        return board
+
+    def check_teams(self, repair: bool = False, progress=None) -> dict:
+        report = teams.check(self.conn, repair=repair, progress=progress)
+        self._commit()
+        return report
+
     # =========================
     # ACHIEVEMENTS
     # =========================
     def is_achievement_unlocked(self, achievement_id: int) -> bool:
         cursor = self.conn.cursor()
         cursor.execute(
-            "SELECT unlocked FROM achievements WHERE id = ?",
-            (achievement_id,)
+            "SELECT unlocked FROM achievements WHERE user_id = ? AND id = ?",
+            (self.user_id, achievement_id)
         )
         row = cursor.fetchone()
         return bool(row and row["unlocked"])
@@ -412,9 +1411,19 @@ class Storage:
     def unlock_achievement(self, achievement_id: int):
         cursor = self.conn.cursor()
         cursor.execute("""
-        INSERT INTO achievements (id, unlocked)
-        VALUES (?, 1)
-        ON CONFLICT(id)
+        INSERT INTO achievements (user_id, id, unlocked)
+        VALUES (?, ?, 1)
+        ON CONFLICT(user_id, id)
         DO UPDATE SET unlocked = 1
-        """, (achievement_id,))
-        self.conn.commit()
+        """, (self.user_id, achievement_id))
+        self._commit()
+
+    def lock_achievement(self, achievement_id: int):
+        """
+        Annulation : condition de déblocage plus remplie
+        """
+        self.conn.execute(
+            "UPDATE achievements SET unlocked = 0 WHERE user_id = ? AND id = ?",
+            (self.user_id, achievement_id)
+        )
+        self._commit()
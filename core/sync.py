@@ -0,0 +1,533 @@
+import json
+import uuid
+import zlib
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from urllib.request import Request, urlopen
+
+from core import rollups
+from core.archive import ARCHIVED_HISTORY, HistoryArchive
+
+
+# lignes par requête (push comme pull)
+BATCH_LIMIT = 5000
+
+# source des changements appliqués depuis le serveur (côté client)
+REMOTE = "remote"
+
+# compteurs additifs : par appareil, une part gagnée et une part annulée
+# (préfixe UNDONE), croissantes toutes les deux ; total = gains - annulations
+COUNTER_FIELDS = ("total_exp", "total_validations")
+UNDONE = "undone:"
+
+# champs "dernier jour gagnant" (comparés avec last_validation_date en tête)
+STREAK_FIELDS = ("last_validation_date", "current_streak", "validations_today",
+                 "combo_validations")
+
+
+# =========================
+# SCHÉMA
+# =========================
+# table → (clé dans le journal, évènements suivis)
+# history : id local, dédupliqué à la réception par (origin, origin_id)
+_TRACKED = {
+    "history": ("json_array(NEW.id)", "INSERT"),
+    "achievements": ("json_array(NEW.user_id, NEW.id)", "INSERT OR UPDATE"),
+    "objective_progress": ("json_array(NEW.user_id, NEW.objective_id)", "INSERT OR UPDATE"),
+    "sync_counters": ("json_array(NEW.user_id, NEW.device, NEW.field)", "INSERT OR UPDATE"),
+    "stats": ("json_array(NEW.id)", "UPDATE"),
+}
+
+
+def create_tables(cursor) -> bool:
+    """
+    Journal des changements (une ligne par clé, seq croissante)
+    - alimenté par triggers : aucune modification du code d'écriture
+    - device : appareil d'origine (NULL = changement local)
+    Retourne True si le journal vient d'être créé
+    """
+    exists = cursor.execute("""
+    SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'sync_changes'
+    """).fetchone()
+
+    history_columns = [r[1] for r in cursor.execute("PRAGMA table_info(history)")]
+    if "origin" not in history_columns:
+        cursor.execute("ALTER TABLE history ADD COLUMN origin TEXT")
+        cursor.execute("ALTER TABLE history ADD COLUMN origin_id INTEGER")
+    cursor.execute("""
+    CREATE UNIQUE INDEX IF NOT EXISTS idx_history_origin
+    ON history (origin, origin_id) WHERE origin IS NOT NULL
+    """)
+
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS sync_changes (
+        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+        tbl TEXT NOT NULL,
+        key TEXT NOT NULL,
+        device TEXT,
+        UNIQUE (tbl, key)
+    )
+    """)
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS sync_state (
+        key TEXT PRIMARY KEY,
+        value TEXT
+    )
+    """)
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS sync_counters (
+        user_id INTEGER NOT NULL,
+        device TEXT NOT NULL,
+        field TEXT NOT NULL,
+        value INTEGER NOT NULL,
+        PRIMARY KEY (user_id, device, field)
+    )
+    """)
+
+    source = "(SELECT value FROM sync_state WHERE key = 'source')"
+    for table, (key, events) in _TRACKED.items():
+        for event in events.split(" OR "):
+            when = ""
+            if table == "stats":
+                # save_stats réécrit toutes les colonnes : seulement si le streak bouge
+                when = "WHEN " + " OR ".join(
+                    f"OLD.{c} IS NOT NEW.{c}" for c in (*STREAK_FIELDS, "best_streak")
+                )
+            cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS sync_{table}_{event.lower()}
+            AFTER {event} ON {table} {when}
+            BEGIN
+                DELETE FROM sync_changes WHERE tbl = '{table}' AND key = {key};
+                INSERT INTO sync_changes (tbl, key, device)
+                VALUES ('{table}', {key}, {source});
+            END
+            """)
+
+    if exists is None:
+        # données antérieures au journal : toutes à envoyer au premier sync
+        for table, (key, _) in _TRACKED.items():
+            cursor.execute(f"""
+            INSERT OR IGNORE INTO sync_changes (tbl, key, device)
+            SELECT '{table}', {key.replace("NEW.", "")}, NULL FROM {table}
+            """)
+    return exists is None
+
+
+# =========================
+# MOTEUR DE SYNC (commun client / serveur)
+# =========================
+class SyncEngine:
+    """
+    Collecte et fusion des deltas sur une DB Storage
+    Fusion déterministe (ordre d'arrivée indifférent) :
+    - compteurs (EXP, validations) : gains et annulations comptés à part
+      par appareil, fusion max de chacun, total = somme des gains - somme
+      des annulations → aucun gain perdu entre deux appareils hors ligne,
+      une annulation (undo) ne revient pas à la fusion suivante
+    - achievements : union (unlocked = max)
+    - progression des objectifs : date max
+    - historique : union (clé origine + id d'origine)
+    - streak : l'état du dernier jour validé gagne, best_streak = max
+    """
+
+    def __init__(self, storage):
+        self.storage = storage
+        self.conn = storage.conn
+        self.device_id = storage.get_meta("device_id")
+        if self.device_id is None:
+            self.device_id = uuid.uuid4().hex
+            storage.set_meta("device_id", self.device_id)
+
+    # -------------------------
+    # COLLECTE
+    # -------------------------
+    def snapshot_counters(self, user_ids=None):
+        """
+        Part de cet appareil dans chaque compteur :
+        total local - parts connues des autres appareils
+        Part en hausse → gains, en baisse (annulation) → annulations
+        user_ids : limite aux utilisateurs donnés (tous par défaut)
+        """
+        users, params = "", []
+        if user_ids is not None:
+            params = list(user_ids)
+            if not params:
+                return
+            users = f"IN ({','.join('?' * len(params))})"
+        rows = self.conn.execute(f"""
+        SELECT id, {", ".join(COUNTER_FIELDS)} FROM stats
+        {f"WHERE id {users}" if users else ""}
+        """, params).fetchall()
+
+        others, own = {}, {}
+        for user_id, device, field, value in self.conn.execute(f"""
+        SELECT user_id, device, field, value FROM sync_counters
+        {f"WHERE user_id {users}" if users else ""}
+        """, params):
+            if device == self.device_id:
+                own[(user_id, field)] = value
+            elif field.startswith(UNDONE):
+                key = (user_id, field[len(UNDONE):])
+                others[key] = others.get(key, 0) - value
+            else:
+                others[(user_id, field)] = others.get((user_id, field), 0) + value
+
+        updates = []
+        for row in rows:
+            for field, value in zip(COUNTER_FIELDS, row[1:]):
+                share = value - others.get((row[0], field), 0)
+                gained = own.get((row[0], field), 0)
+                undone = own.get((row[0], UNDONE + field), 0)
+                if share > gained - undone:
+                    updates.append((row[0], field, share + undone))
+                elif share < gained - undone:
+                    updates.append((row[0], UNDONE + field, gained - share))
+
+        self.conn.executemany("""
+        INSERT INTO sync_counters (user_id, device, field, value) VALUES (?, ?, ?, ?)
+        ON CONFLICT(user_id, device, field) DO UPDATE SET value = excluded.value
+        WHERE excluded.value > sync_counters.value
+        """, [
+            (user_id, self.device_id, field, value) for user_id, field, value in updates
+        ])
+
+    def collect(self, since: int, limit: int = BATCH_LIMIT,
+                local_only: bool = False, exclude_device: str | None = None):
+        """
+        Changements de seq > since, retourne (changes, cursor, more)
+        changes : {table: [ligne, ...]} (colonnes : voir _read_row)
+        """
+        filters, params = ["seq > ?"], [since]
+        if local_only:
+            filters.append("device IS NULL")
+        if exclude_device is not None:
+            filters.append("(device IS NULL OR device != ?)")
+            params.append(exclude_device)
+
+        entries = self.conn.execute(f"""
+        SELECT seq, tbl, key FROM sync_changes
+        WHERE {" AND ".join(filters)}
+        ORDER BY seq LIMIT ?
+        """, (*params, limit)).fetchall()
+
+        more = len(entries) == limit
+        if more:
+            cursor = entries[-1][0]
+        else:
+            # rien d'autre à envoyer : curseur au bout du journal
+            cursor = max(since, self.conn.execute(
+                "SELECT COALESCE(MAX(seq), 0) FROM sync_changes"
+            ).fetchone()[0])
+
+        keys = {}
+        for _, table, key in entries:
+            keys.setdefault(table, []).append(json.loads(key))
+
+        changes = {}
+        for table, table_keys in keys.items():
+            if table == ARCHIVED_HISTORY:
+                # lignes compactées avant d'avoir été synchronisées
+                rows = self._read_archived(table_keys)
+                table = "history"
+            else:
+                rows = [self._read_row(table, k) for k in table_keys]
+            changes.setdefault(table, []).extend(r for r in rows if r is not None)
+        return changes, cursor, more
+
+    def _history_row(self, origin, origin_id, local_id, *rest) -> list:
+        # ligne locale : l'appareil courant en est l'origine
+        return [origin or self.device_id, origin_id or local_id, *rest]
+
+    def _read_archived(self, keys: list) -> list:
+        found = HistoryArchive(self.storage.db_path).lookup(keys)
+        return [
+            self._history_row(origin, origin_id, event_id,
+                              user_id, ts, action, objective_id, impact)
+            for event_id, user_id, ts, action, objective_id, impact, origin, origin_id
+            in (found[key[0]] for key in keys if key[0] in found)
+        ]
+
+    def _read_row(self, table: str, key: list):
+        if table == "history":
+            row = self.conn.execute("""
+            SELECT origin, origin_id, id, user_id, timestamp, action, objective_id, impact
+            FROM history WHERE id = ?
+            """, key).fetchone()
+            if row is None:
+                return None
+            return self._history_row(*row)
+
+        if table == "stats":
+            row = self.conn.execute(f"""
+            SELECT id, {", ".join(STREAK_FIELDS)}, best_streak FROM stats WHERE id = ?
+            """, key).fetchone()
+        elif table == "achievements":
+            row = self.conn.execute("""
+            SELECT user_id, id, unlocked FROM achievements WHERE user_id = ? AND id = ?
+            """, key).fetchone()
+        elif table == "objective_progress":
+            row = self.conn.execute("""
+            SELECT user_id, objective_id, last_completed FROM objective_progress
+            WHERE user_id = ? AND objective_id = ?
+            """, key).fetchone()
+        else:
+            row = self.conn.execute("""
+            SELECT user_id, device, field, value FROM sync_counters
+            WHERE user_id = ? AND device = ? AND field = ?
+            """, key).fetchone()
+        return list(row) if row is not None else None
+
+    # -------------------------
+    # FUSION
+    # -------------------------
+    def apply(self, changes: dict, source: str):
+        """
+        Fusionne des changements reçus (dans la transaction de l'appelant)
+        source : appareil d'origine, enregistré dans le journal pour ne
+        pas lui renvoyer ses propres changements
+        """
+        counters = [
+            row for row in changes.get("sync_counters", [])
+            if row[2].removeprefix(UNDONE) in COUNTER_FIELDS
+        ]
+        touched_users = {row[0] for row in counters}
+        # part locale pas encore comptée (changement local, avant la source
+        # distante) : les totaux recalculés ensuite la contiennent
+        self.snapshot_counters(touched_users)
+
+        self._set_source(source)
+        try:
+            received = []
+            for origin, origin_id, user_id, ts, action, objective_id, impact in changes.get("history", []):
+                if origin == self.device_id:
+                    continue  # notre propre ligne, revenue par un autre appareil
+                self._ensure_user(user_id)
+                cursor = self.conn.execute("""
+                INSERT OR IGNORE INTO history
+                (user_id, timestamp, action, objective_id, impact, origin, origin_id)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                """, (user_id, ts, action, objective_id, impact, origin, origin_id))
+                if cursor.rowcount:
+                    received.append((user_id, ts, action, objective_id, impact))
+            # quêtes générées pas encore matérialisées ici (catégorie des agrégats)
+            for objective_id in {row[3] for row in received if row[3]}:
+                self.storage.get_objective(objective_id)
+            rollups.record(self.conn, received)
+
+            for user_id, achievement_id, unlocked in changes.get("achievements", []):
+                self.conn.execute("""
+                INSERT INTO achievements (user_id, id, unlocked) VALUES (?, ?, ?)
+                ON CONFLICT(user_id, id) DO UPDATE SET unlocked = excluded.unlocked
+                WHERE excluded.unlocked > achievements.unlocked
+                """, (user_id, achievement_id, unlocked))
+
+            for user_id, objective_id, last_completed in changes.get("objective_progress", []):
+                self.conn.execute("""
+                INSERT INTO objective_progress (user_id, objective_id, last_completed)
+                VALUES (?, ?, ?)
+                ON CONFLICT(user_id, objective_id) DO UPDATE
+                SET last_completed = excluded.last_completed
+                WHERE excluded.last_completed > COALESCE(objective_progress.last_completed, '')
+                """, (user_id, objective_id, last_completed))
+
+            for user_id, device, field, value in counters:
+                self.conn.execute("""
+                INSERT INTO sync_counters (user_id, device, field, value) VALUES (?, ?, ?, ?)
+                ON CONFLICT(user_id, device, field) DO UPDATE SET value = excluded.value
+                WHERE excluded.value > sync_counters.value
+                """, (user_id, device, field, value))
+
+            for row in changes.get("stats", []):
+                self._merge_streak(row)
+
+            for user_id in touched_users:
+                self._apply_counters(user_id)
+        finally:
+            self._set_source(None)
+            # stats écrites directement : Storage ne doit plus s'y fier
+            self.storage.discard_caches()
+
+    def _merge_streak(self, row):
+        user_id, *remote = row
+        self._ensure_user(user_id)
+        local = list(self.conn.execute(f"""
+        SELECT {", ".join(STREAK_FIELDS)}, best_streak FROM stats WHERE id = ?
+        """, (user_id,)).fetchone())
+
+        def rank(values):
+            # dernier jour validé d'abord (NULL = jamais), puis streak, etc.
+            return (values[0] or "", *values[1:-1])
+
+        winner = remote if rank(remote) > rank(local) else local
+        merged = [*winner[:-1], max(local[-1] or 0, remote[-1] or 0)]
+
+        if merged != local:
+            self.conn.execute(f"""
+            UPDATE stats SET {", ".join(f"{c} = ?" for c in STREAK_FIELDS)}, best_streak = ?
+            WHERE id = ?
+            """, (*merged, user_id))
+        if merged != remote:
+            # fusion ≠ valeur reçue : l'expéditeur doit aussi recevoir le résultat
+            self.conn.execute("""
+            INSERT OR REPLACE INTO sync_changes (tbl, key, device) VALUES ('stats', ?, NULL)
+            """, (json.dumps([user_id]),))
+
+    def _apply_counters(self, user_id: int):
+        totals = dict(self.conn.execute("""
+        SELECT field, SUM(value) FROM sync_counters WHERE user_id = ? GROUP BY field
+        """, (user_id,)).fetchall())
+
+        def total(field):
+            return max(0, totals.get(field, 0) - totals.get(UNDONE + field, 0))
+
+        view = self.storage.for_user(user_id)
+        stats = view.load_stats()
+        stats.total_exp = total("total_exp")
+        stats.total_validations = total("total_validations")
+        # EXP synchronisée : pas gagnée cette semaine sur cet appareil
+        view.save_stats(stats, track_weekly=False)
+
+    def _ensure_user(self, user_id: int):
+        self.conn.execute("INSERT OR IGNORE INTO stats (id) VALUES (?)", (user_id,))
+
+    def _set_source(self, source):
+        self.conn.execute("""
+        INSERT INTO sync_state (key, value) VALUES ('source', ?)
+        ON CONFLICT(key) DO UPDATE SET value = excluded.value
+        """, (source,))
+
+
+# =========================
+# TRANSPORT (JSON compressé)
+# =========================
+def encode(payload: dict) -> bytes:
+    return zlib.compress(json.dumps(payload, separators=(",", ":")).encode("utf-8"), 6)
+
+
+def decode(body: bytes) -> dict:
+    return json.loads(zlib.decompress(body).decode("utf-8"))
+
+
+# =========================
+# CLIENT
+# =========================
+class SyncClient:
+    """
+    Synchronisation d'un appareil avec un serveur
+    - push : changements locaux depuis le curseur "sync:push"
+    - pull : changements des autres appareils depuis "sync:pull"
+    - un échange = une requête HTTP, lots de BATCH_LIMIT lignes
+    """
+
+    def __init__(self, storage, url: str, transport=None):
+        self.storage = storage
+        self.engine = SyncEngine(storage)
+        self.url = url.rstrip("/") + "/sync"
+        self.transport = transport or self._http
+
+    def sync(self) -> dict:
+        report = {"pushed": 0, "pulled": 0, "requests": 0, "bytes_sent": 0,
+                  "bytes_received": 0}
+
+        with self.storage.batch():
+            self.engine.snapshot_counters()
+
+        more_push = more_pull = True
+        while more_push or more_pull:
+            push_cursor = int(self.storage.get_meta("sync:push") or 0)
+            pull_cursor = int(self.storage.get_meta("sync:pull") or 0)
+
+            changes, next_push, more_push = (
+                self.engine.collect(push_cursor, local_only=True)
+                if more_push else ({}, push_cursor, False)
+            )
+            body = encode({
+                "device": self.engine.device_id,
+                "changes": changes,
+                "pull": pull_cursor if more_pull else None,
+            })
+            response = decode(self.transport(body, report))
+
+            with self.storage.batch():
+                self.engine.apply(response["changes"], REMOTE)
+                self.storage.set_meta("sync:push", next_push)
+                if response["cursor"] is not None:
+                    self.storage.set_meta("sync:pull", response["cursor"])
+
+            report["pushed"] += sum(len(rows) for rows in changes.values())
+            report["pulled"] += sum(len(rows) for rows in response["changes"].values())
+            more_pull = bool(response["more"])
+
+        return report
+
+    def _http(self, body: bytes, report: dict) -> bytes:
+        request = Request(self.url, data=body, method="POST", headers={
+            "Content-Type": "application/octet-stream",
+        })
+        with urlopen(request, timeout=30) as response:
+            data = response.read()
+
+        report["requests"] += 1
+        report["bytes_sent"] += len(body)
+        report["bytes_received"] += len(data)
+        return data
+
+
+# =========================
+# SERVEUR DE RÉFÉRENCE (tests locaux)
+# =========================
+def handle_sync(storage, engine: SyncEngine, body: bytes) -> bytes:
+    """
+    Un échange : fusion du push puis delta pour l'appareil
+    (hors ses propres changements)
+    """
+    request = decode(body)
+    device = request["device"]
+
+    with storage.batch():
+        engine.apply(request.get("changes", {}), device)
+
+    if request.get("pull") is None:
+        return encode({"changes": {}, "cursor": None, "more": False})
+
+    changes, cursor, more = engine.collect(int(request["pull"]), exclude_device=device)
+    return encode({"changes": changes, "cursor": cursor, "more": more})
+
+
+def make_server(db_path: str, host: str = "127.0.0.1", port: int = 8766) -> HTTPServer:
+    """
+    Serveur HTTP minimal (mono-thread : une seule connexion SQLite)
+    POST /sync : corps et réponse en JSON compressé (zlib)
+    """
+    from core.storage import Storage
+
+    # ouverte dans le thread qui sert les requêtes (sqlite3 : un thread)
+    state = {}
+
+    def engine() -> SyncEngine:
+        if "engine" not in state:
+            storage = Storage(db_path)
+            storage.seed_objectives()
+            state["engine"] = SyncEngine(storage)
+        return state["engine"]
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            if self.path != "/sync":
+                self.send_error(404)
+                return
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            try:
+                data = handle_sync(engine().storage, engine(), body)
+            except (ValueError, KeyError, zlib.error) as e:
+                self.send_error(400, str(e))
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "application/octet-stream")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass  # silencieux (tests)
+
+    return HTTPServer((host, port), Handler)
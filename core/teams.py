@@ -0,0 +1,444 @@
+import random
+from dataclasses import dataclass
+from datetime import date, timedelta
+
+from core import quests
+from core import rollups
+from core.stats import Stats
+
+
+# période des compteurs "depuis la création" (sinon semaine ISO)
+ALL_TIME = "all"
+
+# toutes quêtes confondues (EXP hors validation comprise)
+ANY_QUEST = ""
+
+# quêtes d'équipe tirées par semaine
+BOARD_SIZE = 3
+
+# validations attendues par membre et par semaine pour une quête d'équipe
+QUEST_DAYS = 5
+
+# équipes vérifiées par lot (check)
+CHECK_BATCH = 200
+
+
+@dataclass
+class TeamTotals:
+    """
+    Compteurs d'une équipe (période, quête)
+    - amount : quantité dans l'unité de la quête (pompes, secondes…),
+      quêtes générées seulement (cible du palier validé)
+    """
+    validations: int = 0
+    exp: int = 0
+    amount: int = 0
+
+
+@dataclass
+class TeamQuest:
+    """
+    Quête du tableau d'équipe de la semaine
+    - measure : "amount" (quête générée) ou "validations"
+    """
+    quest: str
+    title: str
+    measure: str
+    target: int
+    progress: int = 0
+
+    @property
+    def done(self) -> bool:
+        return self.progress >= self.target
+
+
+def create_tables(cursor):
+    """
+    Équipes
+    - team_members : une ligne par période d'appartenance, au jour près
+      (les validations comptent pour l'équipe de joined_on à left_on exclu)
+    - team_counters : agrégats par (équipe, période, quête), tenus à jour à
+      chaque validation d'un membre (mêmes deltas que rollup_daily)
+    - team_quests : tableau d'équipe, tiré une fois par semaine ISO
+    """
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS teams (
+        id INTEGER PRIMARY KEY,
+        name TEXT NOT NULL UNIQUE,
+        created_on TEXT NOT NULL
+    )
+    """)
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS team_members (
+        team_id INTEGER NOT NULL,
+        user_id INTEGER NOT NULL,
+        joined_on TEXT NOT NULL,
+        left_on TEXT,
+        PRIMARY KEY (team_id, user_id, joined_on)
+    )
+    """)
+    cursor.execute("""
+    CREATE INDEX IF NOT EXISTS idx_team_members_user
+    ON team_members (user_id)
+    """)
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS team_counters (
+        team_id INTEGER NOT NULL,
+        period TEXT NOT NULL,
+        quest TEXT NOT NULL,
+        validations INTEGER NOT NULL DEFAULT 0,
+        exp INTEGER NOT NULL DEFAULT 0,
+        amount INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (team_id, period, quest)
+    ) WITHOUT ROWID
+    """)
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS team_quests (
+        team_id INTEGER NOT NULL,
+        week TEXT NOT NULL,
+        quest TEXT NOT NULL,
+        title TEXT NOT NULL,
+        measure TEXT NOT NULL,
+        target INTEGER NOT NULL,
+        PRIMARY KEY (team_id, week, quest)
+    ) WITHOUT ROWID
+    """)
+
+
+def quest_key(objective_id: str, template: str | None) -> str:
+    """
+    Quête comptée pour l'équipe : le modèle pour une quête générée
+    ("pushups@3" → "pushups"), sinon l'objectif
+    """
+    return template or objective_id
+
+
+# =========================
+# MEMBRES
+# =========================
+def create_team(conn, name: str, day: date) -> int:
+    cursor = conn.execute(
+        "INSERT INTO teams (name, created_on) VALUES (?, ?)", (name, day.isoformat())
+    )
+    return cursor.lastrowid
+
+
+def join(conn, team_id: int, user_id: int, day: date) -> bool:
+    """
+    Ajoute user_id à l'équipe à partir de day (validations du jour comprises)
+    Retourne False si déjà membre
+    """
+    current = conn.execute("""
+    SELECT joined_on, left_on FROM team_members
+    WHERE team_id = ? AND user_id = ? AND (left_on IS NULL OR left_on > ?)
+    """, (team_id, user_id, day.isoformat())).fetchone()
+    if current is not None:
+        if current[1] is None:
+            return False
+        # départ le jour même : la période en cours reprend
+        conn.execute("""
+        UPDATE team_members SET left_on = NULL
+        WHERE team_id = ? AND user_id = ? AND joined_on = ?
+        """, (team_id, user_id, current[0]))
+        return True
+
+    conn.execute("""
+    INSERT INTO team_members (team_id, user_id, joined_on) VALUES (?, ?, ?)
+    """, (team_id, user_id, day.isoformat()))
+
+    # validations déjà faites depuis day : comptées dès l'arrivée
+    daily = {
+        (user_id, row[0], row[1]): [row[2], row[3]]
+        for row in conn.execute("""
+        SELECT day, objective_id, validations, exp FROM rollup_daily
+        WHERE user_id = ? AND day >= ?
+        """, (user_id, day.isoformat()))
+    }
+    _apply(conn, daily, {user_id: [(team_id, day.isoformat(), None)]})
+    return True
+
+
+def leave(conn, team_id: int, user_id: int, day: date) -> bool:
+    """
+    Retire user_id de l'équipe ; le jour du départ compte encore
+    """
+    cursor = conn.execute("""
+    UPDATE team_members SET left_on = ?
+    WHERE team_id = ? AND user_id = ? AND left_on IS NULL
+    """, ((day + timedelta(days=1)).isoformat(), team_id, user_id))
+    return cursor.rowcount > 0
+
+
+def members(conn, team_id: int, day: date) -> list[int]:
+    return [r[0] for r in conn.execute("""
+    SELECT DISTINCT user_id FROM team_members
+    WHERE team_id = ? AND joined_on <= ? AND (left_on IS NULL OR left_on > ?)
+    ORDER BY user_id
+    """, (team_id, day.isoformat(), day.isoformat()))]
+
+
+def user_teams(conn, user_id: int, day: date) -> list[tuple]:
+    """
+    Équipes actuelles de user_id : [(id, nom)]
+    """
+    return [tuple(r) for r in conn.execute("""
+    SELECT DISTINCT t.id, t.name FROM teams t
+    JOIN team_members m ON m.team_id = t.id
+    WHERE m.user_id = ? AND m.joined_on <= ? AND (m.left_on IS NULL OR m.left_on > ?)
+    ORDER BY t.id
+    """, (user_id, day.isoformat(), day.isoformat()))]
+
+
+# =========================
+# COMPTEURS
+# =========================
+def record(conn, daily: dict):
+    """
+    Répercute des deltas journaliers {(user_id, jour, objectif): [validations, EXP]}
+    (ceux de rollups.record, négatifs pour une suppression) sur les équipes
+    des membres concernés ; une requête indexée si personne n'est en équipe
+    """
+    if not daily:
+        return
+    users = sorted({key[0] for key in daily})
+    memberships = {}
+    for i in range(0, len(users), 500):
+        chunk = users[i:i + 500]
+        marks = ",".join("?" * len(chunk))
+        for team_id, user_id, joined_on, left_on in conn.execute(f"""
+        SELECT team_id, user_id, joined_on, left_on FROM team_members
+        WHERE user_id IN ({marks})
+        """, chunk):
+            memberships.setdefault(user_id, []).append((team_id, joined_on, left_on))
+    if memberships:
+        _apply(conn, daily, memberships)
+
+
+def totals(conn, team_id: int, period: str = ALL_TIME,
+           quest: str = ANY_QUEST) -> TeamTotals:
+    """
+    Lecture O(1) d'un compteur (period : ALL_TIME ou semaine ISO)
+    """
+    row = conn.execute("""
+    SELECT validations, exp, amount FROM team_counters
+    WHERE team_id = ? AND period = ? AND quest = ?
+    """, (team_id, period, quest)).fetchone()
+    return TeamTotals(*row) if row is not None else TeamTotals()
+
+
+def _apply(conn, daily: dict, memberships: dict):
+    info = _quest_info(conn, {
+        key[2] for key in daily if key[0] in memberships
+    })
+    counters = {}
+    for (user_id, day, objective_id), (validations, exp) in daily.items():
+        for team_id, joined_on, left_on in memberships.get(user_id, ()):
+            if day < joined_on or (left_on is not None and day >= left_on):
+                continue
+            _accumulate(counters, team_id, day, objective_id, validations, exp, info)
+    _write(conn, counters, upsert=True)
+
+
+def _accumulate(counters: dict, team_id: int, day: str, objective_id: str,
+                validations: int, exp: int, info: dict):
+    quest, unit = info.get(objective_id, (objective_id, 0))
+    week = rollups.week_key(date.fromisoformat(day))
+    for period in (week, ALL_TIME):
+        for key in {ANY_QUEST, quest}:
+            counts = counters.setdefault((team_id, period, key), [0, 0, 0])
+            counts[0] += validations
+            counts[1] += exp
+            counts[2] += validations * unit
+
+
+def _templates(conn) -> dict:
+    cursor = conn.execute("SELECT * FROM quest_templates")
+    names = [column[0] for column in cursor.description]
+    return {
+        template.id: template
+        for template in (quests.template_from_row(dict(zip(names, row))) for row in cursor)
+    }
+
+
+def _quest_info(conn, objective_ids) -> dict:
+    """
+    {objectif: (quête, quantité par validation)}
+    Quantité : cible du palier pour une quête générée, 0 sinon
+    """
+    ids = sorted(oid for oid in objective_ids if oid != rollups.NONE)
+    info = {}
+    templates = None
+    for i in range(0, len(ids), 500):
+        chunk = ids[i:i + 500]
+        marks = ",".join("?" * len(chunk))
+        for objective_id, template_id in conn.execute(
+            f"SELECT id, template FROM objectives WHERE id IN ({marks})", chunk
+        ):
+            unit = 0
+            if template_id:
+                if templates is None:
+                    templates = _templates(conn)
+                template = templates.get(template_id)
+                bracket = objective_id.rpartition("@")[2]
+                if template is not None and bracket.isdigit():
+                    unit = template.target(quests.bracket_level(int(bracket)))
+            info[objective_id] = (quest_key(objective_id, template_id), unit)
+    return info
+
+
+def _write(conn, counters: dict, upsert: bool):
+    if not counters:
+        return
+    conflict = """
+    ON CONFLICT(team_id, period, quest) DO UPDATE SET
+        validations = validations + excluded.validations,
+        exp = exp + excluded.exp,
+        amount = amount + excluded.amount
+    """ if upsert else ""
+    conn.executemany(f"""
+    INSERT INTO team_counters (team_id, period, quest, validations, exp, amount)
+    VALUES (?, ?, ?, ?, ?, ?)
+    {conflict}
+    """, ((*key, *counts) for key, counts in counters.items()))
+
+    removed = [key for key, counts in counters.items() if min(counts) < 0]
+    if upsert and removed:
+        # deltas négatifs (annulation, réimport) revenus à zéro
+        conn.executemany("""
+        DELETE FROM team_counters
+        WHERE team_id = ? AND period = ? AND quest = ?
+        AND validations = 0 AND exp = 0 AND amount = 0
+        """, removed)
+
+
+# =========================
+# TABLEAU D'ÉQUIPE
+# =========================
+def board(conn, team_id: int, day: date, size: int = BOARD_SIZE) -> list[TeamQuest]:
+    """
+    Quêtes d'équipe de la semaine de day, avec leur progression
+    Tirées au premier accès de la semaine depuis le catalogue (quêtes
+    quotidiennes accessibles au membre le moins avancé), cible à l'échelle
+    du nombre de membres ; tirage reproductible (équipe, semaine)
+    """
+    week = rollups.week_key(day)
+    rows = conn.execute("""
+    SELECT quest, title, measure, target FROM team_quests
+    WHERE team_id = ? AND week = ? ORDER BY quest
+    """, (team_id, week)).fetchall()
+    if not rows:
+        rows = _draw(conn, team_id, day, week, size)
+
+    team_quests = []
+    for quest, title, measure, target in rows:
+        counts = totals(conn, team_id, week, quest)
+        team_quests.append(
+            TeamQuest(quest, title, measure, target, getattr(counts, measure))
+        )
+    return team_quests
+
+
+def _draw(conn, team_id: int, day: date, week: str, size: int) -> list[tuple]:
+    team = members(conn, team_id, day)
+    if not team:
+        return []
+
+    marks = ",".join("?" * len(team))
+    lowest = conn.execute(
+        f"SELECT MIN(total_exp) FROM stats WHERE id IN ({marks})", team
+    ).fetchone()[0]
+    level = Stats(total_exp=lowest or 0).get_level()
+
+    candidates = {}
+    for objective_id, title in conn.execute("""
+    SELECT id, title FROM objectives
+    WHERE template IS NULL AND active = 1 AND frequency = 'daily' AND min_level <= ?
+    """, (level,)):
+        target = QUEST_DAYS * len(team)
+        candidates[objective_id] = (f"{title} ×{target}", "validations", target)
+    for template in _templates(conn).values():
+        if template.frequency.value != "daily" or template.min_level > level:
+            continue
+        target = template.target(quests.bracket_level(quests.bracket(level)))
+        target *= QUEST_DAYS * len(team)
+        candidates[template.id] = (template.title.format(target=target), "amount", target)
+
+    rng = random.Random(f"{team_id}:{week}")
+    chosen = rng.sample(sorted(candidates), min(size, len(candidates)))
+    rows = sorted((quest, *candidates[quest]) for quest in chosen)
+    conn.executemany("""
+    INSERT OR IGNORE INTO team_quests (team_id, week, quest, title, measure, target)
+    VALUES (?, ?, ?, ?, ?, ?)
+    """, ((team_id, week, *row) for row in rows))
+    return rows
+
+
+# =========================
+# VÉRIFICATION (recalcul par lots)
+# =========================
+def check(conn, repair: bool = False, batch_size: int = CHECK_BATCH,
+          progress=None) -> dict:
+    """
+    Recalcule les compteurs depuis rollup_daily et les périodes
+    d'appartenance, par lots de batch_size équipes, et les compare aux
+    compteurs maintenus
+    - repair : réécrit les compteurs des équipes divergentes
+      (transaction de l'appelant)
+    progress(done, total) : appelé après chaque lot
+    Retourne {"teams": n, "mismatched": [ids]}
+    """
+    team_ids = [r[0] for r in conn.execute("SELECT id FROM teams ORDER BY id")]
+    mismatched = []
+
+    for start in range(0, len(team_ids), batch_size):
+        chunk = team_ids[start:start + batch_size]
+        marks = ",".join("?" * len(chunk))
+
+        expected = _recompute(conn, chunk)
+        actual = {
+            tuple(row[:3]): list(row[3:])
+            for row in conn.execute(f"""
+            SELECT team_id, period, quest, validations, exp, amount FROM team_counters
+            WHERE team_id IN ({marks})
+            """, chunk)
+        }
+        zero = [0, 0, 0]
+        diverging = sorted({
+            key[0] for key in expected.keys() | actual.keys()
+            if expected.get(key, zero) != actual.get(key, zero)
+        })
+        mismatched.extend(diverging)
+
+        if repair and diverging:
+            marks = ",".join("?" * len(diverging))
+            conn.execute(
+                f"DELETE FROM team_counters WHERE team_id IN ({marks})", diverging
+            )
+            _write(conn, {
+                key: counts for key, counts in expected.items() if key[0] in diverging
+            }, upsert=False)
+
+        if progress is not None:
+            progress(min(start + batch_size, len(team_ids)), len(team_ids))
+
+    return {"teams": len(team_ids), "mismatched": mismatched}
+
+
+def _recompute(conn, team_ids: list[int]) -> dict:
+    marks = ",".join("?" * len(team_ids))
+    rows = conn.execute(f"""
+    SELECT m.team_id, r.day, r.objective_id, SUM(r.validations), SUM(r.exp)
+    FROM team_members m
+    JOIN rollup_daily r
+    ON r.user_id = m.user_id AND r.day >= m.joined_on
+    AND (m.left_on IS NULL OR r.day < m.left_on)
+    WHERE m.team_id IN ({marks})
+    GROUP BY m.team_id, r.day, r.objective_id
+    """, team_ids).fetchall()
+
+    info = _quest_info(conn, {row[2] for row in rows})
+    counters = {}
+    for team_id, day, objective_id, validations, exp in rows:
+        _accumulate(counters, team_id, day, objective_id, validations, exp, info)
+    # lignes nulles : absentes des compteurs maintenus
+    return {key: counts for key, counts in counters.items() if any(counts)}
@@ -0,0 +1,136 @@
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+
+
+# =========================
+# SÉRIES JOURNALIÈRES
+# =========================
+@dataclass
+class DailySeries:
+    """
+    Séries alignées jour par jour (index 0 = start, jours sans activité à 0)
+    - exp : EXP cumulée en fin de journée
+    - validations : validations du jour par catégorie
+    - streak : streak en fin de journée (0 si aucune validation)
+    """
+    start: date
+    exp: list = field(default_factory=list)
+    validations: dict = field(default_factory=dict)
+    streak: list = field(default_factory=list)
+
+    def __len__(self) -> int:
+        return len(self.exp)
+
+    def day(self, index: int) -> date:
+        return self.start + timedelta(days=index)
+
+
+def build_series(rows, end: date | None = None) -> DailySeries | None:
+    """
+    Séries depuis les agrégats journaliers
+    rows : (jour ISO, catégorie | None, validations, exp), triés par jour
+    end : dernier jour affiché (aujourd'hui), dernier jour des données sinon
+    """
+    rows = list(rows)
+    if not rows:
+        return None
+
+    start = date.fromisoformat(rows[0][0])
+    last = max(date.fromisoformat(rows[-1][0]), end or start)
+    n = (last - start).days + 1
+
+    exp = [0] * n
+    validations = {}
+    for day, category, count, gained in rows:
+        i = (date.fromisoformat(day) - start).days
+        exp[i] += gained or 0
+        if category is not None and count:
+            validations.setdefault(category, [0] * n)[i] += count
+
+    active = [0] * n
+    for values in validations.values():
+        for i, count in enumerate(values):
+            active[i] |= count > 0
+
+    total, streak = 0, 0
+    streaks = []
+    for i in range(n):
+        total += exp[i]
+        exp[i] = total
+        streak = streak + 1 if active[i] else 0
+        streaks.append(streak)
+
+    return DailySeries(start, exp, validations, streaks)
+
+
+# =========================
+# SOUS-ÉCHANTILLONNAGE
+# =========================
+def lttb(ys, threshold: int, offset: int = 0) -> list[tuple]:
+    """
+    Largest-Triangle-Three-Buckets : threshold points (x, y) gardant
+    la forme de la courbe (pics compris) ; x = offset + index
+    """
+    n = len(ys)
+    if threshold >= n or threshold < 3:
+        return [(offset + i, y) for i, y in enumerate(ys)]
+
+    points = [(offset, ys[0])]
+    size = (n - 2) / (threshold - 2)
+    a = 0
+
+    for b in range(threshold - 2):
+        lo = int(b * size) + 1
+        hi = int((b + 1) * size) + 1
+
+        # moyenne du seau suivant (3e sommet du triangle)
+        nxt_lo, nxt_hi = hi, min(int((b + 2) * size) + 1, n)
+        span = nxt_hi - nxt_lo
+        avg_x = (nxt_lo + nxt_hi - 1) / 2
+        avg_y = sum(ys[nxt_lo:nxt_hi]) / span
+
+        ax, ay = a, ys[a]
+        best, best_area = lo, -1.0
+        for i in range(lo, hi):
+            area = abs((ax - avg_x) * (ys[i] - ay) - (ax - i) * (avg_y - ay))
+            if area > best_area:
+                best, best_area = i, area
+
+        points.append((offset + best, ys[best]))
+        a = best
+
+    points.append((offset + n - 1, ys[-1]))
+    return points
+
+
+def minmax(ys, buckets: int, offset: int = 0) -> list[tuple]:
+    """
+    Min / max par seau (2 points par pixel) : aucun pic perdu,
+    adapté aux comptes journaliers en dents de scie
+    """
+    n = len(ys)
+    if buckets * 2 >= n or buckets < 1:
+        return [(offset + i, y) for i, y in enumerate(ys)]
+
+    points = []
+    size = n / buckets
+    for b in range(buckets):
+        lo, hi = int(b * size), int((b + 1) * size)
+        chunk = ys[lo:hi]
+        i_min = lo + chunk.index(min(chunk))
+        i_max = lo + chunk.index(max(chunk))
+        for i in sorted({i_min, i_max}):
+            points.append((offset + i, ys[i]))
+    return points
+
+
+def downsample(ys, width: int, method: str = "lttb", lo: int = 0,
+               hi: int | None = None) -> list[tuple]:
+    """
+    Points (x, y) de la fenêtre [lo, hi) ramenés à la largeur en pixels
+    """
+    hi = len(ys) if hi is None else hi
+    window = ys[lo:hi]
+    if method == "minmax":
+        return minmax(window, max(1, width), lo)
+    return lttb(window, max(3, width), lo)
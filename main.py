@@ -3,34 +3,515 @@ import sys
 # =========================
 # CLI MODE (DEV / TEST)
 # =========================
-def run_cli():
-    from core.objective import Objective, Frequency
+def run_cli(objective_id: str | None = None):
     from core.user import User
     from core.storage import Storage
     from core.engine import Engine
+    from core.achievement import check_achievements
+    from core.scheduler import PeriodScheduler
 
     storage = Storage()
+    storage.seed_objectives()
+
     user = User()
     user.stats = storage.load_stats()
 
     engine = Engine(user, storage)
 
-    obj = Objective(
-        id=1,
-        title="Workout",
-        frequency=Frequency.DAILY,
-        value=20
-    )
+    # par défaut : premier objectif du pool du jour
+    if objective_id is None:
+        PeriodScheduler(storage, user.stats.get_level).rollover()
+        daily = storage.load_daily_objectives()
+        objective_id = daily[0]["id"] if daily else None
+
+    obj = storage.get_objective(objective_id) if objective_id else None
+    if obj is None:
+        print("UNKNOWN OBJECTIVE:", objective_id)
+        return
 
     success = engine.validate_objective(obj)
+    if success:
+        storage.complete_daily_objective(obj.id)
+        check_achievements(user.stats, storage)
     storage.save_stats(user.stats)
 
+    print("OBJECTIVE:", obj.id)
     print("VALIDATED:", success)
-    print("POINTS:", user.stats.total_points)
+    print("EXP:", user.stats.total_exp)
     print("STREAK:", user.stats.current_streak)
     print("BEST STREAK:", user.stats.best_streak)
 
 
+# =========================
+# HEADLESS SERVER
+# =========================
+def run_serve(argv):
+    import argparse
+    from core.server import serve
+
+    parser = argparse.ArgumentParser(prog="ironsystem serve")
+    parser.add_argument("--db", default="data/ironsystem.db")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--socket", help="chemin d'un socket Unix (prioritaire sur --port)")
+    parser.add_argument("--debug", action="store_true",
+                        help="spans + slow-query log (op 'metrics')")
+    parser.add_argument("--slow-query-ms", type=float, default=None)
+    args = parser.parse_args(argv)
+
+    if args.debug:
+        import logging
+        from core import instrumentation
+
+        logging.basicConfig(level=logging.INFO)
+        instrumentation.enable(args.slow_query_ms)
+
+    serve(db_path=args.db, host=args.host, port=args.port, unix_path=args.socket)
+
+
+# =========================
+# BULK IMPORT
+# =========================
+def run_import(argv):
+    """
+    Importe un fichier CSV "objective_id,timestamp" (ou JSON lines)
+    """
+    import argparse
+    import csv
+    import json
+    from core.user import User
+    from core.storage import Storage
+    from core.engine import Engine
+
+    parser = argparse.ArgumentParser(prog="ironsystem import")
+    parser.add_argument("file")
+    parser.add_argument("--db", default="data/ironsystem.db")
+    parser.add_argument("--sorted", action="store_true",
+                        help="fichier déjà trié par date (import en streaming)")
+    args = parser.parse_args(argv)
+
+    storage = Storage(args.db)
+    storage.seed_objectives()
+
+    user = User()
+    user.stats = storage.load_stats()
+    engine = Engine(user, storage)
+
+    def read_records(f):
+        if args.file.endswith((".jsonl", ".json")):
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    yield record["objective_id"], record["timestamp"]
+        else:
+            for row in csv.reader(f):
+                if len(row) >= 2 and row[0] != "objective_id":
+                    yield row[0], row[1]
+
+    with open(args.file, encoding="utf-8") as f:
+        applied = engine.validate_many(read_records(f), assume_sorted=args.sorted)
+
+    print("IMPORTED:", applied)
+    print("EXP:", user.stats.total_exp)
+    print("BEST STREAK:", user.stats.best_streak)
+
+
+# =========================
+# LEGACY SAVES (ui/legacy)
+# =========================
+def run_import_legacy(argv):
+    """
+    Importe des sauvegardes legacy (JSON : objet, tableau ou JSON lines)
+    Relançable après interruption (sauvegardes déjà importées ignorées)
+    Une seule sauvegarde : fusionnée dans le profil courant (id 1) par défaut
+    """
+    import argparse
+    from core.legacy_import import BATCH_SIZE, import_files, single_save
+
+    parser = argparse.ArgumentParser(prog="ironsystem import-legacy")
+    parser.add_argument("files", nargs="+")
+    parser.add_argument("--db", default="data/ironsystem.db")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="processus en parallèle (un fichier par processus)")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--user", type=int, default=None,
+                        help="profil existant qui reçoit la sauvegarde (défaut : "
+                             "profil courant pour une seule sauvegarde, sinon un "
+                             "nouveau profil par sauvegarde)")
+    args = parser.parse_args(argv)
+
+    user_id = args.user
+    if user_id is None and single_save(args.files):
+        user_id = 1
+
+    def progress(counts):
+        print(f"  {counts['file']}: +{counts['imported']} "
+              f"~{counts['updated']} ={counts['skipped']}", flush=True)
+
+    totals = import_files(
+        args.db, args.files, workers=args.workers,
+        batch_size=args.batch_size, progress=progress, user_id=user_id,
+    )
+    print("FILES:", totals["files"])
+    print("IMPORTED:", totals["imported"])
+    print("UPDATED:", totals["updated"])
+    print("SKIPPED:", totals["skipped"])
+
+
+# =========================
+# ROLLUPS
+# =========================
+def run_rollups(argv):
+    """
+    Reconstruit les agrégats journaliers / hebdo depuis l'historique
+    """
+    import argparse
+    from core.storage import Storage
+
+    parser = argparse.ArgumentParser(prog="ironsystem rollups")
+    parser.add_argument("--db", default="data/ironsystem.db")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="processus d'agrégation (nb de CPU par défaut)")
+    args = parser.parse_args(argv)
+
+    storage = Storage(args.db)
+    rows = storage.rebuild_rollups(
+        workers=args.workers,
+        progress=lambda done, total: print(f"  tranche {done}/{total}"),
+    )
+    print("DAILY ROWS:", rows)
+
+
+# =========================
+# TEAMS
+# =========================
+def run_teams(argv):
+    """
+    Équipes : création, membres, tableau de la semaine, vérification
+    """
+    import argparse
+    from core.storage import Storage
+
+    parser = argparse.ArgumentParser(prog="ironsystem teams")
+    parser.add_argument("--db", default="data/ironsystem.db")
+    parser.add_argument("--user", type=int, default=1)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    create = commands.add_parser("create", help="nouvelle équipe (l'utilisateur y entre)")
+    create.add_argument("name")
+    for name in ("join", "leave", "show"):
+        command = commands.add_parser(name)
+        command.add_argument("team", type=int)
+    check = commands.add_parser("check", help="recalcule et compare les compteurs")
+    check.add_argument("--repair", action="store_true")
+    args = parser.parse_args(argv)
+
+    storage = Storage(args.db).for_user(args.user)
+
+    if args.command == "create":
+        print("TEAM:", storage.create_team(args.name))
+    elif args.command == "join":
+        print("JOINED:", storage.join_team(args.team))
+    elif args.command == "leave":
+        print("LEFT:", storage.leave_team(args.team))
+    elif args.command == "show":
+        total = storage.team_totals(args.team)
+        week = storage.team_totals(args.team, week=True)
+        print("MEMBERS:", storage.team_members(args.team))
+        print(f"TOTAL: {total.validations} validations, {total.exp} EXP")
+        print(f"WEEK: {week.validations} validations, {week.exp} EXP")
+        for quest in storage.team_board(args.team):
+            mark = "✔" if quest.done else " "
+            print(f"  [{mark}] {quest.title}  {quest.progress}/{quest.target}")
+    else:
+        report = storage.check_teams(
+            repair=args.repair,
+            progress=lambda done, total: print(f"  équipes {done}/{total}"),
+        )
+        print("TEAMS:", report["teams"])
+        print("MISMATCHED:", report["mismatched"])
+        if args.repair and report["mismatched"]:
+            print("REPAIRED")
+
+
+# =========================
+# PERCENTILES
+# =========================
+def run_percentiles(argv):
+    """
+    Position de l'utilisateur dans les distributions (EXP, streak,
+    validations, semaine) ; --merge : d'autres shards (DB ou bundle)
+    """
+    import argparse
+    from pathlib import Path
+    from core import sketches
+    from core.storage import Storage
+
+    parser = argparse.ArgumentParser(prog="ironsystem percentiles")
+    parser.add_argument("--db", default="data/ironsystem.db")
+    parser.add_argument("--user", type=int, default=1)
+    parser.add_argument("--merge", nargs="+", default=[], metavar="PATH",
+                        help="DB ou bundle d'un autre shard / appareil")
+    parser.add_argument("--export", metavar="PATH",
+                        help="écrit les distributions (fusionnées) en bundle")
+    parser.add_argument("--rebuild", action="store_true",
+                        help="recalcule les distributions depuis les stats")
+    args = parser.parse_args(argv)
+
+    storage = Storage(args.db).for_user(args.user)
+    if args.rebuild:
+        storage.rebuild_sketches()
+
+    names = {
+        metric: sketches.sketch_key(metric, storage.clock.today())
+        for metric in sketches.METRICS
+    }
+    merged = {
+        metric: sketches.QuantileSketch().merge(storage.sketch(metric))
+        for metric in sketches.METRICS
+    }
+    for path in args.merge:
+        shard = sketches.load_file(path)
+        for metric, name in names.items():
+            if name in shard:
+                merged[metric].merge(shard[name])
+
+    if args.export:
+        Path(args.export).write_bytes(sketches.dump_bundle(
+            {names[metric]: sketch for metric, sketch in merged.items()}
+        ))
+        print("EXPORTED:", args.export)
+
+    for metric, label in sketches.METRICS.items():
+        sketch = merged[metric]
+        value = storage.metric_value(metric)
+        share = sketch.top_share(value) if value > 0 else None
+        print(f"{label}: {value}  ({sketches.top_label(share)},"
+              f" {sketch.count} utilisateurs)")
+        if sketch.count:
+            print("  p50 / p90 / p99:", " / ".join(
+                str(round(sketch.quantile(q))) for q in (0.5, 0.9, 0.99)
+            ))
+
+
+# =========================
+# BACKUP / RESTORE
+# =========================
+def run_backup(argv):
+    import argparse
+    from core.backup import BackupManager
+
+    parser = argparse.ArgumentParser(prog="ironsystem backup")
+    parser.add_argument("--db", default="data/ironsystem.db")
+    parser.add_argument("--dir", help="dossier des sauvegardes (<db>/../backups par défaut)")
+    parser.add_argument("--list", action="store_true", help="liste les sauvegardes")
+    args = parser.parse_args(argv)
+
+    manager = BackupManager(args.db, args.dir)
+    if not args.list:
+        print("BACKUP:", manager.backup())
+
+    for b in manager.list_backups():
+        print(f"  {b.taken_at.isoformat()}  {b.size:>10} B  {b.path}")
+
+
+def run_restore(argv):
+    """
+    Restaure une sauvegarde (la plus récente par défaut)
+    ou l'état à un instant donné (--at, rejeu de l'historique)
+    L'application doit être fermée pendant la restauration
+    """
+    import argparse
+    from core.backup import BackupManager
+
+    parser = argparse.ArgumentParser(prog="ironsystem restore")
+    parser.add_argument("file", nargs="?", help="fichier .db.gz à restaurer")
+    parser.add_argument("--db", default="data/ironsystem.db")
+    parser.add_argument("--dir", help="dossier des sauvegardes (<db>/../backups par défaut)")
+    parser.add_argument("--at", help="instant ISO (ex : 2025-03-01T21:00)")
+    args = parser.parse_args(argv)
+
+    manager = BackupManager(args.db, args.dir)
+    if args.at:
+        result = manager.restore_to(args.at)
+        print("BASE:", result["base"] or "(aucune, DB vide)")
+        print("REPLAYED:", result["replayed"])
+        print("RESTORED AT:", result["at"])
+    else:
+        print("RESTORED:", manager.restore(args.file))
+
+
+# =========================
+# ARCHIVE
+# =========================
+def run_compact(argv):
+    """
+    Archive l'historique plus vieux que l'horizon (DB annuelles compressées)
+    """
+    import argparse
+    import os
+    import sqlite3
+    from core.archive import BATCH_SIZE, HORIZON_DAYS, HistoryArchive
+
+    parser = argparse.ArgumentParser(prog="ironsystem compact")
+    parser.add_argument("--db", default="data/ironsystem.db")
+    parser.add_argument("--dir", help="dossier des archives (<db>/../archive par défaut)")
+    parser.add_argument("--horizon-days", type=int, default=HORIZON_DAYS)
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--vacuum", action="store_true",
+                        help="VACUUM final (réduit le fichier, active l'auto_vacuum incrémental)")
+    args = parser.parse_args(argv)
+
+    archive = HistoryArchive(args.db, args.dir, args.horizon_days, args.batch_size)
+    moved = archive.compact(
+        sleep=0, progress=lambda total: print(f"  {total} évènements archivés", flush=True)
+    )
+    print("ARCHIVED:", moved)
+    print("YEARS:", ", ".join(map(str, archive.years())) or "-")
+
+    if args.vacuum:
+        conn = sqlite3.connect(args.db, isolation_level=None)
+        try:
+            conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            conn.execute("VACUUM")
+        finally:
+            conn.close()
+    print("DB SIZE:", os.path.getsize(args.db))
+
+
+# =========================
+# EXPORT
+# =========================
+def run_export(argv):
+    """
+    Exporte les données (Parquet / Arrow si pyarrow est installé, CSV sinon)
+    Historique incrémental : seules les lignes depuis le dernier export
+    """
+    import argparse
+    from core.export import CHUNK_SIZE, FORMATS, Exporter, default_format
+
+    parser = argparse.ArgumentParser(prog="ironsystem export")
+    parser.add_argument("out", help="dossier de sortie")
+    parser.add_argument("--db", default="data/ironsystem.db")
+    parser.add_argument("--format", choices=FORMATS, default=default_format())
+    parser.add_argument("--full", action="store_true",
+                        help="ignore le watermark (historique complet, archives comprises)")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    args = parser.parse_args(argv)
+
+    exporter = Exporter(args.db, args.out, args.format, args.chunk_size)
+    report = exporter.run(full=args.full)
+
+    for table, rows in report.items():
+        if table != "watermark":
+            print(f"{table.upper()}: {rows}")
+    print("WATERMARK:", report["watermark"])
+
+
+# =========================
+# SYNC
+# =========================
+def run_sync(argv):
+    import argparse
+    from core.storage import Storage
+    from core.sync import SyncClient
+
+    parser = argparse.ArgumentParser(prog="ironsystem sync")
+    parser.add_argument("--url", required=True, help="ex : http://127.0.0.1:8766")
+    parser.add_argument("--db", default="data/ironsystem.db")
+    args = parser.parse_args(argv)
+
+    storage = Storage(args.db)
+    storage.seed_objectives()
+    report = SyncClient(storage, args.url).sync()
+
+    print("PUSHED:", report["pushed"])
+    print("PULLED:", report["pulled"])
+    print(f"TRAFFIC: {report['bytes_sent']} B envoyés, {report['bytes_received']} B reçus"
+          f" ({report['requests']} requêtes)")
+
+
+def run_sync_server(argv):
+    import argparse
+    from core.sync import make_server
+
+    parser = argparse.ArgumentParser(prog="ironsystem sync-server")
+    parser.add_argument("--db", default="data/sync-server.db")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8766)
+    args = parser.parse_args(argv)
+
+    server = make_server(args.db, args.host, args.port)
+    print(f"SYNC SERVER: http://{args.host}:{server.server_address[1]}/sync")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+# =========================
+# LOAD SIMULATOR
+# =========================
+def run_simulate(argv):
+    import argparse
+    import json
+    import os
+    import tempfile
+    from datetime import date
+    from core.simulator import Simulator
+
+    parser = argparse.ArgumentParser(prog="ironsystem simulate")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--start", default="2025-01-01")
+    parser.add_argument("--db", help="DB de simulation (neuve), temporaire par défaut")
+    parser.add_argument("--json", action="store_true", help="rapport JSON brut")
+    args = parser.parse_args(argv)
+
+    db_path = args.db or os.path.join(tempfile.mkdtemp(prefix="ironsystem-sim-"), "sim.db")
+
+    def progress(done, total):
+        if not args.json and (done % 30 == 0 or done == total):
+            print(f"  jour {done}/{total}", flush=True)
+
+    report = Simulator(
+        db_path, users=args.users, days=args.days, seed=args.seed,
+        start=date.fromisoformat(args.start)
+    ).run(progress)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print("DB:", db_path)
+    print("VALIDATIONS:", report["validations"], f"({report['validations_per_s']}/s)")
+    print("USER-DAYS/S:", report["user_days_per_s"])
+    print("DB SIZE:", report["db_bytes"], f"({report['bytes_per_validation']} B/validation)")
+    print("VALIDATION LATENCY (ms):", report["validation_latency_ms"])
+    print("DAY TRANSACTION (ms):", report["day_transaction_ms"])
+
+
+# =========================
+# SINGLE INSTANCE
+# =========================
+def forward_to_instance(argv, wait: float = 0.0) -> bool:
+    """
+    Transmet argv à l'instance UI en cours (affiche sa réponse)
+    False si aucune instance n'écoute : le lancement continue
+    """
+    from core import instance
+
+    reply = instance.forward(argv, "data/ironsystem.db", wait=wait)
+    if reply is None:
+        return False
+    for line in reply.get("output", []):
+        print(line)
+    return True
+
+
 # =========================
 # UI MODE (PRODUCTION)
 # =========================
@@ -40,9 +521,23 @@ def run_ui():
     from PySide6.QtCore import Qt
 
     from ui.main_window import MainWindow
+    from ui.single_instance import SingleInstance
+    from core import instance
 
     app = QApplication(sys.argv)
 
+    # une seule fenêtre par DB : les lancements suivants lui sont transmis
+    single = SingleInstance("data/ironsystem.db")
+    try:
+        acquired = single.acquire()
+    except OSError as e:
+        print("LOCK ERROR:", e)
+        sys.exit(1)
+    if not acquired:
+        # instance en cours de démarrage (verrou pris, pas encore à l'écoute)
+        forward_to_instance(sys.argv[1:], wait=instance.CONNECT_WAIT)
+        return
+
     # =========================
     # FORCE DARK PALETTE (ANTI THEME LINUX)
     # =========================
@@ -60,15 +555,46 @@ def run_ui():
     app.setPalette(palette)
 
     window = MainWindow()
+    single.received.connect(window.handle_request)
     window.show()
-    sys.exit(app.exec())
+    code = app.exec()
+    single.release()
+    sys.exit(code)
 
 
 # =========================
 # ENTRY POINT
 # =========================
-if __name__ == "__main__":
-    if "--cli" in sys.argv:
-        run_cli()
-    else:
+# sous-commande → handler (arguments suivant le nom de la sous-commande)
+COMMANDS = {
+    "serve": run_serve,
+    "import": run_import,
+    "import-legacy": run_import_legacy,
+    "rollups": run_rollups,
+    "teams": run_teams,
+    "percentiles": run_percentiles,
+    "backup": run_backup,
+    "restore": run_restore,
+    "compact": run_compact,
+    "export": run_export,
+    "sync": run_sync,
+    "sync-server": run_sync_server,
+    "simulate": run_simulate,
+}
+
+
+def main(argv):
+    command = COMMANDS.get(argv[0]) if argv else None
+    if command is not None:
+        command(argv[1:])
+    elif "--cli" in argv:
+        # UI ouverte : validation faite par elle (une seule connexion à la DB)
+        if not forward_to_instance(argv):
+            args = argv[argv.index("--cli") + 1:]
+            run_cli(args[0] if args else None)
+    elif not forward_to_instance(argv):
         run_ui()
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,48 @@
+from datetime import datetime
+
+import pytest
+
+from core.clock import SimulatedClock
+from core.engine import Engine
+from core.storage import Storage
+from core.user import User
+
+
+# lundi : semaine ISO complète devant soi
+NOW = datetime(2026, 10, 19, 12, 0)
+
+
+@pytest.fixture
+def clock():
+    return SimulatedClock(NOW)
+
+
+@pytest.fixture
+def storage(tmp_path, clock):
+    storage = Storage(tmp_path / "ironsystem.db", clock=clock)
+    storage.seed_objectives()
+    yield storage
+    storage.conn.close()
+
+
+@pytest.fixture
+def user(storage):
+    user = User()
+    user.stats = storage.load_stats()
+    return user
+
+
+@pytest.fixture
+def engine(user, storage):
+    return Engine(user, storage)
+
+
+def validate(engine, objective_id: str):
+    """
+    Validation "live" complète (comme l'UI) : historique + stats
+    """
+    objective = engine.storage.get_objective(objective_id)
+    with engine.storage.batch():
+        assert engine.validate_objective(objective)
+        engine.storage.save_stats(engine.user.stats)
+    return objective
@@ -0,0 +1,49 @@
+from datetime import timedelta
+
+from core.archive import HistoryArchive
+from core.backup import BackupManager
+
+from conftest import NOW
+
+
+def _import(engine, days):
+    return engine.validate_many([
+        ("bike_20", (NOW - timedelta(days=d)).isoformat()) for d in days
+    ])
+
+
+def test_compaction_after_restoring_older_backup(engine, storage, tmp_path):
+    total = _import(engine, range(800, 0, -5))
+    manager = BackupManager(storage.db_path, tmp_path / "backups")
+    backup = manager.backup()
+
+    archive = HistoryArchive(storage.db_path, batch_size=40)
+    assert archive.compact(now=NOW, sleep=0) > 0
+
+    # sauvegarde d'avant compactage : ses lignes chaudes sont déjà archivées
+    manager.restore(backup, now=NOW)
+    assert len(storage.load_history()) == total
+
+    # compactage rejoué : ni doublon, ni IntegrityError
+    assert archive.compact(now=NOW, sleep=0) == 0
+    assert len(storage.load_history()) == total
+    assert len({row[0] for row in archive.read()}) == len(list(archive.read()))
+
+
+def test_compaction_skips_rows_already_archived(engine, storage):
+    total = _import(engine, range(800, 0, -5))
+    hot = [tuple(r) for r in storage.conn.execute("SELECT * FROM history")]
+
+    archive = HistoryArchive(storage.db_path, batch_size=40)
+    moved = archive.compact(now=NOW, sleep=0)
+
+    # lignes archivées revenues dans la DB active (restauration brute)
+    storage.conn.execute("DELETE FROM history")
+    storage.conn.executemany(
+        f"INSERT INTO history VALUES ({', '.join('?' * len(hot[0]))})", hot
+    )
+    storage.conn.commit()
+
+    assert archive.compact(now=NOW, sleep=0) == moved
+    assert len(storage.load_history()) == total
+    assert len(list(archive.read())) == moved
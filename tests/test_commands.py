@@ -0,0 +1,114 @@
+from datetime import timedelta
+
+import pytest
+
+from core.commands import CommandStack
+
+from conftest import NOW
+
+
+# état persistant touché par une validation
+_TABLES = {
+    "stats": "SELECT * FROM stats",
+    # validations nettes des évènements compensatoires "undo"
+    "history": """
+    SELECT user_id, timestamp, objective_id,
+           SUM(CASE action WHEN 'undo' THEN -1 ELSE 1 END) AS net, SUM(impact)
+    FROM history GROUP BY 1, 2, 3 HAVING net != 0
+    """,
+    "rollup_daily": "SELECT * FROM rollup_daily",
+    "rollup_weekly": "SELECT * FROM rollup_weekly",
+    "objective_progress": "SELECT * FROM objective_progress",
+    "achievements": "SELECT user_id, id FROM achievements WHERE unlocked = 1",
+    "leaderboard_scores": "SELECT * FROM leaderboard_scores",
+    "leaderboard_tree": "SELECT * FROM leaderboard_tree",
+    "sketch_buckets": "SELECT * FROM sketch_buckets",
+}
+
+
+def _state(storage):
+    return {
+        table: sorted(tuple(r) for r in storage.conn.execute(sql))
+        for table, sql in _TABLES.items()
+    }
+
+
+@pytest.fixture
+def commands(engine):
+    return CommandStack(engine)
+
+
+def test_undo_restores_exact_state(commands, engine, storage, user):
+    before = _state(storage)
+    stats_before = user.stats.streak_state(), user.stats.total_exp
+
+    command = commands.execute(storage.get_objective("bike_20"))
+    assert command is not None
+    assert _state(storage) != before
+
+    assert commands.undo() is command
+    assert _state(storage) == before
+    assert (user.stats.streak_state(), user.stats.total_exp) == stats_before
+    assert not commands.can_undo()
+
+
+def test_undo_appends_a_compensating_event(commands, storage):
+    command = commands.execute(storage.get_objective("bike_20"))
+    commands.undo()
+
+    rows = storage.conn.execute("""
+    SELECT id, timestamp, action, objective_id, impact FROM history ORDER BY id
+    """).fetchall()
+    assert [tuple(r)[1:] for r in rows] == [
+        (rows[0][1], "validate", "bike_20", 30),
+        (rows[0][1], "undo", "bike_20", -30),
+    ]
+    assert rows[0][0] == command.history_id
+
+    # ids jamais réattribués : la validation suivante prend un nouvel id
+    commands.execute(storage.get_objective("run_20"))
+    assert storage.conn.execute("SELECT MAX(id) FROM history").fetchone()[0] > rows[1][0]
+
+
+def test_undo_frees_the_cooldown(commands, storage):
+    objective = storage.get_objective("bike_20")
+    assert commands.execute(objective) is not None
+    assert commands.execute(objective) is None
+
+    commands.undo()
+    assert commands.execute(objective) is not None
+
+
+def test_undo_keeps_previous_days_streak(commands, engine, storage, user, clock):
+    clock.set(NOW - timedelta(days=1))
+    commands.execute(storage.get_objective("lunges_20"))
+    clock.set(NOW)
+    state = _state(storage)
+
+    commands.execute(storage.get_objective("bike_20"))
+    assert user.stats.current_streak == 2
+
+    commands.undo()
+    assert user.stats.current_streak == 1
+    assert user.stats.last_validation_date == (NOW - timedelta(days=1)).date()
+    assert _state(storage) == state
+
+
+def test_stack_is_bounded(engine, storage, clock):
+    commands = CommandStack(engine, limit=2)
+    for offset in (2, 1, 0):
+        clock.set(NOW - timedelta(days=offset))
+        commands.execute(storage.get_objective("bike_20"))
+
+    assert commands.undo() is not None
+    assert commands.undo() is not None
+    assert commands.undo() is None
+
+
+def test_validation_follows_injected_clock(commands, storage, user, clock):
+    day = (NOW - timedelta(days=400)).date()
+    clock.set(NOW - timedelta(days=400))
+    commands.execute(storage.get_objective("bike_20"))
+
+    assert user.stats.last_validation_date == day
+    assert storage.load_stats().last_validation_date == day
@@ -0,0 +1,64 @@
+import csv
+import sqlite3
+from datetime import timedelta
+
+import pytest
+
+from core.archive import HistoryArchive
+from core.commands import CommandStack
+from core.export import HISTORY_COLUMNS, Exporter
+
+from conftest import NOW, validate
+
+
+def _history_rows(out_dir):
+    rows = []
+    for path in sorted(out_dir.glob("history-*.csv")):
+        with open(path, newline="", encoding="utf-8") as f:
+            rows.extend((r["action"], r["objective_id"]) for r in csv.DictReader(f))
+    return rows
+
+
+def test_incremental_export_carries_undo_forward(engine, storage, tmp_path):
+    out_dir = tmp_path / "export"
+    exporter = Exporter(storage.db_path, out_dir, fmt="csv")
+    commands = CommandStack(engine)
+
+    commands.execute(storage.get_objective("bike_20"))
+    assert exporter.run()["history"] == 1
+
+    commands.undo()
+    commands.execute(storage.get_objective("run_20"))
+    assert exporter.run()["history"] == 2
+
+    assert _history_rows(out_dir) == [
+        ("validate", "bike_20"), ("undo", "bike_20"), ("validate", "run_20"),
+    ]
+
+
+def test_incremental_export_reads_backdated_rows_already_archived(engine, storage, tmp_path):
+    exporter = Exporter(storage.db_path, tmp_path / "export", fmt="csv")
+    validate(engine, "bike_20")
+    exporter.run()
+
+    # import antidaté puis compactage avant l'export suivant
+    engine.validate_many([("run_20", (NOW - timedelta(days=500)).isoformat())])
+    assert HistoryArchive(storage.db_path).compact(now=NOW, sleep=0) == 1
+
+    assert exporter.run()["history"] == 1
+    assert ("validate", "run_20") in _history_rows(tmp_path / "export")
+    assert exporter.run()["history"] == 0
+
+
+def test_failed_export_leaves_no_partial_file(storage, tmp_path):
+    out_dir = tmp_path / "export"
+    out_dir.mkdir()
+    exporter = Exporter(storage.db_path, out_dir, fmt="csv")
+
+    def chunks():
+        yield [(1, 1, NOW.isoformat(), "validate", "bike_20", 10)]
+        raise sqlite3.OperationalError("database is locked")
+
+    with pytest.raises(sqlite3.OperationalError):
+        exporter._write("history-1-1", HISTORY_COLUMNS, chunks(), None)
+    assert list(out_dir.iterdir()) == []
@@ -0,0 +1,57 @@
+from datetime import timedelta
+
+from conftest import NOW, validate
+
+
+def test_backdated_import_keeps_live_streak(engine, storage, user, clock):
+    # streak de 3 jours finissant aujourd'hui
+    for offset in (2, 1, 0):
+        clock.set(NOW - timedelta(days=offset))
+        validate(engine, "lunges_20")
+    assert user.stats.current_streak == 3
+
+    # carnet papier : 30 jours consécutifs, de J-90 à J-61
+    records = [
+        ("bike_20", (NOW - timedelta(days=offset)).isoformat())
+        for offset in range(90, 60, -1)
+    ]
+    assert engine.validate_many(records) == 30
+
+    stats = storage.load_stats()
+    assert stats.last_validation_date == NOW.date()
+    assert stats.current_streak == 3
+    assert stats.validations_today == 1
+    assert stats.best_streak == 30
+    assert stats.total_validations == 33
+    assert user.stats.current_streak == 3
+
+    # la validation suivante prolonge le streak (pas de remise à 1)
+    clock.set(NOW + timedelta(days=1))
+    validate(engine, "lunges_20")
+    assert storage.load_stats().current_streak == 4
+
+
+def test_backdated_import_fills_gap_before_streak(engine, storage, clock):
+    for offset in (1, 0):
+        clock.set(NOW - timedelta(days=offset))
+        validate(engine, "lunges_20")
+
+    # J-3 et J-2 comblent les jours précédant le streak courant
+    records = [("bike_20", (NOW - timedelta(days=d)).isoformat()) for d in (3, 2)]
+    assert engine.validate_many(records) == 2
+
+    stats = storage.load_stats()
+    assert stats.current_streak == 4
+    assert stats.best_streak == 4
+    assert stats.last_validation_date == NOW.date()
+
+
+def test_import_into_empty_profile(engine, storage):
+    records = [
+        ("bike_20", (NOW - timedelta(days=d)).isoformat()) for d in range(5, 0, -1)
+    ]
+    assert engine.validate_many(records) == 5
+
+    stats = storage.load_stats()
+    assert stats.current_streak == 5
+    assert stats.total_exp == 5 * storage.get_objective("bike_20").value
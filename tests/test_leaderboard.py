@@ -0,0 +1,66 @@
+import random
+
+from core.leaderboard import Leaderboard
+
+
+def _exact(scores):
+    # rang "1224" : 1 + nombre de scores strictement supérieurs ; 0 = non classé
+    return {
+        uid: 1 + sum(other > score for other in scores.values())
+        for uid, score in scores.items() if score > 0
+    }
+
+
+def _ranks(board, scores):
+    return {uid: board.rank(uid) for uid in scores if board.rank(uid) is not None}
+
+
+def test_incremental_ranks_match_exact_and_rebuild(storage):
+    rng = random.Random(5)
+    board = Leaderboard(storage.conn, "test")
+    scores = {}
+    for _ in range(2000):
+        uid = rng.randint(1, 200)
+        # scores au-delà de la capacité initiale : l'arbre grandit
+        scores[uid] = rng.choice([0, rng.randint(0, 50), rng.randint(0, 5000)])
+        board.set_score(uid, scores[uid])
+
+    exact = _exact(scores)
+    assert _ranks(board, scores) == exact
+    assert board.size() == len(exact)
+    # nœuds non nuls uniquement
+    assert storage.conn.execute(
+        "SELECT COUNT(*) FROM leaderboard_tree WHERE count = 0"
+    ).fetchone()[0] == 0
+
+    rebuilt = Leaderboard(storage.conn, "rebuilt")
+    rebuilt.rebuild(scores)
+    assert _ranks(rebuilt, scores) == exact
+    assert rebuilt.size() == len(exact)
+
+
+def test_back_to_zero_leaves_the_board(storage):
+    board = Leaderboard(storage.conn, "test")
+    board.set_score(1, 10)
+    board.set_score(2, 5)
+    board.set_score(1, 0)
+
+    assert board.rank(1) is None
+    assert board.rank(2) == 1
+    assert board.size() == 1
+
+
+def test_pages_follow_score_order(storage):
+    board = Leaderboard(storage.conn, "test")
+    scores = {uid: (uid * 37) % 11 + 1 for uid in range(1, 60)}
+    for uid, score in scores.items():
+        board.set_score(uid, score)
+
+    ordered = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+    rows = board.page(0, 100)
+    assert [(uid, score) for _, uid, score in rows] == ordered
+    assert [rank for rank, _, _ in rows] == [_exact(scores)[uid] for uid, _ in ordered]
+
+    assert board.page(10, 5) == rows[10:15]
+    around = board.around(ordered[20][0], neighbors=2)
+    assert around == rows[18:23]
@@ -0,0 +1,56 @@
+import json
+
+import pytest
+
+from core.legacy_import import import_files
+
+from conftest import validate
+
+
+def _save(path, *saves):
+    path.write_text("\n".join(json.dumps(s) for s in saves), encoding="utf-8")
+    return path
+
+
+def _save_data(level=3, streak=4, last="2026-10-10"):
+    return {
+        "level": level, "streak": streak, "last_date": last,
+        "profile": {"total_days": 12},
+        "history": [{"date": "2026-10-09", "xp": 80}, {"date": last, "xp": 120}],
+    }
+
+
+def test_single_save_merges_into_existing_profile(engine, storage, user, tmp_path):
+    validate(engine, "bike_20")
+    path = _save(tmp_path / "save.json", _save_data())
+
+    totals = import_files(storage.db_path, [path], workers=1, user_id=storage.user_id)
+    assert totals["imported"] == 1
+
+    users = storage.conn.execute("SELECT COUNT(*) FROM stats").fetchone()[0]
+    assert users == 1
+    stats = storage.load_stats()
+    assert stats.total_exp == 30 + 200
+    assert stats.total_validations == 1 + 12
+    # streak du jour (validation récente) conservé, meilleur streak repris
+    assert stats.current_streak == 1
+    assert stats.best_streak == 4
+
+    # sauvegarde modifiée : apport précédent remplacé, pas ajouté
+    _save(path, _save_data(level=5))
+    totals = import_files(storage.db_path, [path], workers=1, user_id=storage.user_id)
+    assert totals["updated"] == 1
+    stats = storage.load_stats()
+    assert stats.total_exp == 30 + 400
+    assert stats.total_validations == 1 + 12
+
+
+def test_several_saves_create_one_profile_each(storage, tmp_path):
+    path = _save(tmp_path / "saves.json", _save_data(), _save_data(level=2))
+
+    totals = import_files(storage.db_path, [path], workers=1)
+    assert totals["imported"] == 2
+    assert storage.conn.execute("SELECT COUNT(*) FROM stats").fetchone()[0] == 3
+
+    with pytest.raises(ValueError):
+        import_files(storage.db_path, [path], workers=1, user_id=storage.user_id)
@@ -0,0 +1,75 @@
+from datetime import timedelta
+
+from core.archive import HistoryArchive
+from core.commands import CommandStack
+
+from conftest import NOW
+
+
+def _rollups(storage):
+    return {
+        table: [tuple(r) for r in storage.conn.execute(
+            f"SELECT * FROM {table} ORDER BY 1, 2, 3"
+        )]
+        for table in ("rollup_daily", "rollup_weekly")
+    }
+
+
+def _import(engine, days):
+    records = [
+        (objective_id, (NOW - timedelta(days=d)).isoformat())
+        for d in days
+        for objective_id in ("bike_20", "lunges_20")
+    ]
+    return engine.validate_many(records)
+
+
+def test_rebuild_matches_incremental(engine, storage):
+    _import(engine, range(40, 0, -3))
+    incremental = _rollups(storage)
+    assert incremental["rollup_daily"]
+
+    storage.rebuild_rollups()
+    assert _rollups(storage) == incremental
+
+
+def test_rebuild_nets_out_undone_validations(engine, storage):
+    _import(engine, range(10, 0, -3))
+    commands = CommandStack(engine)
+    commands.execute(storage.get_objective("bike_20"))
+    commands.execute(storage.get_objective("lunges_20"))
+    commands.undo()
+    incremental = _rollups(storage)
+
+    storage.rebuild_rollups()
+    assert _rollups(storage) == incremental
+
+
+def test_rebuild_after_compaction_keeps_archived_days(engine, storage):
+    # ~2 ans d'historique, dont plus de la moitié au-delà de l'horizon
+    _import(engine, range(800, 0, -5))
+    before = _rollups(storage)
+
+    archive = HistoryArchive(storage.db_path, batch_size=50)
+    moved = archive.compact(now=NOW, sleep=0)
+    assert moved > 0
+    assert archive.years()
+    assert storage.conn.execute(
+        "SELECT COUNT(*) FROM history WHERE timestamp < ?", (archive.horizon(NOW),)
+    ).fetchone()[0] == 0
+
+    # compactage : agrégats intacts
+    assert _rollups(storage) == before
+
+    # reconstruction : archives relues
+    storage.rebuild_rollups()
+    assert _rollups(storage) == before
+
+
+def test_compaction_keeps_history_readable(engine, storage):
+    _import(engine, range(500, 0, -10))
+    total = storage.conn.execute("SELECT COUNT(*) FROM history").fetchone()[0]
+
+    HistoryArchive(storage.db_path).compact(now=NOW, sleep=0)
+
+    assert len(storage.load_history()) == total
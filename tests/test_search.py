@@ -0,0 +1,30 @@
+from core import quests
+
+
+def _ids(objectives):
+    return sorted(o.id for o in objectives)
+
+
+def test_search_covers_every_generated_bracket(storage):
+    found = storage.search_objectives("gainage", limit=100)
+    brackets = quests.bracket(quests.MAX_LEVEL) + 1
+    assert _ids(found) == sorted(f"plank@{b}" for b in range(brackets))
+
+
+def test_search_at_level_materializes_its_bracket(storage):
+    storage.load_objectives_for_level(1)
+
+    found = storage.search_objectives("gainage", level=12)
+    assert _ids(found) == ["plank@2"]
+    assert found[0].title == "Gainage 60 secondes"
+
+
+def test_search_after_rollback_still_finds_generated_quests(storage):
+    try:
+        with storage.batch():
+            storage.search_objectives("gainage", level=30)
+            raise RuntimeError
+    except RuntimeError:
+        pass
+
+    assert _ids(storage.search_objectives("gainage", level=30)) == ["plank@5"]
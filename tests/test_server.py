@@ -0,0 +1,56 @@
+import pytest
+
+from core.server import EngineServer
+
+
+@pytest.fixture
+def server(storage):
+    return EngineServer(storage)
+
+
+def _count(storage, table):
+    return storage.conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+
+def test_failed_request_rolls_back_its_writes_only(server, storage, monkeypatch):
+    def broken(objective_id):
+        raise RuntimeError("disk on fire")
+
+    with storage.batch():
+        ok, _ = server._dispatch({"id": 1, "op": "validate", "objective_id": "bike_20"})
+
+        # échec après l'écriture de l'historique et de la progression
+        monkeypatch.setattr(storage, "complete_daily_objective", broken)
+        failed, changed = server._dispatch(
+            {"id": 2, "op": "validate", "objective_id": "lunges_20"}
+        )
+        monkeypatch.undo()
+        storage.save_stats(server.user.stats)
+
+    assert ok["ok"]
+    assert failed == {"id": 2, "ok": False, "error": "disk on fire"}
+    assert not changed
+
+    bike = storage.get_objective("bike_20")
+    assert _count(storage, "history") == 1
+    assert set(storage.load_last_completions()) == {"bike_20"}
+    # mémoire = DB : seule la première validation compte
+    assert server.user.stats.total_exp == bike.value
+    assert storage.load_stats().total_exp == bike.value
+    assert server.user.stats.total_validations == 1
+
+
+def test_failed_request_can_be_retried(server, storage, monkeypatch):
+    def broken(objective_id):
+        raise RuntimeError("boom")
+
+    with storage.batch():
+        monkeypatch.setattr(storage, "complete_daily_objective", broken)
+        failed, _ = server._dispatch({"id": 1, "op": "validate", "objective_id": "bike_20"})
+        monkeypatch.undo()
+        # pas de cooldown fantôme : la complétion annulée est oubliée
+        retried, _ = server._dispatch({"id": 2, "op": "validate", "objective_id": "bike_20"})
+
+    assert not failed["ok"]
+    assert retried["ok"]
+    assert _count(storage, "history") == 1
@@ -0,0 +1,105 @@
+import random
+
+import pytest
+
+from core import sketches
+from core.sketches import QuantileSketch
+
+
+@pytest.fixture
+def values():
+    rng = random.Random(7)
+    return [int(rng.lognormvariate(6, 1.2)) + 1 for _ in range(5000)]
+
+
+def _sketch(values):
+    sketch = QuantileSketch()
+    for value in values:
+        sketch.add(value)
+    return sketch
+
+
+def test_quantiles_within_relative_accuracy(values):
+    sketch = _sketch(values)
+    ordered = sorted(values)
+
+    assert sketch.count == len(values)
+    for q in (0.0, 0.1, 0.25, 0.5, 0.75, 0.9, 0.99, 1.0):
+        exact = ordered[int(q * (len(ordered) - 1))]
+        assert abs(sketch.quantile(q) - exact) <= sketch.alpha * exact * 1.0001
+
+
+def test_top_share_matches_exact_rank_up_to_bucket(values):
+    sketch = _sketch(values)
+    for value in random.Random(1).sample(values, 100):
+        # bornes : valeurs ≥ value·(1+α)² (bucket suivant) / ≥ value/(1+α)²
+        low = sum(v >= value * (1 + sketch.alpha) ** 2 for v in values) / len(values)
+        high = sum(v >= value / (1 + sketch.alpha) ** 2 for v in values) / len(values)
+        assert low <= sketch.top_share(value) <= high
+
+
+def test_remove_is_exact_inverse_of_add(values):
+    sketch = _sketch(values)
+    for value in values[:2500]:
+        sketch.remove(value)
+    assert sketch.buckets == _sketch(values[2500:]).buckets
+
+
+def test_merge_equals_sketch_of_union(values):
+    merged = _sketch(values[:2000]).merge(_sketch(values[2000:]))
+    assert merged.buckets == _sketch(values).buckets
+
+    with pytest.raises(ValueError):
+        merged.merge(QuantileSketch(alpha=0.02))
+
+
+def test_serialization_roundtrip(values):
+    sketch = _sketch(values)
+    data = sketch.to_bytes()
+    assert QuantileSketch.from_bytes(data).buckets == sketch.buckets
+    assert len(data) < 4 * len(sketch.buckets) + 16
+
+    bundle = sketches.load_bundle(sketches.dump_bundle({"exp": sketch, "streak": QuantileSketch()}))
+    assert bundle["exp"].buckets == sketch.buckets
+    assert bundle["streak"].count == 0
+
+    with pytest.raises(ValueError):
+        QuantileSketch.from_bytes(data[:-1])
+
+
+def test_empty_and_unranked():
+    sketch = QuantileSketch()
+    assert sketch.quantile(0.5) is None
+    assert sketch.top_share(10) is None
+    sketch.add(0)
+    assert sketch.count == 0
+    assert sketches.top_label(None) == "—"
+    assert sketches.top_label(0.113) == "Top 12 %"
+    assert sketches.top_label(0.0001) == "Top 1 %"
+
+
+def test_storage_percentiles_follow_saved_stats(storage):
+    rng = random.Random(3)
+    exps = {}
+    for _ in range(300):
+        view = storage.for_user(storage.create_user())
+        stats = view.load_stats()
+        stats.add_exp(rng.randint(1, 5000))
+        view.save_stats(stats)
+        exps[view.user_id] = stats.total_exp
+
+    # incrémental = reconstruction
+    rows = storage.conn.execute("SELECT * FROM sketch_buckets ORDER BY 1, 2").fetchall()
+    storage.rebuild_sketches()
+    assert storage.conn.execute(
+        "SELECT * FROM sketch_buckets ORDER BY 1, 2"
+    ).fetchall() == rows
+
+    # à un bucket près (largeur relative ~2α)
+    alpha = storage.sketch("exp").alpha
+    for user_id, exp in list(exps.items())[:50]:
+        low = sum(v >= exp * (1 + alpha) ** 2 for v in exps.values()) / len(exps)
+        high = sum(v >= exp / (1 + alpha) ** 2 for v in exps.values()) / len(exps)
+        assert low <= storage.for_user(user_id).percentile("exp") <= high
+    assert storage.percentile("exp") is None  # utilisateur 1 : 0 EXP, non classé
+    assert storage.sketch("weekly").count == len(exps)
@@ -0,0 +1,145 @@
+import sqlite3
+from datetime import timedelta
+
+from core.archive import HistoryArchive
+from core.engine import Engine
+from core.storage import Storage
+from core.sync import SyncEngine
+from core.user import User
+
+from conftest import NOW
+
+
+def _sketch_rows(storage):
+    return [tuple(r) for r in storage.conn.execute(
+        "SELECT name, bucket, count FROM sketch_buckets ORDER BY 1, 2"
+    )]
+
+
+def _leaderboard_rows(storage):
+    return [
+        [tuple(r) for r in storage.conn.execute(f"SELECT * FROM {table} ORDER BY 1, 2")]
+        for table in ("leaderboard_scores", "leaderboard_tree")
+    ]
+
+
+def _assert_rankings_consistent(storage):
+    incremental = _sketch_rows(storage)
+    storage.rebuild_sketches()
+    assert _sketch_rows(storage) == incremental
+
+
+def test_unchanged_stats_write_nothing(storage):
+    stats = storage.load_stats()
+    stats.add_exp(120)
+    storage.save_stats(stats)
+
+    changes = storage.conn.total_changes
+    storage.save_stats(stats)
+    assert storage.conn.total_changes == changes
+
+
+def test_unranked_change_skips_rankings(storage):
+    stats = storage.load_stats()
+    stats.add_exp(120)
+    storage.save_stats(stats)
+    rows = _sketch_rows(storage)
+
+    boards = _leaderboard_rows(storage)
+
+    stats.combo_validations += 1
+    storage.save_stats(stats)
+
+    # ni classement ni distribution touchés
+    assert _leaderboard_rows(storage) == boards
+    assert _sketch_rows(storage) == rows
+    assert storage.load_stats().combo_validations == 1
+
+
+def test_write_from_other_connection_is_not_missed(storage):
+    stats = storage.load_stats()
+    stats.add_exp(50)
+    storage.save_stats(stats)
+
+    other = sqlite3.connect(storage.db_path)
+    other.execute("UPDATE stats SET total_exp = 5000 WHERE id = ?", (storage.user_id,))
+    other.commit()
+    other.close()
+
+    # ligne mémorisée périmée (data_version) : relue avant les deltas
+    storage.save_stats(stats)
+    assert storage.leaderboard("exp").score(storage.user_id) == 50
+    storage.conn.execute("DELETE FROM sketch_buckets")
+    storage.rebuild_sketches()
+    stats.add_exp(10)
+    storage.save_stats(stats)
+    _assert_rankings_consistent(storage)
+
+
+def test_sync_merge_invalidates_saved_row(storage):
+    stats = storage.load_stats()
+    stats.add_exp(50)
+    storage.save_stats(stats)
+
+    engine = SyncEngine(storage)
+    with storage.batch():
+        engine.snapshot_counters()
+        engine.apply({"sync_counters": [
+            [storage.user_id, "other-device", "total_exp", 300],
+        ]}, "other-device")
+
+    merged = storage.load_stats()
+    assert merged.total_exp == 350
+
+    # la ligne fusionnée est relue : 350 → 360, pas 50 → 360
+    storage.rebuild_sketches()
+    merged.add_exp(10)
+    storage.save_stats(merged)
+    _assert_rankings_consistent(storage)
+
+
+def test_history_ids_never_reused_after_migration(storage, clock):
+    user = User()
+    user.stats = storage.load_stats()
+    Engine(user, storage).validate_many([
+        ("bike_20", (NOW - timedelta(days=d)).isoformat()) for d in (700, 600, 500)
+    ])
+    assert HistoryArchive(storage.db_path).compact(now=NOW, sleep=0) == 3
+    archived = HistoryArchive(storage.db_path).max_id()
+
+    # DB antérieure : id sans AUTOINCREMENT, dernières lignes archivées
+    storage.conn.executescript("""
+    CREATE TABLE _old AS SELECT * FROM history;
+    DROP TABLE history;
+    CREATE TABLE history (
+        id INTEGER PRIMARY KEY, user_id INTEGER NOT NULL DEFAULT 1,
+        timestamp TEXT NOT NULL, action TEXT NOT NULL, objective_id TEXT,
+        impact INTEGER DEFAULT 0, origin TEXT, origin_id INTEGER
+    );
+    INSERT INTO history SELECT * FROM _old;
+    DROP TABLE _old;
+    DELETE FROM sqlite_sequence WHERE name = 'history';
+    """)
+    path = storage.db_path
+    storage.conn.close()
+
+    migrated = Storage(path, clock=clock)
+    sql = migrated.conn.execute(
+        "SELECT sql FROM sqlite_master WHERE name = 'history'"
+    ).fetchone()[0]
+    assert "AUTOINCREMENT" in sql
+    indexes = {r[0] for r in migrated.conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'history'"
+    )}
+    assert {"idx_history_timestamp", "idx_history_user_time", "idx_history_origin"} <= indexes
+
+    user.stats = migrated.load_stats()
+    engine = Engine(user, migrated)
+    history_id = engine.record_validation(migrated.get_objective("run_20"))
+    assert history_id > archived
+    # nouvelle ligne journalisée pour la sync (triggers recréés)
+    assert migrated.conn.execute(
+        "SELECT COUNT(*) FROM sync_changes WHERE tbl = 'history' AND key = ?",
+        (f"[{history_id}]",),
+    ).fetchone()[0] == 1
+    migrated.conn.close()
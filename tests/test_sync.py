@@ -0,0 +1,102 @@
+from datetime import timedelta
+
+import pytest
+
+from core import sync
+from core.commands import CommandStack
+from core.archive import ARCHIVED_HISTORY, HistoryArchive
+from core.storage import Storage
+
+from conftest import NOW
+
+
+@pytest.fixture
+def server(tmp_path, clock):
+    storage = Storage(tmp_path / "server" / "ironsystem.db", clock=clock)
+    storage.seed_objectives()
+    engine = sync.SyncEngine(storage)
+    yield storage, engine
+    storage.conn.close()
+
+
+def _client(storage, server):
+    server_storage, server_engine = server
+
+    def transport(body, report):
+        return sync.handle_sync(server_storage, server_engine, body)
+
+    return sync.SyncClient(storage, "http://test", transport=transport)
+
+
+def _import(engine, days):
+    return engine.validate_many([
+        ("bike_20", (NOW - timedelta(days=d)).isoformat()) for d in days
+    ])
+
+
+def _count(storage, sql):
+    return storage.conn.execute(sql).fetchone()[0]
+
+
+def test_compacted_unsynced_history_still_reaches_server(engine, storage, server):
+    # carnet importé (dont > 1 an), jamais synchronisé, puis archivé
+    imported = _import(engine, range(600, 0, -7))
+    moved = HistoryArchive(storage.db_path).compact(now=NOW, sleep=0)
+    assert moved > 0
+    assert _count(storage, f"""
+    SELECT COUNT(*) FROM sync_changes WHERE tbl = '{ARCHIVED_HISTORY}'
+    """) == moved
+
+    _client(storage, server).sync()
+
+    assert _count(server[0], "SELECT COUNT(*) FROM history") == imported
+
+
+def test_compaction_drops_journal_entries_already_pushed(engine, storage, server):
+    imported = _import(engine, range(600, 0, -7))
+    client = _client(storage, server)
+    client.sync()
+
+    moved = HistoryArchive(storage.db_path).compact(now=NOW, sleep=0)
+    assert moved > 0
+    assert _count(storage, f"""
+    SELECT COUNT(*) FROM sync_changes WHERE tbl IN ('history', '{ARCHIVED_HISTORY}')
+    """) == imported - moved
+
+    # rien de renvoyé, rien de perdu
+    report = client.sync()
+    assert report["pushed"] == 0
+    assert _count(server[0], "SELECT COUNT(*) FROM history") == imported
+
+
+def _net_history(storage):
+    return sorted(tuple(r) for r in storage.conn.execute("""
+    SELECT objective_id, SUM(CASE action WHEN 'undo' THEN -1 ELSE 1 END) AS net
+    FROM history GROUP BY objective_id HAVING net != 0
+    """))
+
+
+def test_undo_reaches_server_and_stays_undone(engine, storage, user, server, tmp_path, clock):
+    commands = CommandStack(engine)
+    client = _client(storage, server)
+
+    commands.execute(storage.get_objective("bike_20"))
+    client.sync()
+    commands.undo()
+    commands.execute(storage.get_objective("run_20"))
+    client.sync()
+
+    assert _net_history(server[0]) == [("run_20", 1)]
+    assert server[0].load_stats().total_exp == 40
+
+    # EXP annulée jamais ramenée par les compteurs
+    client.sync()
+    assert storage.load_stats().total_exp == user.stats.total_exp == 40
+
+    # autre appareil : même état net
+    other = Storage(tmp_path / "other" / "ironsystem.db", clock=clock)
+    other.seed_objectives()
+    _client(other, server).sync()
+    assert _net_history(other) == [("run_20", 1)]
+    assert other.load_stats().total_exp == 40
+    other.conn.close()
@@ -6,6 +6,8 @@ from PySide6.QtWidgets import (
 from PySide6.QtCore import Qt
 
 from core.storage import Storage
+from ui import settings
+from ui.settings import SettingsService
 
 
 class AchievementsWindow(QWidget):
@@ -18,13 +20,17 @@ class AchievementsWindow(QWidget):
     - rareté (commun / rare / légendaire)
     - catégories (discipline / endurance / mental)
     - scroll
+    - dernier filtre mémorisé (préférences)
     """
 
-    def __init__(self, storage: Storage):
+    def __init__(self, storage: Storage, preferences: SettingsService | None = None):
         super().__init__()
 
         self.storage = storage
-        self.current_filter = "all"
+        self.preferences = preferences
+        self.current_filter = (
+            preferences.get(settings.ACHIEVEMENTS_FILTER) if preferences else "all"
+        )
 
         self.setWindowTitle("Achievements")
         self.resize(460, 580)
@@ -110,7 +116,10 @@ class AchievementsWindow(QWidget):
             }
             """)
 
-        self.btn_all.setChecked(True)
+        self.btn_all.setChecked(self.current_filter == "all")
+        self.btn_unlocked.setChecked(self.current_filter == "unlocked")
+        self.btn_locked.setChecked(self.current_filter == "locked")
+        self.btn_secrets.setChecked(self.current_filter == "secrets")
 
         self.btn_all.clicked.connect(lambda: self._set_filter("all"))
         self.btn_unlocked.clicked.connect(lambda: self._set_filter("unlocked"))
@@ -203,6 +212,8 @@ class AchievementsWindow(QWidget):
     # -------------------------
     def _set_filter(self, value: str):
         self.current_filter = value
+        if self.preferences is not None:
+            self.preferences.set(settings.ACHIEVEMENTS_FILTER, value)
 
         self.btn_all.setChecked(value == "all")
         self.btn_unlocked.setChecked(value == "unlocked")
@@ -0,0 +1,127 @@
+from PySide6.QtWidgets import (
+    QWidget, QVBoxLayout, QHBoxLayout, QLabel,
+    QLineEdit, QComboBox, QCheckBox, QListWidget
+)
+from PySide6.QtCore import Qt
+
+from core.objective import Category, Frequency
+from core.storage import Storage
+from core.user import User
+
+
+class CatalogWindow(QWidget):
+    """
+    Catalogue des exercices
+    - recherche plein texte (préfixes, sans accents)
+    - filtres catégorie / fréquence / niveau
+    - résultats triés par pertinence
+    """
+
+    RESULT_LIMIT = 100
+
+    def __init__(self, user: User, storage: Storage):
+        super().__init__()
+
+        self.user = user
+        self.storage = storage
+
+        self.setWindowTitle("Catalogue")
+        self.resize(460, 580)
+
+        self._setup_ui()
+        self._search()
+
+    # -------------------------
+    # UI
+    # -------------------------
+    def _setup_ui(self):
+        main_layout = QVBoxLayout(self)
+        main_layout.setAlignment(Qt.AlignTop)
+        main_layout.setSpacing(10)
+
+        title = QLabel("CATALOGUE")
+        title.setAlignment(Qt.AlignCenter)
+        title.setStyleSheet("""
+        QLabel {
+            font-size: 22px;
+            font-weight: bold;
+            color: #7f5af0;
+            letter-spacing: 3px;
+        }
+        """)
+        main_layout.addWidget(title)
+
+        self.search_input = QLineEdit()
+        self.search_input.setPlaceholderText("Rechercher (ex : gainage, mobilité…)")
+        self.search_input.setClearButtonEnabled(True)
+        self.search_input.textChanged.connect(self._search)
+        main_layout.addWidget(self.search_input)
+
+        # Filters
+        filter_layout = QHBoxLayout()
+        filter_layout.setSpacing(8)
+
+        self.category_box = QComboBox()
+        self.category_box.addItem("Toutes catégories", None)
+        self.category_box.addItem("🥋 Discipline", Category.DISCIPLINE)
+        self.category_box.addItem("🫀 Endurance", Category.ENDURANCE)
+        self.category_box.addItem("🧠 Recovery", Category.MENTAL)
+        self.category_box.currentIndexChanged.connect(self._search)
+
+        self.frequency_box = QComboBox()
+        self.frequency_box.addItem("Toutes fréquences", None)
+        self.frequency_box.addItem("Daily", Frequency.DAILY)
+        self.frequency_box.addItem("Weekly", Frequency.WEEKLY)
+        self.frequency_box.addItem("Monthly", Frequency.MONTHLY)
+        self.frequency_box.currentIndexChanged.connect(self._search)
+
+        self.level_check = QCheckBox("Mon niveau")
+        self.level_check.toggled.connect(self._search)
+
+        filter_layout.addWidget(self.category_box)
+        filter_layout.addWidget(self.frequency_box)
+        filter_layout.addWidget(self.level_check)
+        main_layout.addLayout(filter_layout)
+
+        self.count_label = QLabel("")
+        self.count_label.setStyleSheet("font-size: 12px; color: #b8b8d1;")
+        main_layout.addWidget(self.count_label)
+
+        self.results = QListWidget()
+        self.results.setUniformItemSizes(True)
+        self.results.setStyleSheet("""
+        QListWidget {
+            background-color: #14182b;
+            border: 1px solid #2d325a;
+            border-radius: 8px;
+        }
+        QListWidget::item {
+            padding: 6px;
+        }
+        """)
+        main_layout.addWidget(self.results)
+
+    # -------------------------
+    # DATA
+    # -------------------------
+    def _search(self, *_):
+        level = self.user.stats.get_level() if self.level_check.isChecked() else None
+
+        objectives = self.storage.search_objectives(
+            self.search_input.text(),
+            category=self.category_box.currentData(),
+            frequency=self.frequency_box.currentData(),
+            level=level,
+            limit=self.RESULT_LIMIT,
+        )
+
+        self.results.setUpdatesEnabled(False)
+        self.results.clear()
+        self.results.addItems([
+            f"{o.title}   · niv. {o.min_level} · +{o.value} EXP"
+            for o in objectives
+        ])
+        self.results.setUpdatesEnabled(True)
+
+        suffix = "+" if len(objectives) == self.RESULT_LIMIT else ""
+        self.count_label.setText(f"{len(objectives)}{suffix} résultat(s)")
@@ -0,0 +1,178 @@
+from datetime import date, timedelta
+
+from PySide6.QtWidgets import QWidget
+from PySide6.QtCore import Qt, QPointF, QRectF
+from PySide6.QtGui import QPainter, QPen, QColor, QPolygonF
+
+from core.timeseries import downsample
+
+
+class TimeSeriesChart(QWidget):
+    """
+    Courbes journalières dessinées au QPainter
+    - séries sous-échantillonnées à la largeur du tracé (1 point / pixel)
+    - molette : zoom autour du curseur, glisser : déplacement,
+      double-clic : vue complète
+    - method : "lttb" (courbes lisses) ou "minmax" (comptes, pics conservés)
+    """
+
+    MARGIN_LEFT = 44
+    MARGIN_RIGHT = 12
+    MARGIN_TOP = 30
+    MARGIN_BOTTOM = 24
+    MIN_SPAN = 7
+
+    def __init__(self, title: str, method: str = "lttb", parent=None):
+        super().__init__(parent)
+
+        self.title = title
+        self.method = method
+        self.start = None
+        self.series = []
+        self.length = 0
+        self.lo = self.hi = 0
+
+        self._drag_x = None
+        self._cache_key = None
+        self._cache = []
+
+        self.setMinimumHeight(180)
+        self.setMouseTracking(False)
+
+    # -------------------------
+    # DATA
+    # -------------------------
+    def set_series(self, start: date, series: list[tuple]):
+        """
+        series : [(libellé, couleur, valeurs journalières)], valeurs alignées
+        sur start (même longueur)
+        """
+        self.start = start
+        self.series = series
+        self.length = max((len(values) for _, _, values in series), default=0)
+        self.lo, self.hi = 0, self.length
+        self._cache_key = None
+        self.update()
+
+    def _points(self, width: int) -> list:
+        """
+        Points visibles par série, recalculés seulement si la vue change
+        """
+        key = (self.lo, self.hi, width)
+        if key != self._cache_key:
+            self._cache = [
+                downsample(values, width, self.method, self.lo, self.hi)
+                for _, _, values in self.series
+            ]
+            self._cache_key = key
+        return self._cache
+
+    # -------------------------
+    # NAVIGATION
+    # -------------------------
+    def _plot_rect(self) -> QRectF:
+        return QRectF(
+            self.MARGIN_LEFT, self.MARGIN_TOP,
+            max(1, self.width() - self.MARGIN_LEFT - self.MARGIN_RIGHT),
+            max(1, self.height() - self.MARGIN_TOP - self.MARGIN_BOTTOM),
+        )
+
+    def _set_view(self, lo: float, hi: float):
+        span = max(min(self.MIN_SPAN, self.length), int(round(hi - lo)))
+        lo = int(round(min(max(0, lo), self.length - span)))
+        self.lo, self.hi = lo, lo + span
+        self.update()
+
+    def wheelEvent(self, event):
+        if self.length < 2:
+            return
+        rect = self._plot_rect()
+        ratio = min(max((event.position().x() - rect.left()) / rect.width(), 0.0), 1.0)
+        anchor = self.lo + ratio * (self.hi - self.lo)
+        factor = 0.8 if event.angleDelta().y() > 0 else 1.25
+        span = (self.hi - self.lo) * factor
+        self._set_view(anchor - ratio * span, anchor + (1 - ratio) * span)
+
+    def mousePressEvent(self, event):
+        if event.button() == Qt.LeftButton:
+            self._drag_x = event.position().x()
+
+    def mouseMoveEvent(self, event):
+        if self._drag_x is None:
+            return
+        x = event.position().x()
+        days = (self._drag_x - x) * (self.hi - self.lo) / self._plot_rect().width()
+        if abs(days) >= 1:
+            self._set_view(self.lo + days, self.hi + days)
+            self._drag_x = x
+
+    def mouseReleaseEvent(self, event):
+        self._drag_x = None
+
+    def mouseDoubleClickEvent(self, event):
+        self._set_view(0, self.length)
+
+    # -------------------------
+    # PAINT
+    # -------------------------
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.Antialiasing)
+
+        painter.setPen(QPen(QColor("#2d325a"), 1))
+        painter.setBrush(QColor("#1a1f36"))
+        painter.drawRoundedRect(QRectF(self.rect()).adjusted(0.5, 0.5, -0.5, -0.5), 8, 8)
+
+        painter.setPen(QColor("#b8b8d1"))
+        painter.drawText(QRectF(12, 6, self.width() - 24, 20), Qt.AlignLeft, self.title)
+
+        if not self.series or self.hi - self.lo < 1:
+            painter.drawText(self.rect(), Qt.AlignCenter, "Pas encore de données")
+            painter.end()
+            return
+
+        rect = self._plot_rect()
+        points = self._points(int(rect.width()))
+        top = max((y for serie in points for _, y in serie), default=0) or 1
+        span = max(1, self.hi - 1 - self.lo)
+
+        # axes : max / 0 et dates de début / fin de vue
+        painter.setPen(QPen(QColor("#2d325a"), 1))
+        painter.drawLine(rect.bottomLeft(), rect.bottomRight())
+        painter.setPen(QColor("#8a8aa8"))
+        painter.drawText(QRectF(0, rect.top() - 8, self.MARGIN_LEFT - 6, 16),
+                         Qt.AlignRight | Qt.AlignVCenter, _short(top))
+        painter.drawText(QRectF(0, rect.bottom() - 8, self.MARGIN_LEFT - 6, 16),
+                         Qt.AlignRight | Qt.AlignVCenter, "0")
+        painter.drawText(QRectF(rect.left(), rect.bottom() + 4, rect.width(), 16),
+                         Qt.AlignLeft, self._day_label(self.lo))
+        painter.drawText(QRectF(rect.left(), rect.bottom() + 4, rect.width(), 16),
+                         Qt.AlignRight, self._day_label(self.hi - 1))
+
+        # courbes
+        legend_x = rect.right()
+        for (label, color, _), serie in zip(reversed(self.series), reversed(points)):
+            polygon = QPolygonF([
+                QPointF(rect.left() + (x - self.lo) * rect.width() / span,
+                        rect.bottom() - y * rect.height() / top)
+                for x, y in serie
+            ])
+            painter.setPen(QPen(QColor(color), 1.6))
+            painter.drawPolyline(polygon)
+
+            if len(self.series) > 1:
+                text_width = painter.fontMetrics().horizontalAdvance(label)
+                legend_x -= text_width
+                painter.drawText(QPointF(legend_x, 20), label)
+                legend_x -= 12
+
+        painter.end()
+
+    def _day_label(self, index: int) -> str:
+        return (self.start + timedelta(days=index)).strftime("%d/%m/%y")
+
+
+def _short(value: float) -> str:
+    if value >= 10_000:
+        return f"{value / 1000:.0f}k"
+    return str(int(value))
@@ -0,0 +1,143 @@
+from PySide6.QtWidgets import (
+    QWidget, QVBoxLayout, QHBoxLayout, QLabel,
+    QComboBox, QListWidget, QListWidgetItem, QPushButton
+)
+from PySide6.QtCore import Qt
+from PySide6.QtGui import QColor
+
+from core.leaderboard import BOARDS
+from core.storage import Storage
+from core.user import User
+
+
+class LeaderboardWindow(QWidget):
+    """
+    Classements (EXP totale / streak / EXP de la semaine)
+    - pagination (page lue via l'index, rang via l'arbre)
+    - bouton "Ma position" : saute à la page de l'utilisateur
+    """
+
+    PAGE_SIZE = 20
+
+    def __init__(self, user: User, storage: Storage):
+        super().__init__()
+
+        self.user = user
+        self.storage = storage
+        self.offset = 0
+
+        self.setWindowTitle("Classements")
+        self.resize(420, 600)
+
+        self._setup_ui()
+        self._load_page()
+
+    # -------------------------
+    # UI
+    # -------------------------
+    def _setup_ui(self):
+        main_layout = QVBoxLayout(self)
+        main_layout.setAlignment(Qt.AlignTop)
+        main_layout.setSpacing(10)
+
+        title = QLabel("CLASSEMENTS")
+        title.setAlignment(Qt.AlignCenter)
+        title.setStyleSheet("""
+        QLabel {
+            font-size: 22px;
+            font-weight: bold;
+            color: #7f5af0;
+            letter-spacing: 3px;
+        }
+        """)
+        main_layout.addWidget(title)
+
+        self.board_box = QComboBox()
+        for key, label in BOARDS.items():
+            self.board_box.addItem(label, key)
+        self.board_box.currentIndexChanged.connect(self._on_board_changed)
+        main_layout.addWidget(self.board_box)
+
+        self.my_rank_label = QLabel("")
+        self.my_rank_label.setAlignment(Qt.AlignCenter)
+        self.my_rank_label.setStyleSheet("font-size: 14px; color: #b8b8d1;")
+        main_layout.addWidget(self.my_rank_label)
+
+        self.results = QListWidget()
+        self.results.setUniformItemSizes(True)
+        self.results.setStyleSheet("""
+        QListWidget {
+            background-color: #14182b;
+            border: 1px solid #2d325a;
+            border-radius: 8px;
+        }
+        QListWidget::item {
+            padding: 6px;
+        }
+        """)
+        main_layout.addWidget(self.results)
+
+        # Pagination
+        nav_layout = QHBoxLayout()
+
+        self.prev_button = QPushButton("◀")
+        self.prev_button.clicked.connect(lambda: self._go_to(self.offset - self.PAGE_SIZE))
+
+        self.page_label = QLabel("")
+        self.page_label.setAlignment(Qt.AlignCenter)
+
+        self.next_button = QPushButton("▶")
+        self.next_button.clicked.connect(lambda: self._go_to(self.offset + self.PAGE_SIZE))
+
+        me_button = QPushButton("Ma position")
+        me_button.clicked.connect(self._go_to_me)
+
+        nav_layout.addWidget(self.prev_button)
+        nav_layout.addWidget(self.page_label, 1)
+        nav_layout.addWidget(self.next_button)
+        nav_layout.addWidget(me_button)
+        main_layout.addLayout(nav_layout)
+
+    # -------------------------
+    # DATA
+    # -------------------------
+    def _board(self):
+        return self.storage.leaderboard(self.board_box.currentData())
+
+    def _on_board_changed(self, *_):
+        self.offset = 0
+        self._load_page()
+
+    def _go_to(self, offset: int):
+        self.offset = max(0, offset)
+        self._load_page()
+
+    def _go_to_me(self):
+        position = self._board().position(self.storage.user_id)
+        if position is not None:
+            self._go_to(position - position % self.PAGE_SIZE)
+
+    def _load_page(self):
+        board = self._board()
+        total = board.size()
+        rows = board.page(self.offset, self.PAGE_SIZE)
+
+        self.results.clear()
+        for rank, user_id, score in rows:
+            me = user_id == self.storage.user_id
+            item = QListWidgetItem(
+                f"#{rank:<5} Joueur {user_id}{'  (vous)' if me else ''}   {score}"
+            )
+            if me:
+                item.setForeground(QColor("#7f5af0"))
+            self.results.addItem(item)
+
+        pages = max(1, -(-total // self.PAGE_SIZE))
+        self.page_label.setText(f"Page {self.offset // self.PAGE_SIZE + 1} / {pages}")
+        self.prev_button.setEnabled(self.offset > 0)
+        self.next_button.setEnabled(self.offset + self.PAGE_SIZE < total)
+
+        rank = board.rank(self.storage.user_id)
+        self.my_rank_label.setText(
+            f"Votre rang : {rank} / {total}" if rank else "Vous n'êtes pas encore classé"
+        )
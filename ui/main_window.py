@@ -1,23 +1,81 @@
 from PySide6.QtWidgets import (
-    QMainWindow, QWidget, QVBoxLayout, QLabel,
+    QApplication, QMainWindow, QWidget, QVBoxLayout, QLabel,
     QPushButton, QHBoxLayout, QProgressBar,
     QGraphicsDropShadowEffect, QMenuBar,
     QWidgetAction, QSlider
 )
 from PySide6.QtCore import (
     Qt, QPropertyAnimation, QEasingCurve,
-    QUrl, QSettings
+    QUrl, QThread, Signal
 )
-from PySide6.QtGui import QColor
+from PySide6.QtGui import QColor, QKeySequence
 from PySide6.QtMultimedia import QSoundEffect
 
 from core.user import User
-from core.storage import Storage
+from core.storage import Storage, DEFAULT_DB_PATH
 from core.objective import Objective, Frequency, Category
 from core.engine import Engine
+from core.achievement import achievement_rarity
+from core.commands import CommandStack
+from core.scheduler import PeriodScheduler
+from core.archive import HistoryArchive
+from core.backup import BackupManager
+from core.snapshot import (
+    DashboardSnapshot, board_rows, load_snapshot, save_snapshot, snapshot_path
+)
+from core import instrumentation
+from core.instrumentation import timed
 from ui.achievements_window import AchievementsWindow
 from ui.stats_window import StatsWindow
-from datetime import datetime, timedelta
+from ui.catalog_window import CatalogWindow
+from ui.leaderboard_window import LeaderboardWindow
+from ui.reset_clock import ResetClock
+from ui import settings
+from ui.settings import SettingsService
+from datetime import datetime
+from pathlib import Path
+import logging
+
+logger = logging.getLogger("ironsystem.ui")
+
+BOARDS = (
+    ("daily", "DAILY QUESTS"),
+    ("weekly", "WEEKLY ELITE"),
+    ("monthly", "MONTHLY"),
+)
+
+
+class _CoreLoader(QThread):
+    """
+    Ouverture de la DB hors du thread UI
+    (migrations, seed, stats, tirage des pools : dépend de la taille de la DB
+    et du disque). Les objets sont ensuite remis au thread UI, seul à s'en
+    servir (connexion ouverte avec check_same_thread=False)
+    """
+
+    loaded = Signal(object)
+    failed = Signal(str)
+
+    def __init__(self, db_path: str, parent=None):
+        super().__init__(parent)
+        self.db_path = db_path
+
+    def run(self):
+        try:
+            storage = Storage(self.db_path, check_same_thread=False)
+            storage.seed_objectives()
+
+            user = User()
+            user.stats = storage.load_stats()
+            engine = Engine(user, storage)
+
+            scheduler = PeriodScheduler(storage, lambda: user.stats.get_level())
+            scheduler.rollover()
+        except Exception as exc:
+            logger.exception("core loading failed")
+            self.failed.emit(str(exc))
+            return
+        self.loaded.emit((storage, user, engine, scheduler))
 
 
 class MainWindow(QMainWindow):
@@ -32,7 +90,11 @@ class MainWindow(QMainWindow):
 
     def __init__(self):
         super().__init__()
-        self.DEBUG = False
+        # IRONSYSTEM_DEBUG=1 → spans + slow-query log, rapport à la fermeture
+        # (activés dès l'import de core.instrumentation)
+        self.DEBUG = instrumentation.is_enabled()
+        if self.DEBUG:
+            logging.basicConfig(level=logging.INFO)
 
         self.setWindowTitle("IronSystem")
         self.setMinimumSize(500, 560)
@@ -40,19 +102,24 @@ class MainWindow(QMainWindow):
         # =========================
         # SETTINGS (persistants)
         # =========================
-        self.settings = QSettings("IronSystem", "IronSystemApp")
-        self._volume = self.settings.value("audio/volume", 0.4, float)
-        self._muted = self.settings.value("audio/muted", False, bool)
+        # lectures en mémoire, écritures regroupées (slider, déplacements)
+        self.settings = SettingsService(parent=self)
+        self._volume = self.settings.get(settings.AUDIO_VOLUME)
+        self._muted = self.settings.get(settings.AUDIO_MUTED)
+        self._accent = self.settings.get(settings.THEME_ACCENT)
 
         # =========================
-        # CORE
+        # CORE (chargé en arrière-plan)
         # =========================
-        self.storage = Storage()
-        self.storage.seed_objectives()
-
-        self.user = User()
-        self.user.stats = self.storage.load_stats()
-        self.engine = Engine(self.user, self.storage)
+        # chemin absolu : le thread de chargement ne dépend pas du cwd
+        self.db_path = str(Path(DEFAULT_DB_PATH).resolve())
+        self.snapshot_path = snapshot_path(self.db_path)
+        self.storage = self.user = self.engine = self.scheduler = None
+        self.commands = None
+        # validations transmises par un second lancement avant la DB
+        self._pending_requests = []
+        self.reset_clock = None
+        self._snapshot_reset_at = None
 
         # =========================
         # AUDIO SYSTEM
@@ -65,11 +132,129 @@ class MainWindow(QMainWindow):
         self._setup_menu()
         self._setup_ui()
         self._apply_dark_theme()
-        self.refresh_dashboard()
+        self.restoreGeometry(self.settings.get(settings.WINDOW_GEOMETRY))
+
+        # premier rendu : dernier état affiché, sans attendre la DB
+        self._paint_snapshot(load_snapshot(self.snapshot_path))
+
+        self._loader = _CoreLoader(self.db_path, self)
+        self._loader.loaded.connect(self._on_core_loaded)
+        self._loader.failed.connect(self._on_core_failed)
+        self._loader.start()
 
         # Popup achievement actif (anti-bug)
         self._achievement_popup = None
 
+    # ------------------------------------------------------------------
+    # SECOND LANCEMENT (instance unique)
+    # ------------------------------------------------------------------
+    def handle_request(self, request):
+        """
+        Arguments transmis par un second lancement de main.py
+        - sans argument : fenêtre ramenée au premier plan
+        - --cli [objective_id] : validation dans cette instance
+          (même sortie que le mode CLI, annulable ici)
+        """
+        self.showNormal()
+        self.raise_()
+        self.activateWindow()
+
+        argv = request.argv
+        if "--cli" not in argv:
+            request.reply()
+            return
+        if self.commands is None:
+            self._pending_requests.append(request)
+            return
+
+        args = argv[argv.index("--cli") + 1:]
+        request.reply(self._validate_from_cli(args[0] if args else None))
+
+    def _validate_from_cli(self, objective_id: str | None) -> list[str]:
+        # par défaut : premier objectif du pool du jour
+        if objective_id is None:
+            daily = self.storage.load_daily_objectives()
+            objective_id = daily[0]["id"] if daily else None
+
+        obj = self.storage.get_objective(objective_id) if objective_id else None
+        if obj is None:
+            return [f"UNKNOWN OBJECTIVE: {objective_id}"]
+
+        success = self._validate_daily(obj) is not None
+        stats = self.user.stats
+        return [
+            f"OBJECTIVE: {obj.id}",
+            f"VALIDATED: {success}",
+            f"EXP: {stats.total_exp}",
+            f"STREAK: {stats.current_streak}",
+            f"BEST STREAK: {stats.best_streak}",
+        ]
+
+    # ------------------------------------------------------------------
+    # CORE (réconciliation)
+    # ------------------------------------------------------------------
+    def _on_core_loaded(self, core: tuple):
+        """
+        DB prête : remplace le snapshot par les vraies données
+        """
+        self.storage, self.user, self.engine, self.scheduler = core
+        # validations annulables (Ctrl+Z)
+        self.commands = CommandStack(self.engine)
+
+        # sauvegarde à chaud quotidienne (thread dédié)
+        self.backups = BackupManager(self.storage.db_path)
+        backup_thread = None
+        if self.backups.due():
+            backup_thread = self.backups.backup_in_background()
+
+        # archivage de l'historique ancien, après la sauvegarde (thread dédié)
+        self.archive = HistoryArchive(self.storage.db_path)
+        if self.archive.due():
+            self.archive.compact_in_background(after=backup_thread)
+
+        # compte à rebours (aligné minute) + reset à l'instant exact
+        self.reset_clock = ResetClock(self.scheduler, self)
+        self.reset_clock.minute_tick.connect(self._update_daily_timer)
+        self.reset_clock.rolled.connect(self._on_rollover)
+
+        for action in self._core_actions:
+            action.setEnabled(True)
+
+        self.refresh_dashboard()
+        self.reset_clock.start()
+
+        for request in self._pending_requests:
+            self.handle_request(request)
+        self._pending_requests = []
+
+    def _on_core_failed(self, message: str):
+        self._show_info_popup("⚠ SYSTEM", f"Chargement impossible : {message}")
+
+    def wait_until_ready(self):
+        """
+        Bloque jusqu'à la réconciliation (scripts, benchmarks)
+        """
+        self._loader.wait()
+        QApplication.processEvents()
+
+    def closeEvent(self, event):
+        # pas de QThread détruit en cours d'exécution
+        self._loader.wait()
+        self.settings.set(settings.WINDOW_GEOMETRY, self.saveGeometry())
+        self.settings.flush()
+        if instrumentation.is_enabled():
+            instrumentation.log_report()
+        super().closeEvent(event)
+
+    def moveEvent(self, event):
+        # un évènement par pixel pendant un glisser : écriture différée
+        self.settings.set(settings.WINDOW_GEOMETRY, self.saveGeometry())
+        super().moveEvent(event)
+
+    def resizeEvent(self, event):
+        self.settings.set(settings.WINDOW_GEOMETRY, self.saveGeometry())
+        super().resizeEvent(event)
+
     # ------------------------------------------------------------------
     # MENU
     # ------------------------------------------------------------------
@@ -83,6 +268,26 @@ class MainWindow(QMainWindow):
         stats_action = settings_menu.addAction("📊 Statistiques")
         stats_action.triggered.connect(self.open_stats)
 
+        catalog_action = settings_menu.addAction("📚 Catalogue")
+        catalog_action.triggered.connect(self.open_catalog)
+
+        leaderboard_action = settings_menu.addAction("🏆 Classements")
+        leaderboard_action.triggered.connect(self.open_leaderboard)
+
+        settings_menu.addSeparator()
+
+        self.undo_action = settings_menu.addAction("↶ Annuler la validation")
+        self.undo_action.setShortcut(QKeySequence.Undo)
+        self.undo_action.setEnabled(False)
+        self.undo_action.triggered.connect(self._undo_validation)
+
+        # actions sur la DB : actives une fois le core chargé
+        self._core_actions = [
+            achievements_action, stats_action, catalog_action, leaderboard_action
+        ]
+        for action in self._core_actions:
+            action.setEnabled(False)
+
         settings_menu.addSeparator()
 
         self.audio_action = settings_menu.addAction("")
@@ -107,13 +312,21 @@ class MainWindow(QMainWindow):
         self.setMenuBar(menu_bar)
 
     def open_achievements(self):
-        self.achievements_window = AchievementsWindow(self.storage)
+        self.achievements_window = AchievementsWindow(self.storage, self.settings)
         self.achievements_window.show()
 
     def open_stats(self):
         self.stats_window = StatsWindow(self.user, self.storage)
         self.stats_window.show()
 
+    def open_catalog(self):
+        self.catalog_window = CatalogWindow(self.user, self.storage)
+        self.catalog_window.show()
+
+    def open_leaderboard(self):
+        self.leaderboard_window = LeaderboardWindow(self.user, self.storage)
+        self.leaderboard_window.show()
+
     # ------------------------------------------------------------------
     # AUDIO
     # ------------------------------------------------------------------
@@ -133,7 +346,7 @@ class MainWindow(QMainWindow):
 
     def _toggle_mute(self):
         self._muted = not self._muted
-        self.settings.setValue("audio/muted", self._muted)
+        self.settings.set(settings.AUDIO_MUTED, self._muted)
         self._apply_audio_settings()
         self._update_audio_action_text()
 
@@ -142,7 +355,7 @@ class MainWindow(QMainWindow):
 
     def _on_volume_changed(self, value: int):
         self._volume = value / 100
-        self.settings.setValue("audio/volume", self._volume)
+        self.settings.set(settings.AUDIO_VOLUME, self._volume)
         self._apply_audio_settings()
 
     # ------------------------------------------------------------------
@@ -165,7 +378,7 @@ class MainWindow(QMainWindow):
 
         self.level_glow = QGraphicsDropShadowEffect(self)
         self.level_glow.setBlurRadius(0)
-        self.level_glow.setColor(QColor("#7f5af0"))
+        self.level_glow.setColor(QColor(self._accent))
         self.level_glow.setOffset(0)
         self.level_label.setGraphicsEffect(self.level_glow)
 
@@ -179,7 +392,7 @@ class MainWindow(QMainWindow):
 
         self.exp_glow = QGraphicsDropShadowEffect(self)
         self.exp_glow.setBlurRadius(0)
-        self.exp_glow.setColor(QColor("#7f5af0"))
+        self.exp_glow.setColor(QColor(self._accent))
         self.exp_glow.setOffset(0)
         self.exp_bar.setGraphicsEffect(self.exp_glow)
 
@@ -208,93 +421,116 @@ class MainWindow(QMainWindow):
     # THEME
     # ------------------------------------------------------------------
     def _apply_dark_theme(self):
-        self.setStyleSheet("""
-        QWidget {
+        # préférences de thème (accent, taille de police)
+        accent = self._accent
+        font_size = self.settings.get(settings.THEME_FONT_SIZE)
+        self.setStyleSheet(f"""
+        QWidget {{
             background-color: #0b0f1a;
             color: #e6e6f0;
             font-family: Segoe UI;
-            font-size: 14px;
-        }
-        QLabel#systemLabel {
-            color: #7f5af0;
+            font-size: {font_size}px;
+        }}
+        QLabel#systemLabel {{
+            color: {accent};
             font-size: 26px;
             font-weight: bold;
             letter-spacing: 4px;
-        }
-        QLabel#levelLabel {
+        }}
+        QLabel#levelLabel {{
             font-size: 22px;
             font-weight: bold;
             color: #ffffff;
-        }
-        QLabel#expLabel {
+        }}
+        QLabel#expLabel {{
             font-size: 14px;
             color: #b8b8d1;
-        }
-        QProgressBar#expBar {
+        }}
+        QProgressBar#expBar {{
             background-color: #14182b;
             border: 1px solid #2d325a;
             border-radius: 6px;
             height: 18px;
             text-align: center;
             color: #ffffff;
-        }
-        QProgressBar#expBar::chunk {
-            background-color: #7f5af0;
+        }}
+        QProgressBar#expBar::chunk {{
+            background-color: {accent};
             border-radius: 6px;
-        }
-        QPushButton {
+        }}
+        QPushButton {{
             background-color: #1a1f36;
             border: 1px solid #2d325a;
             border-radius: 6px;
             padding: 6px 14px;
             color: #ffffff;
-        }
-        QPushButton:hover {
+        }}
+        QPushButton:hover {{
             background-color: #232863;
-            border-color: #7f5af0;
-        }
-        QPushButton:pressed {
-            background-color: #7f5af0;
-        }
+            border-color: {accent};
+        }}
+        QPushButton:pressed {{
+            background-color: {accent};
+        }}
         """)
 
     # ------------------------------------------------------------------
     # DASHBOARD (FIX PRINCIPAL ICI)
     # ------------------------------------------------------------------
+    @timed("ui.refresh_dashboard")
     def refresh_dashboard(self):
         stats = self.user.stats
-        level = stats.get_level()
-        exp = stats.get_exp_in_level()
 
         # 🔒 HEADER TOUJOURS MIS À JOUR
-        self.level_label.setText(f"LEVEL {level}")
-        self.exp_label.setText(f"EXP {exp} / 100 → Level {level + 1}")
-        self.exp_bar.setValue(exp)
+        self._set_header(stats.get_level(), stats.get_exp_in_level())
 
         # ⏱ DAILY TIMER
         self._update_daily_timer()
 
+        self._save_snapshot(self._refresh_boards())
 
-        # DAILY
-        self.storage.generate_daily_pool(level, count=3)
+    def _set_header(self, level: int, exp: int):
+        self.level_label.setText(f"LEVEL {level}")
+        self.exp_label.setText(f"EXP {exp} / 100 → Level {level + 1}")
+        self.exp_bar.setValue(exp)
 
+    def _refresh_boards(self, boards: dict | None = None, enabled: bool = True) -> dict:
+        """
+        Redessine les tableaux de quêtes
+        boards : lignes déjà connues (snapshot), sinon lues en DB
+        Retourne les lignes affichées {tableau: [dicts]}
+        """
         # NETTOYAGE UNIQUEMENT DES OBJECTIFS
         while self.objectives_container.count():
             item = self.objectives_container.takeAt(0)
             if item.widget():
                 item.widget().deleteLater()
 
-        daily_label = QLabel("DAILY QUESTS")
-        daily_label.setAlignment(Qt.AlignCenter)
-        daily_label.setObjectName("systemLabel")
-        self.objectives_container.addWidget(daily_label)
-
-        for row in self.storage.load_daily_objectives():
+        # les pools sont tirés par le scheduler, jamais ici
+        shown = {}
+        for board, title in BOARDS:
+            if boards is not None:
+                rows = boards.get(board, [])
+            else:
+                rows = board_rows(self.storage.load_board_objectives(board))
+            if board != "daily" and not rows:
+                continue
+            self._add_board_section(title, rows, enabled)
+            shown[board] = rows
+        return shown
+
+    def _add_board_section(self, title: str, rows, enabled: bool = True):
+        section_label = QLabel(title)
+        section_label.setAlignment(Qt.AlignCenter)
+        section_label.setObjectName("systemLabel")
+        self.objectives_container.addWidget(section_label)
+
+        for row in rows:
             obj = Objective(
                 id=row["id"],
                 title=row["title"],
                 category=Category(row["category"]),
-                frequency=Frequency.DAILY,
+                frequency=Frequency(row["frequency"]),
                 min_level=row["min_level"],
                 value=row["value"]
             )
@@ -304,6 +540,7 @@ class MainWindow(QMainWindow):
 
             label = QLabel(f"{obj.title}  +{obj.value} EXP")
             button = QPushButton("VALIDER")
+            button.setEnabled(enabled)
             button.clicked.connect(lambda _, o=obj: self._validate_daily(o))
 
             layout.addWidget(label)
@@ -312,81 +549,106 @@ class MainWindow(QMainWindow):
 
             self.objectives_container.addWidget(row_widget)
 
+    # ------------------------------------------------------------------
+    # SNAPSHOT (premier rendu instantané)
+    # ------------------------------------------------------------------
+    def _paint_snapshot(self, snapshot: DashboardSnapshot | None):
+        """
+        Rendu du dernier état connu, boutons désactivés jusqu'à la DB
+        Quêtes affichées seulement si le snapshot date d'aujourd'hui
+        (sinon les pools ont été renouvelés depuis)
+        """
+        if snapshot is None:
+            return
+
+        self._set_header(snapshot.level, snapshot.exp)
+
+        if snapshot.daily_reset_at:
+            self._snapshot_reset_at = datetime.fromisoformat(snapshot.daily_reset_at)
+            self._update_daily_timer()
+
+        if snapshot.day == datetime.now().date().isoformat():
+            self._refresh_boards(snapshot.boards, enabled=False)
+
+    def _save_snapshot(self, boards: dict):
+        stats = self.user.stats
+        reset_at = self.scheduler.next_rollover("daily")
+        snapshot = DashboardSnapshot(
+            day=self.storage.clock.today().isoformat(),
+            level=stats.get_level(),
+            exp=stats.get_exp_in_level(),
+            boards=boards,
+            daily_reset_at=reset_at.isoformat() if reset_at else None,
+        )
+        try:
+            save_snapshot(self.snapshot_path, snapshot)
+        except OSError:
+            logger.exception("dashboard snapshot failed")
+
+    # ------------------------------------------------------------------
+    # ROLLOVER
+    # ------------------------------------------------------------------
+    def _on_rollover(self, boards: list):
+        """
+        Reset (minuit / lundi) : seuls les quêtes et le compte à rebours
+        sont redessinés, le header ne change pas
+        """
+        self._update_daily_timer()
+        self._save_snapshot(self._refresh_boards())
+
     # ------------------------------------------------------------------
     # ACTIONS
     # ------------------------------------------------------------------
+    @timed("ui.validate_daily")
     def _validate_daily(self, objective):
-        if self.engine.validate_objective(objective):
-            # 💾 SAUVEGARDE STATS (OBLIGATOIRE)
-            self.storage.save_stats(self.user.stats)
-
-            self.storage.complete_daily_objective(objective.id)
+        command = self.commands.execute(objective)
+        if command is not None:
             self.sound_exp.play()
             self._animate_exp_gain()
-            self._check_achievements()
+            self._check_achievements(command.unlocked)
+            self.undo_action.setEnabled(True)
             self.refresh_dashboard()
+        else:
+            self._show_info_popup(
+                "⏳ COOLDOWN",
+                "Objectif déjà validé pour cette période"
+            )
+        return command
+
+    @timed("ui.undo_validation")
+    def _undo_validation(self):
+        command = self.commands.undo()
+        self.undo_action.setEnabled(self.commands.can_undo())
+        if command is None:
+            return
 
+        self.refresh_dashboard()
+        self._show_info_popup(
+            "↶ ANNULÉ",
+            f"{command.objective.title}  -{command.objective.value} EXP"
+        )
 
     # -------------------------
     # ACHIEVEMENTS
     # -------------------------
-    def _achievement_conditions(self):
-        """
-        Conditions de déblocage des achievements
-        Doit matcher EXACTEMENT achievements_window.py
-        """
-        stats = self.user.stats
-        level = stats.get_level()
-
-        return {
-            # publics
-            1: stats.total_validations >= 1,
-            2: stats.total_validations >= 5,
-            3: stats.current_streak >= 3,
-            4: stats.total_validations >= 25,
-            5: level >= 5,
-            6: level >= 10,
-
-            # secrets
-            100: level >= 7,
-            101: stats.validations_today >= 3,
-            102: stats.current_streak >= 7,
-            103: stats.combo_validations >= 5,
-        }
-    
-    def _achievement_rarity(self, ach_id: int) -> str:
-        """
-        Rareté d'un achievement
-        Doit matcher achievements_window.py
+    @timed("ui.check_achievements")
+    def _check_achievements(self, unlocked: list[int]):
         """
-        if ach_id >= 100:
-            return "legendary"
-        if ach_id in (3, 4, 5):
-            return "rare"
-        return "common"
-
-    def _check_achievements(self):
-        """
-        Vérifie et débloque les achievements
+        Annonce les achievements débloqués par une validation
         Basé sur la liste officielle achievements_window.py
         """
-        conditions = self._achievement_conditions()
-
-        for ach_id, unlocked in conditions.items():
-            if unlocked and not self.storage.is_achievement_unlocked(ach_id):
-                self.storage.unlock_achievement(ach_id)
-
-                rarity = self._achievement_rarity(ach_id)
-
-                # 🔥 LÉGENDAIRE → écran spécial
-                if rarity == "legendary":
-                    self._show_legendary_screen("AWAKENING")
-                else:
-                    self._show_achievement_popup(
-                        "Achievement débloqué",
-                        "Consulte la liste des achievements",
-                        rarity
-                    )
+        for ach_id in unlocked:
+            rarity = achievement_rarity(ach_id)
+
+            # 🔥 LÉGENDAIRE → écran spécial
+            if rarity == "legendary":
+                self._show_legendary_screen("AWAKENING")
+            else:
+                self._show_achievement_popup(
+                    "Achievement débloqué",
+                    "Consulte la liste des achievements",
+                    rarity
+                )
 
     def _show_achievement_popup(self, title: str, description: str, rarity: str):
         """
@@ -634,13 +896,15 @@ class MainWindow(QMainWindow):
         """
         Met à jour le timer avant le reset des Daily Quests
         """
-        now = datetime.now()
-        tomorrow = (now + timedelta(days=1)).replace(
-            hour=0, minute=0, second=0, microsecond=0
-        )
-
-        remaining = tomorrow - now
-        hours, remainder = divmod(int(remaining.total_seconds()), 3600)
+        if self.scheduler is not None:
+            reset_at = self.scheduler.next_rollover("daily")
+        else:
+            reset_at = self._snapshot_reset_at
+        if reset_at is None:
+            return
+
+        remaining = reset_at - datetime.now().astimezone()
+        hours, remainder = divmod(max(0, int(remaining.total_seconds())), 3600)
         minutes = remainder // 60
 
         self.daily_timer_label.setText(
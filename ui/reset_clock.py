@@ -0,0 +1,65 @@
+from datetime import datetime
+
+from PySide6.QtCore import QObject, QTimer, Qt, Signal
+
+from core.scheduler import PeriodScheduler
+
+
+class ResetClock(QObject):
+    """
+    Horloge de l'UI (deux timers single-shot, jamais de polling)
+    - minute_tick : aligné sur le début de chaque minute (compte à rebours)
+    - rolled : émis à l'instant exact du reset, après le tirage des pools
+      (périodes déjà tirées : clés de rollover par utilisateur, user_meta)
+    Au repos l'application ne se réveille qu'une fois par minute
+    """
+
+    minute_tick = Signal()
+    rolled = Signal(list)
+
+    def __init__(self, scheduler: PeriodScheduler, parent=None):
+        super().__init__(parent)
+        self.scheduler = scheduler
+
+        self._minute_timer = QTimer(self)
+        self._minute_timer.setSingleShot(True)
+        self._minute_timer.setTimerType(Qt.PreciseTimer)
+        self._minute_timer.timeout.connect(self._on_minute)
+
+        self._reset_timer = QTimer(self)
+        self._reset_timer.setSingleShot(True)
+        self._reset_timer.setTimerType(Qt.PreciseTimer)
+        self._reset_timer.timeout.connect(self._on_reset)
+
+    def start(self):
+        self._arm_minute()
+        self._arm_reset()
+
+    def stop(self):
+        self._minute_timer.stop()
+        self._reset_timer.stop()
+
+    # -------------------------
+    # TIMERS
+    # -------------------------
+    def _arm_minute(self):
+        now = datetime.now()
+        elapsed_ms = now.second * 1000 + now.microsecond // 1000
+        self._minute_timer.start(60_000 - elapsed_ms)
+
+    def _arm_reset(self):
+        """
+        Échéance pré-calculée par le scheduler (minuit local, DST inclus)
+        """
+        msec = int(self.scheduler.seconds_until_next() * 1000)
+        self._reset_timer.start(max(0, msec) + 50)
+
+    def _on_minute(self):
+        self.minute_tick.emit()
+        self._arm_minute()
+
+    def _on_reset(self):
+        rolled = self.scheduler.rollover()
+        if rolled:
+            self.rolled.emit(rolled)
+        self._arm_reset()
@@ -0,0 +1,99 @@
+from dataclasses import dataclass
+
+from PySide6.QtCore import QByteArray, QCoreApplication, QObject, QSettings, QTimer, Signal
+
+
+# écritures regroupées après ce délai sans modification
+DEBOUNCE_MS = 500
+
+
+@dataclass(frozen=True)
+class Setting:
+    """
+    Clé typée des préférences (QSettings)
+    """
+    key: str
+    type: type
+    default: object
+
+
+# =========================
+# CLÉS CONNUES
+# =========================
+AUDIO_VOLUME = Setting("audio/volume", float, 0.4)
+AUDIO_MUTED = Setting("audio/muted", bool, False)
+WINDOW_GEOMETRY = Setting("window/geometry", QByteArray, QByteArray())
+ACHIEVEMENTS_FILTER = Setting("achievements/filter", str, "all")
+THEME_ACCENT = Setting("theme/accent", str, "#7f5af0")
+THEME_FONT_SIZE = Setting("theme/font_size", int, 14)
+
+SETTINGS = (
+    AUDIO_VOLUME, AUDIO_MUTED, WINDOW_GEOMETRY,
+    ACHIEVEMENTS_FILTER, THEME_ACCENT, THEME_FONT_SIZE,
+)
+
+
+class SettingsService(QObject):
+    """
+    Préférences de l'UI
+    - lectures en mémoire (clés connues chargées une fois au démarrage)
+    - écritures différées : plusieurs set() successifs (slider, glisser
+      de fenêtre…) = une seule écriture, DEBOUNCE_MS après le dernier
+    - flush() : écrit tout de suite (fermeture, aboutToQuit)
+    - changed(key, valeur) : émis à chaque modification
+    Nouvelle préférence : une constante Setting, aucune I/O en plus
+    """
+
+    changed = Signal(str, object)
+
+    def __init__(self, settings: QSettings | None = None,
+                 delay_ms: int = DEBOUNCE_MS, parent=None):
+        super().__init__(parent)
+        self._settings = settings or QSettings("IronSystem", "IronSystemApp")
+        self._values = {}
+        self._dirty = {}
+
+        for setting in SETTINGS:
+            self._load(setting)
+
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(delay_ms)
+        self._timer.timeout.connect(self.flush)
+
+        app = QCoreApplication.instance()
+        if app is not None:
+            app.aboutToQuit.connect(self.flush)
+
+    def _load(self, setting: Setting):
+        value = self._settings.value(setting.key, setting.default, setting.type)
+        self._values[setting.key] = setting.default if value is None else value
+        return self._values[setting.key]
+
+    def get(self, setting: Setting):
+        if setting.key in self._values:
+            return self._values[setting.key]
+        return self._load(setting)
+
+    def set(self, setting: Setting, value):
+        if setting.type is not QByteArray:
+            value = setting.type(value)
+        if self.get(setting) == value:
+            return
+
+        self._values[setting.key] = value
+        self._dirty[setting.key] = value
+        self._timer.start()
+        self.changed.emit(setting.key, value)
+
+    def flush(self):
+        """
+        Écrit les modifications en attente (une seule synchronisation)
+        """
+        self._timer.stop()
+        if not self._dirty:
+            return
+        for key, value in self._dirty.items():
+            self._settings.setValue(key, value)
+        self._dirty.clear()
+        self._settings.sync()
@@ -0,0 +1,94 @@
+import json
+from pathlib import Path
+
+from PySide6.QtCore import QObject, QLockFile, Signal
+from PySide6.QtNetwork import QLocalServer
+
+from core import instance
+
+
+class InstanceRequest:
+    """
+    Arguments reçus d'un second lancement, en attente de réponse
+    """
+
+    def __init__(self, argv: list, socket):
+        self.argv = argv
+        self._socket = socket
+
+    def reply(self, output: list[str] | None = None):
+        """
+        Répond au lancement (lignes à afficher) et ferme la connexion
+        """
+        if self._socket is None:
+            return
+        data = json.dumps({"output": output or []}, ensure_ascii=False)
+        self._socket.write(data.encode("utf-8") + b"\n")
+        self._socket.flush()
+        self._socket.disconnectFromServer()
+        self._socket = None
+
+
+class SingleInstance(QObject):
+    """
+    Instance unique par DB
+    - verrou (QLockFile, libéré automatiquement si le processus meurt)
+    - QLocalServer : les lancements suivants y transmettent leurs arguments
+      (client : core/instance.py) puis se terminent
+    - received : émis pour chaque lancement transmis (InstanceRequest)
+    """
+
+    received = Signal(object)
+
+    def __init__(self, db_path: str, parent=None):
+        super().__init__(parent)
+        self.name = instance.server_name(db_path)
+
+        self.lock_path = instance.lock_path(db_path)
+        self._lock = QLockFile(self.lock_path)
+        # verrou périmé seulement si son processus n'existe plus
+        self._lock.setStaleLockTime(0)
+
+        self._server = QLocalServer(self)
+        self._server.newConnection.connect(self._on_connection)
+
+    def acquire(self) -> bool:
+        """
+        True si cette instance est la première (verrou + écoute),
+        False si une autre instance tient le verrou
+        OSError si le verrou ne peut pas être pris (dossier, droits…)
+        """
+        # premier lancement : data/ n'existe pas encore
+        Path(self.lock_path).parent.mkdir(parents=True, exist_ok=True)
+        if not self._lock.tryLock(0):
+            if self._lock.error() == QLockFile.LockError.LockFailedError:
+                return False
+            raise OSError(f"verrou impossible : {self.lock_path} ({self._lock.error().name})")
+        # socket laissé par une instance plantée
+        QLocalServer.removeServer(self.name)
+        return self._server.listen(self.name)
+
+    def release(self):
+        self._server.close()
+        self._lock.unlock()
+
+    def _on_connection(self):
+        while self._server.hasPendingConnections():
+            socket = self._server.nextPendingConnection()
+            buffer = bytearray()
+
+            def read(socket=socket, buffer=buffer):
+                buffer.extend(bytes(socket.readAll()))
+                if not buffer.endswith(b"\n"):
+                    return
+                socket.readyRead.disconnect()
+                try:
+                    argv = json.loads(buffer.decode("utf-8"))["argv"]
+                except (ValueError, KeyError):
+                    argv = []
+                self.received.emit(InstanceRequest(argv, socket))
+
+            socket.readyRead.connect(read)
+            socket.disconnected.connect(socket.deleteLater)
+            if socket.bytesAvailable():
+                read()
@@ -4,16 +4,31 @@ from PySide6.QtWidgets import (
 )
 from PySide6.QtCore import Qt
 
+from core import sketches
+from core.objective import Category
+from core.timeseries import build_series
 from core.user import User
 from core.storage import Storage
+from ui.charts import TimeSeriesChart
 
 
 class StatsWindow(QWidget):
     """
     Fenêtre Statistiques
     Version desktop lisible + scroll
+    - cartes : niveau, EXP, validations, streaks
+    - position parmi tous les utilisateurs (distributions, sans tri)
+    - graphiques : EXP cumulée, validations par catégorie, streak
+      (agrégats journaliers, sous-échantillonnés à la largeur du widget)
     """
 
+    # catégorie → (libellé, couleur) des courbes
+    CATEGORY_SERIES = {
+        Category.DISCIPLINE.value: ("Discipline", "#7f5af0"),
+        Category.ENDURANCE.value: ("Endurance", "#2cb67d"),
+        Category.MENTAL.value: ("Recovery", "#ff8906"),
+    }
+
     def __init__(self, user: User, storage: Storage):
         super().__init__()
 
@@ -21,7 +36,7 @@ class StatsWindow(QWidget):
         self.storage = storage
 
         self.setWindowTitle("Statistiques")
-        self.resize(420, 520)
+        self.resize(560, 760)
 
         self._setup_ui()
         self._load_stats()
@@ -70,9 +85,39 @@ class StatsWindow(QWidget):
         self._add_card("✅ Objectifs validés", stats.total_validations)
         self._add_card("🔥 Streak actuel", f"{stats.current_streak} jours")
         self._add_card("🏆 Meilleur streak", f"{stats.best_streak} jours")
+        self._add_card("📊 Position", self._percentiles())
+
+        self._add_charts()
 
         self.content_layout.addStretch()
 
+    def _percentiles(self) -> str:
+        # une ligne par distribution : "EXP de la semaine : Top 12 %"
+        return "\n".join(
+            f"{label} : {sketches.top_label(self.storage.percentile(metric))}"
+            for metric, label in sketches.METRICS.items()
+        )
+
+    def _add_charts(self):
+        series = build_series(
+            self.storage.daily_activity(), end=self.storage.clock.today()
+        )
+
+        exp_chart = TimeSeriesChart("📈 EXP cumulée")
+        category_chart = TimeSeriesChart("✅ Validations par catégorie / jour", "minmax")
+        streak_chart = TimeSeriesChart("🔥 Historique du streak", "minmax")
+
+        if series is not None:
+            exp_chart.set_series(series.start, [("EXP", "#7f5af0", series.exp)])
+            category_chart.set_series(series.start, [
+                (*self.CATEGORY_SERIES.get(category, (category, "#b8b8d1")), values)
+                for category, values in sorted(series.validations.items())
+            ])
+            streak_chart.set_series(series.start, [("Streak", "#ff8906", series.streak)])
+
+        for chart in (exp_chart, category_chart, streak_chart):
+            self.content_layout.addWidget(chart)
+
     # -------------------------
     # CARD
     # -------------------------